@@ -0,0 +1,3 @@
+"""
+工作流管理器性能基准测试
+"""
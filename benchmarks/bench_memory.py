@@ -0,0 +1,80 @@
+from dataclasses import dataclass, field
+from typing import Dict, List
+import argparse
+import gc
+import json
+import tracemalloc
+import uuid
+from src.core.scene import Workflow
+from benchmarks.synthetic import generate_store
+
+
+@dataclass
+class LegacyAction:
+    """紧凑化之前的动作表示，作为对照"""
+    type: str
+    path: str
+    delay: float
+
+
+@dataclass
+class LegacyWorkflow:
+    """紧凑化之前的工作流表示，作为对照"""
+    name: str
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    actions: List[LegacyAction] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LegacyWorkflow':
+        workflow = cls(name=data['name'], id=data['id'])
+        for action_data in data['actions']:
+            workflow.actions.append(LegacyAction(action_data['type'], action_data['path'], action_data['delay']))
+        return workflow
+
+    def copy(self, new_name: str) -> 'LegacyWorkflow':
+        workflow = LegacyWorkflow(name=new_name)
+        for action in self.actions:
+            workflow.actions.append(LegacyAction(action.type, action.path, action.delay))
+        return workflow
+
+
+def measure(text: str, factory, copy) -> int:
+    """解析文本并构建对象（含每个工作流的一份副本），返回保留的字节数"""
+    gc.collect()
+    tracemalloc.start()
+    data = json.loads(text)
+    workflows = [factory(item) for item in data.values()]
+    del data
+    copies = [copy(workflow, f"{workflow.name}_副本") for workflow in workflows]
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del workflows, copies
+    return retained
+
+
+def copy_compact(workflow: Workflow, new_name: str) -> Workflow:
+    """与 WorkflowManager.copy_workflow 相同的复制方式"""
+    return Workflow(name=new_name, actions=list(workflow.actions), max_concurrency=workflow.max_concurrency)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="比较动作紧凑表示前后每个动作占用的内存")
+    parser.add_argument('--workflows', type=int, default=2000, help="工作流数量")
+    parser.add_argument('--actions', type=int, default=50, help="每个工作流的动作数量")
+    parser.add_argument('--distinct-paths', type=int, default=500, help="不同路径的数量")
+    args = parser.parse_args()
+
+    text = generate_store(args.workflows, args.actions, args.distinct_paths)
+    total_actions = args.workflows * args.actions * 2  # 包含副本
+    legacy = measure(text, LegacyWorkflow.from_dict, LegacyWorkflow.copy)
+    compact = measure(text, Workflow.from_dict, copy_compact)
+
+    print(f"动作总数（含副本）: {total_actions}")
+    print(f"紧凑化之前: {legacy / total_actions:.1f} 字节/动作")
+    print(f"紧凑化之后: {compact / total_actions:.1f} 字节/动作")
+    print(f"节省: {(1 - compact / legacy) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+from typing import List, Optional
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.synthetic import generate_store
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT = os.path.join(ROOT_DIR, 'src', 'main.py')
+TIMING_PATTERN = re.compile(r"启动到首个动作耗时: ([\d.]+) ms")
+
+# 在子进程中导入图形界面模块并输出耗时（秒），导入失败时输出 error
+GUI_IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+try:
+    from ui.main_window import MainWindow
+except Exception:
+    print('error')
+else:
+    print(time.perf_counter() - start)
+"""
+
+
+def _environment() -> dict:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT_DIR, os.path.join(ROOT_DIR, 'src'), env.get('PYTHONPATH')]))
+    return env
+
+
+def measure_cli(store: str, workflow: str) -> tuple:
+    """空跑执行一次工作流
+
+    Returns:
+        tuple: (进程总耗时, 进程内从启动到首个动作的耗时)，单位秒
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, MAIN_SCRIPT, '--store', store, 'run', workflow, '--dry-run', '--timing'],
+        env=_environment(), capture_output=True, text=True, encoding='utf-8'
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    match = TIMING_PATTERN.search(result.stderr)
+    return elapsed, float(match.group(1)) / 1000 if match else None
+
+
+def measure_gui_import() -> Optional[float]:
+    """在新进程中导入图形界面模块的耗时，缺少图形界面依赖时返回 None"""
+    result = subprocess.run(
+        [sys.executable, '-c', GUI_IMPORT_SCRIPT],
+        env=_environment(), capture_output=True, text=True, encoding='utf-8'
+    )
+    output = result.stdout.strip()
+    return None if result.returncode != 0 or output == 'error' else float(output)
+
+
+def _median_ms(values: List[float]) -> str:
+    return f"{statistics.median(values) * 1000:.1f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="测量命令行模式的冷启动耗时，并与导入图形界面模块的耗时比较")
+    parser.add_argument('--workflows', type=int, default=100, help="工作流数量")
+    parser.add_argument('--actions', type=int, default=20, help="每个工作流的动作数量")
+    parser.add_argument('--repeat', type=int, default=5, help="测量次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="workflow-bench-") as directory:
+        store = os.path.join(directory, 'workflows.json')
+        with open(store, 'w', encoding='utf-8') as f:
+            # 延迟为0，测得的时间只包含启动、加载和调度
+            f.write(generate_store(args.workflows, args.actions, delay=0))
+        workflow = "工作流0"
+
+        totals, first_actions = [], []
+        for _ in range(args.repeat):
+            total, first_action = measure_cli(store, workflow)
+            totals.append(total)
+            if first_action is not None:
+                first_actions.append(first_action)
+        gui_imports = [value for value in (measure_gui_import() for _ in range(args.repeat)) if value is not None]
+
+    print(f"命令行空跑进程总耗时（中位）: {_median_ms(totals)}")
+    if first_actions:
+        print(f"命令行启动到首个动作（中位）: {_median_ms(first_actions)}")
+    if gui_imports:
+        print(f"导入图形界面模块（中位）: {_median_ms(gui_imports)}")
+    else:
+        print("导入图形界面模块: 缺少图形界面依赖，未测量")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from src.core.binary_storage import BinaryStorage, json_to_binary
+from src.core.bundle import export_bundle, import_bundle
+from src.core.executor import ExecutionEngine
+from src.core.launcher import PooledLauncher, RecordingLauncher, SubprocessLauncher
+from src.core.prefetch import DEFAULT_PREFETCH_BUDGET
+from src.core.scene import Schedule, Workflow, WorkflowManager
+from src.core.scheduler import Scheduler
+from src.core.simulator import simulate_workflows
+from src.core.tracing import RingBufferSink
+from benchmarks.synthetic import generate_store
+
+# 默认的合成数据规模（动作总数）
+DEFAULT_SIZES = [10, 1000, 100000, 1000000]
+ACTIONS_PER_WORKFLOW = 20
+NAME_CHECKS = 1000
+DRY_RUN_ACTIONS = 1000
+LAUNCH_ACTIONS = 50
+# 启动器测试中代替打开程序的空命令，只测量启动器本身的开销
+NOOP_COMMAND = ['true'] if os.name == 'posix' else ['cmd', '/c', 'rem']
+# 预读测试的文件数量、每个文件的大小和动作的延迟
+PREFETCH_FILES = 8
+PREFETCH_FILE_BYTES = 8 * 1024 * 1024
+PREFETCH_DELAY = 0.01
+
+
+@dataclass
+class BenchmarkResult:
+    """单项基准测试结果"""
+    name: str
+    actions: int
+    workflows: int
+    ops: int  # 每次计时包含的操作次数
+    best_seconds: float
+    median_seconds: float
+    peak_bytes: Optional[int] = None
+
+
+class BenchmarkContext:
+    """一种数据规模下各项测试共用的数据"""
+    def __init__(self, directory: str, total_actions: int):
+        self.actions_per_workflow = min(ACTIONS_PER_WORKFLOW, total_actions)
+        self.workflow_count = max(1, total_actions // self.actions_per_workflow)
+        self.total_actions = self.workflow_count * self.actions_per_workflow
+        self.text = generate_store(self.workflow_count, self.actions_per_workflow)
+        self.path = os.path.join(directory, f"workflows_{total_actions}.json")
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(self.text)
+        self.data: Dict = json.loads(self.text)
+        self.workflows = [Workflow.from_dict(item) for item in self.data.values()]
+        self._counter = 0
+
+    def unique_name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+
+def bench_from_dict(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    return lambda: [Workflow.from_dict(item) for item in ctx.data.values()], 1
+
+
+def bench_to_dict(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    return lambda: [workflow.to_dict() for workflow in ctx.workflows], 1
+
+
+def bench_load(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    return lambda: WorkflowManager(ctx.path), 1
+
+
+def bench_save(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """修改一个工作流后保存，只有该工作流需要重新编码"""
+    manager = WorkflowManager(ctx.path)
+    manager.save_workflows()
+    workflow_id = next(iter(manager.workflows))
+
+    def run() -> None:
+        manager.mark_dirty(workflow_id)
+        manager.save_workflows()
+    return run, 1
+
+
+def bench_save_full(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """所有工作流都有变更时保存"""
+    manager = WorkflowManager(ctx.path)
+
+    def run() -> None:
+        manager.mark_dirty(*manager.workflows)
+        manager.save_workflows()
+    return run, 1
+
+
+def _binary_path(ctx: BenchmarkContext) -> str:
+    """同一数据的二进制格式文件，首次使用时转换"""
+    path = os.path.splitext(ctx.path)[0] + '.wfb'
+    if not os.path.exists(path):
+        json_to_binary(ctx.path, path)
+    return path
+
+
+def bench_binary_load(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """从二进制格式加载，动作列表延迟解码"""
+    path = _binary_path(ctx)
+    return lambda: WorkflowManager(path).close(), 1
+
+
+def bench_binary_load_full(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """从二进制格式加载并解码全部动作，与 manager.load 对比"""
+    path = _binary_path(ctx)
+
+    def run() -> None:
+        manager = WorkflowManager(path)
+        for workflow in manager.workflows.values():
+            workflow.actions
+        manager.close()
+    return run, 1
+
+
+def bench_binary_read_one(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """打开二进制文件并通过索引只读取一个工作流"""
+    path = _binary_path(ctx)
+    workflow_id = ctx.workflows[len(ctx.workflows) // 2].id
+
+    def run() -> None:
+        storage = BinaryStorage(path)
+        storage.read_workflow(workflow_id)
+        storage.close()
+    return run, 1
+
+
+def bench_binary_save(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """修改一个工作流后保存为二进制格式，其余记录按字节复制"""
+    path = os.path.splitext(ctx.path)[0] + '_save.wfb'
+    shutil.copyfile(_binary_path(ctx), path)
+    manager = WorkflowManager(path)
+    workflow_id = next(iter(manager.workflows))
+
+    def run() -> None:
+        manager.mark_dirty(workflow_id)
+        manager.save_workflows()
+    return run, 1
+
+
+def bench_add(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    manager = WorkflowManager(ctx.path)
+
+    def run() -> None:
+        workflow = Workflow(name=ctx.unique_name("新增"))
+        workflow.add_action('file', "D:\\projects\\new.txt", 0.5)
+        manager.add_workflow(workflow)
+    return run, 1
+
+
+def bench_copy(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    manager = WorkflowManager(ctx.path)
+    source_id = next(iter(manager.workflows))
+    return lambda: manager.copy_workflow(source_id, ctx.unique_name("副本")), 1
+
+
+def bench_name_check(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    manager = WorkflowManager(ctx.path)
+    names = [workflow.name for workflow in manager.workflows.values()][:NAME_CHECKS // 2]
+    names += [f"不存在{i}" for i in range(NAME_CHECKS - len(names))]
+
+    def run() -> None:
+        for name in names:
+            manager.is_name_duplicate(name)
+    return run, len(names)
+
+
+def bench_path_index(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """首次按路径查询时建立路径索引"""
+    manager = WorkflowManager(ctx.path)
+    path = manager.workflows[next(iter(manager.workflows))].actions[0].path
+
+    def run() -> None:
+        manager._path_index = None
+        manager.find_path_usages(path)
+    return run, 1
+
+
+def bench_path_rewrite(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """替换所有工作流中的同一个路径并保存，两个路径之间来回替换"""
+    manager = WorkflowManager(ctx.path)
+    paths = [manager.workflows[next(iter(manager.workflows))].actions[0].path]
+    paths.append(paths[0] + ".moved")
+    manager.find_path_usages(paths[0])
+
+    def run() -> None:
+        manager.rewrite_path_prefix(paths[0], paths[1])
+        paths.reverse()
+    return run, 1
+
+
+def bench_search_build(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """建立搜索索引"""
+    manager = WorkflowManager(ctx.path)
+
+    def run() -> None:
+        manager.search_index = None
+        for _ in manager.build_search_index():
+            pass
+    return run, 1
+
+
+def bench_search(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """模拟逐字输入：名称前缀、名称中间的片段、文件名、目录名和不存在的文本"""
+    manager = WorkflowManager(ctx.path)
+    manager.search("")
+    name = manager.workflows[next(iter(manager.workflows))].name
+    queries = [name[:length] for length in range(1, len(name) + 1)]
+    queries += ["流1", "流12", "item_1", "item_12", "item_123", "shared", "不存在的文本"]
+
+    def run() -> None:
+        for query in queries:
+            manager.search(query)
+    return run, len(queries)
+
+
+def bench_bundle_export(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """将全部工作流导出为工作流包"""
+    path = os.path.join(os.path.dirname(ctx.path), "export.ndjson")
+    return lambda: export_bundle(path, ctx.workflows), 1
+
+
+def bench_bundle_import(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """将工作流包流式导入空的工作流文件，每批同步写入"""
+    directory = os.path.dirname(ctx.path)
+    bundle_path = os.path.join(directory, "import.ndjson")
+    export_bundle(bundle_path, ctx.workflows)
+    store_path = os.path.join(directory, "imported.json")
+
+    def run() -> None:
+        if os.path.exists(store_path):
+            os.remove(store_path)
+        manager = WorkflowManager(store_path)
+        import_bundle(manager, bundle_path)
+        manager.close()
+    return run, 1
+
+
+def _dry_run_workflow(ctx: BenchmarkContext) -> Workflow:
+    workflow = Workflow(name="dry-run")
+    for workflow_item in ctx.workflows:
+        for action in workflow_item.actions:
+            if len(workflow.actions) >= DRY_RUN_ACTIONS:
+                break
+            workflow.add_action(action.type, action.path, 0)
+    return workflow
+
+
+def bench_dry_run(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """使用不打开文件的启动器执行工作流，延迟全部为0"""
+    workflow = _dry_run_workflow(ctx)
+    engine = ExecutionEngine(launcher=RecordingLauncher())
+
+    def run() -> None:
+        engine.start(workflow).join()
+    return run, len(workflow.actions)
+
+
+def bench_dry_run_traced(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """同 bench_dry_run，追踪记录写入内存环形缓冲区"""
+    workflow = _dry_run_workflow(ctx)
+    engine = ExecutionEngine(launcher=RecordingLauncher(), trace_sink=RingBufferSink())
+
+    def run() -> None:
+        engine.start(workflow).join()
+    return run, len(workflow.actions)
+
+
+def bench_simulate(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """用虚拟时钟模拟同时执行所有工作流"""
+    return lambda: simulate_workflows(ctx.workflows, launch_time=0.1), ctx.total_actions
+
+
+def bench_scheduler_refresh(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """每个工作流带一个 cron 计划和一个间隔计划，计算全部下一次执行时间并建堆"""
+    manager = WorkflowManager(ctx.path)
+    for index, workflow in enumerate(manager.workflows.values()):
+        workflow.schedules = [
+            Schedule(cron=f"{index % 60} 9-17 * * mon-fri"),
+            Schedule(interval=60 + index % 3600)
+        ]
+
+    def run() -> None:
+        Scheduler(manager).refresh_all()
+    return run, ctx.workflow_count * 2
+
+
+_pooled_launcher: Optional[PooledLauncher] = None
+
+
+def _launch_workflow(ctx: BenchmarkContext) -> Workflow:
+    """每个动作都打开同一个已存在的文件，延迟全部为0"""
+    workflow = Workflow(name="launch", max_concurrency=LAUNCH_ACTIONS)
+    for _ in range(LAUNCH_ACTIONS):
+        workflow.add_action('file', ctx.path, 0)
+    return workflow
+
+
+def bench_launch_subprocess(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """每个动作在当前进程中启动一个空命令"""
+    workflow = _launch_workflow(ctx)
+    engine = ExecutionEngine(launcher=SubprocessLauncher(NOOP_COMMAND))
+
+    def run() -> None:
+        engine.start(workflow).join()
+    return run, LAUNCH_ACTIONS
+
+
+def bench_launch_pooled(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """同 bench_launch_subprocess，空命令由常驻的辅助进程成批启动"""
+    global _pooled_launcher
+    if _pooled_launcher is None:
+        # 各数据规模共用一个辅助进程，启动辅助进程的耗时不计入
+        _pooled_launcher = PooledLauncher(SubprocessLauncher(NOOP_COMMAND))
+        _pooled_launcher(ctx.path)
+    workflow = _launch_workflow(ctx)
+    engine = ExecutionEngine(launcher=_pooled_launcher)
+
+    def run() -> None:
+        engine.start(workflow).join()
+    return run, LAUNCH_ACTIONS
+
+
+def _cold_open_workflow(ctx: BenchmarkContext) -> Workflow:
+    """每个动作打开一个不同的文件，文件写入磁盘后只创建一次"""
+    directory = os.path.join(os.path.dirname(ctx.path), "prefetch")
+    workflow = Workflow(name="cold-open")
+    for index in range(PREFETCH_FILES):
+        path = os.path.join(directory, f"file{index}.bin")
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(os.urandom(PREFETCH_FILE_BYTES))
+                # 写回磁盘后缓存中的页才能被丢弃
+                os.fsync(f.fileno())
+        workflow.add_action('file', path, PREFETCH_DELAY)
+    return workflow
+
+
+def _evict(workflow: Workflow) -> None:
+    """把文件从系统缓存中丢弃，模拟第一次打开；没有 posix_fadvise 的平台上不丢弃"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for action in workflow.actions:
+        fd = os.open(action.path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def _read_launcher(path: str) -> None:
+    """读完整个文件，代替打开文件的程序"""
+    with open(path, 'rb', buffering=0) as f:
+        while f.read(1024 * 1024):
+            pass
+
+
+def bench_cold_open(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """有延迟的动作打开不在系统缓存中的文件，启动器读完整个文件"""
+    workflow = _cold_open_workflow(ctx)
+    engine = ExecutionEngine(launcher=_read_launcher)
+
+    def run() -> None:
+        _evict(workflow)
+        engine.start(workflow).join()
+    return run, PREFETCH_FILES
+
+
+def bench_cold_open_prefetched(ctx: BenchmarkContext) -> Tuple[Callable[[], None], int]:
+    """同 bench_cold_open，在动作等待延迟期间预读文件"""
+    workflow = _cold_open_workflow(ctx)
+    engine = ExecutionEngine(launcher=_read_launcher, prefetch_budget=DEFAULT_PREFETCH_BUDGET)
+
+    def run() -> None:
+        _evict(workflow)
+        engine.start(workflow).join()
+    return run, PREFETCH_FILES
+
+
+BENCHMARKS: List[Tuple[str, Callable[[BenchmarkContext], Tuple[Callable[[], None], int]]]] = [
+    ("workflow.from_dict", bench_from_dict),
+    ("workflow.to_dict", bench_to_dict),
+    ("manager.load", bench_load),
+    ("manager.save", bench_save),
+    ("manager.save_full", bench_save_full),
+    ("binary.load", bench_binary_load),
+    ("binary.load_full", bench_binary_load_full),
+    ("binary.read_one", bench_binary_read_one),
+    ("binary.save", bench_binary_save),
+    ("manager.add", bench_add),
+    ("manager.copy", bench_copy),
+    ("manager.name_check", bench_name_check),
+    ("manager.path_index", bench_path_index),
+    ("manager.path_rewrite", bench_path_rewrite),
+    ("search.build", bench_search_build),
+    ("search.query", bench_search),
+    ("bundle.export", bench_bundle_export),
+    ("bundle.import", bench_bundle_import),
+    ("execution.dry_run", bench_dry_run),
+    ("execution.dry_run_traced", bench_dry_run_traced),
+    ("execution.simulate", bench_simulate),
+    ("scheduler.refresh", bench_scheduler_refresh),
+    ("launcher.subprocess", bench_launch_subprocess),
+    ("launcher.pooled", bench_launch_pooled),
+    ("prefetch.cold_open", bench_cold_open),
+    ("prefetch.cold_open_prefetched", bench_cold_open_prefetched),
+]
+
+
+def measure_peak(run: Callable[[], None]) -> int:
+    """测量一次运行中新增内存的峰值"""
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - baseline
+
+
+def run_suite(
+    sizes: List[int],
+    repeat: int,
+    measure_memory: bool,
+    selected: Optional[List[str]] = None
+) -> List[BenchmarkResult]:
+    """运行基准测试
+
+    Args:
+        sizes: 合成数据规模（动作总数）
+        repeat: 每项测试的计时次数
+        measure_memory: 是否额外运行一次以测量内存峰值
+        selected: 只运行名称包含其中任一字符串的测试
+
+    Returns:
+        List[BenchmarkResult]: 测试结果
+    """
+    results = []
+    directory = tempfile.mkdtemp(prefix="workflow-bench-")
+    try:
+        for size in sizes:
+            ctx = BenchmarkContext(directory, size)
+            for name, factory in BENCHMARKS:
+                if selected and not any(pattern in name for pattern in selected):
+                    continue
+                # 每项测试使用新生成的数据文件，避免被前一项的写入影响
+                with open(ctx.path, 'w', encoding='utf-8') as f:
+                    f.write(ctx.text)
+                run, ops = factory(ctx)
+                timings = []
+                for _ in range(repeat):
+                    gc.collect()
+                    start = time.perf_counter()
+                    run()
+                    timings.append(time.perf_counter() - start)
+                result = BenchmarkResult(
+                    name=name,
+                    actions=ctx.total_actions,
+                    workflows=ctx.workflow_count,
+                    ops=ops,
+                    best_seconds=min(timings),
+                    median_seconds=statistics.median(timings),
+                    peak_bytes=measure_peak(run) if measure_memory else None
+                )
+                results.append(result)
+                print(format_result(result), file=sys.stderr)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def format_result(result: BenchmarkResult) -> str:
+    line = f"{result.name:<20} 动作 {result.actions:>9}  最佳 {result.best_seconds * 1000:>10.3f} ms  中位 {result.median_seconds * 1000:>10.3f} ms"
+    if result.peak_bytes is not None:
+        line += f"  内存峰值 {result.peak_bytes / 1024 / 1024:>8.2f} MiB"
+    return line
+
+
+def compare(results: List[BenchmarkResult], baseline: Dict, threshold: float) -> List[str]:
+    """与基线结果比较，返回变慢超过阈值的测试描述"""
+    baseline_results = {
+        (item['name'], item['actions']): item
+        for item in baseline.get('results', [])
+    }
+    regressions = []
+    for result in results:
+        old = baseline_results.get((result.name, result.actions))
+        if not old or old['best_seconds'] <= 0:
+            continue
+        ratio = result.best_seconds / old['best_seconds']
+        line = f"{result.name:<20} 动作 {result.actions:>9}  {old['best_seconds'] * 1000:>10.3f} ms -> {result.best_seconds * 1000:>10.3f} ms  x{ratio:.2f}"
+        print(line, file=sys.stderr)
+        if ratio > threshold:
+            regressions.append(line)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="工作流管理器基准测试，结果以JSON输出")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="合成数据规模（动作总数）")
+    parser.add_argument('--repeat', type=int, default=3, help="每项测试的计时次数")
+    parser.add_argument('--filter', nargs='*', help="只运行名称包含这些字符串的测试")
+    parser.add_argument('--no-memory', action='store_true', help="不测量内存峰值")
+    parser.add_argument('--output', help="结果JSON文件路径，默认输出到标准输出")
+    parser.add_argument('--baseline', help="用于比较的基线结果JSON文件")
+    parser.add_argument('--threshold', type=float, default=1.25, help="相对基线变慢超过该倍数视为退化")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.repeat, not args.no_memory, args.filter)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': [asdict(result) for result in results]
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} 项测试相对基线变慢超过 {args.threshold} 倍", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
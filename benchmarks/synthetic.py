@@ -0,0 +1,32 @@
+import json
+import uuid
+
+
+def generate_store(workflow_count: int, actions_per_workflow: int, distinct_paths: int = 500, delay: float = 0.5) -> str:
+    """生成 workflows.json 格式的文本，路径在工作流之间大量重复
+
+    Args:
+        workflow_count: 工作流数量
+        actions_per_workflow: 每个工作流的动作数量
+        distinct_paths: 不同路径的数量
+        delay: 每个动作的延迟时间
+
+    Returns:
+        str: workflows.json 文本
+    """
+    store = {}
+    for i in range(workflow_count):
+        workflow_id = str(uuid.uuid4())
+        store[workflow_id] = {
+            'id': workflow_id,
+            'name': f"工作流{i}",
+            'actions': [
+                {
+                    'type': 'folder' if j % 3 == 0 else 'file',
+                    'path': f"D:\\projects\\shared\\item_{(i * actions_per_workflow + j) % distinct_paths}.txt",
+                    'delay': delay
+                }
+                for j in range(actions_per_workflow)
+            ]
+        }
+    return json.dumps(store, ensure_ascii=False)
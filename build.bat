@@ -16,11 +16,32 @@ pyinstaller --noconfirm ^
     --icon=icon.ico ^
     --paths src ^
     --add-data "src/utils/workflows.json;utils" ^
+    --hidden-import=cli ^
     --hidden-import=ui ^
     --hidden-import=ui.main_window ^
     --hidden-import=ui.scene_dialog ^
+    --hidden-import=ui.workflow_list ^
+    --hidden-import=ui.action_grid ^
     --hidden-import=core ^
     --hidden-import=core.scene ^
+    --hidden-import=core.binary_storage ^
+    --hidden-import=core.bundle ^
+    --hidden-import=core.executor ^
+    --hidden-import=core.filelock ^
+    --hidden-import=core.ingest ^
+    --hidden-import=core.launcher ^
+    --hidden-import=core.prefetch ^
+    --hidden-import=core.scheduler ^
+    --hidden-import=core.search ^
+    --hidden-import=core.simulator ^
+    --hidden-import=core.storage ^
+    --hidden-import=core.sqlite_storage ^
+    --hidden-import=core.tracing ^
+    --hidden-import=core.validation ^
+    --hidden-import=sqlite3 ^
+    --hidden-import=mmap ^
+    --hidden-import=zlib ^
+    --hidden-import=msvcrt ^
     --hidden-import=utils ^
     --hidden-import=utils.path_utils ^
     --hidden-import=ttkthemes ^
@@ -30,9 +51,11 @@ pyinstaller --noconfirm ^
     --hidden-import=os ^
     --hidden-import=time ^
     --hidden-import=subprocess ^
+    --hidden-import=multiprocessing ^
     --hidden-import=sys ^
     --hidden-import=uuid ^
     --hidden-import=dataclasses ^
+    --hidden-import=argparse ^
     src/main.py
 
 echo 正在复制数据文件...
@@ -0,0 +1,548 @@
+from typing import List, Optional
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from src.core.bundle import DEFAULT_BATCH_SIZE, export_bundle, import_bundle, write_bundle
+from src.core.executor import (
+    ExecutionEngine,
+    EVENT_ACTION_FAILED, EVENT_ACTION_STARTED, EVENT_FINISHED, STATUS_COMPLETED
+)
+from src.core.launcher import LAUNCHER_POOLED, LAUNCHER_STARTFILE, LAUNCHER_SUBPROCESS, create_launcher
+from src.core.prefetch import DEFAULT_PREFETCH_BUDGET
+from src.core.scene import (
+    MERGE_POLICIES, MERGE_SKIP, MISFIRE_ONCE, MISFIRE_POLICIES, Schedule, StorageError, Workflow, WorkflowManager
+)
+from src.core.tracing import CallbackSink, JsonLinesSink, MultiSink, RunSummary, TraceSink, format_summary
+
+# 退出码
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_NOT_FOUND = 2
+
+# serve 检查其他程序修改工作流文件的间隔（秒）
+STORE_POLL_INTERVAL = 1.0
+
+
+def _find_workflows(manager: WorkflowManager, keys: List[str]) -> Optional[List[Workflow]]:
+    """按ID或名称查找工作流，有找不到的工作流时返回 None"""
+    workflows = []
+    for key in keys:
+        workflow = manager.get_workflow(key) or manager.get_workflow_by_name(key)
+        if workflow is None:
+            print(f"找不到工作流: {key}", file=sys.stderr)
+            return None
+        workflows.append(workflow)
+    return workflows
+
+
+def cmd_list(manager: WorkflowManager, args: argparse.Namespace) -> int:
+    """列出所有工作流"""
+    for workflow in sorted(manager.workflows.values(), key=lambda w: w.name):
+        print(f"{workflow.id}\t{workflow.name}")
+    return EXIT_OK
+
+
+def cmd_validate(manager: WorkflowManager, args: argparse.Namespace) -> int:
+    """检查工作流的动作路径"""
+    from src.core.validation import PathValidator
+
+    workflows = _find_workflows(manager, args.workflows) if args.workflows else list(manager.workflows.values())
+    if workflows is None:
+        return EXIT_NOT_FOUND
+
+    validator = PathValidator()
+    try:
+        problems = validator.validate(workflows)
+    finally:
+        validator.shutdown()
+    for workflow in workflows:
+        for problem in problems.get(workflow.id, []):
+            print(f"{workflow.name}\t{problem.index + 1}\t{problem.path}\t{problem.reason}")
+    print(f"检查了 {len(workflows)} 个工作流，{len(problems)} 个存在无效路径", file=sys.stderr)
+    return EXIT_FAILED if problems else EXIT_OK
+
+
+def cmd_export(manager: WorkflowManager, args: argparse.Namespace) -> int:
+    """以 workflows.json 的格式或每行一个工作流的格式导出工作流"""
+    workflows = _find_workflows(manager, args.workflows) if args.workflows else list(manager.workflows.values())
+    if workflows is None:
+        return EXIT_NOT_FOUND
+
+    if args.format == 'ndjson':
+        if args.output:
+            export_bundle(args.output, workflows)
+        else:
+            write_bundle(workflows, sys.stdout)
+        return EXIT_OK
+
+    data = {workflow.id: workflow.to_dict() for workflow in workflows}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+    else:
+        json.dump(data, sys.stdout, ensure_ascii=False, indent=4)
+        print()
+    return EXIT_OK
+
+
+def cmd_import(manager: WorkflowManager, args: argparse.Namespace) -> int:
+    """流式导入工作流包，按工作流ID合并"""
+    def progress(report, total: int) -> None:
+        percent = report.bytes_read * 100 // total if total else 100
+        print(f"\r已读取 {percent}%，导入 {report.imported} 个工作流", end='', file=sys.stderr, flush=True)
+
+    try:
+        report = import_bundle(manager, args.file, args.on_conflict, args.batch_size, progress)
+    except (OSError, StorageError) as e:
+        print(f"\n导入失败: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    print(file=sys.stderr)
+    for error in report.errors:
+        print(error, file=sys.stderr)
+    print(
+        f"新增 {report.added} 个，替换 {report.replaced} 个，改名 {report.renamed} 个，"
+        f"跳过 {report.skipped} 个，无法解析 {report.invalid} 行",
+        file=sys.stderr
+    )
+    return EXIT_FAILED if report.invalid else EXIT_OK
+
+
+def cmd_where(manager: WorkflowManager, args: argparse.Namespace) -> int:
+    """查找使用某个路径的动作"""
+    usages = manager.find_path_usages(args.path, include_children=args.children)
+    for workflow_id, positions in sorted(usages.items(), key=lambda item: manager.workflows[item[0]].name):
+        workflow = manager.workflows[workflow_id]
+        for position in positions:
+            print(f"{workflow.name}\t{position + 1}\t{workflow.actions[position].path}")
+    return EXIT_OK if usages else EXIT_NOT_FOUND
+
+
+def cmd_rewrite_paths(manager: WorkflowManager, args: argparse.Namespace) -> int:
+    """将文件夹下的路径替换为新位置"""
+    counts = manager.rewrite_path_prefix(args.old, args.new)
+    print(f"替换了 {len(counts)} 个工作流中的 {sum(counts.values())} 个动作", file=sys.stderr)
+    return EXIT_OK if counts else EXIT_NOT_FOUND
+
+
+def cmd_convert(manager: WorkflowManager, args: argparse.Namespace) -> int:
+    """在JSON和二进制格式之间转换工作流文件，源文件的格式自动识别"""
+    from src.core.binary_storage import binary_to_json, json_to_binary
+    from src.core.storage import FORMAT_BINARY, FORMAT_JOURNAL, FORMAT_JSON
+
+    source = manager.workflows_file
+    if not os.path.exists(source):
+        print(f"工作流文件不存在: {source}", file=sys.stderr)
+        return EXIT_NOT_FOUND
+    if os.path.exists(args.target):
+        print(f"目标文件已存在: {args.target}", file=sys.stderr)
+        return EXIT_FAILED
+    if manager.storage.format == FORMAT_JOURNAL:
+        # 先把日志合并进快照，转换的结果才包含全部修改
+        manager.storage.close()
+    if manager.storage.format in (FORMAT_JSON, FORMAT_JOURNAL):
+        count = json_to_binary(source, args.target, compress=args.compress)
+    elif manager.storage.format == FORMAT_BINARY:
+        count = binary_to_json(source, args.target)
+    else:
+        print("只支持JSON和二进制格式之间的转换", file=sys.stderr)
+        return EXIT_FAILED
+    print(
+        f"转换了 {count} 个工作流：{os.path.getsize(source)} 字节 -> {os.path.getsize(args.target)} 字节",
+        file=sys.stderr
+    )
+    return EXIT_OK
+
+
+def _create_trace_sink(args: argparse.Namespace) -> Optional[TraceSink]:
+    """按 --trace 和 --trace-file 创建追踪记录的接收者，都未指定时返回 None
+
+    Raises:
+        OSError: 无法打开追踪文件
+    """
+    sinks: List[TraceSink] = []
+    if args.trace:
+        def print_summary(summary: RunSummary) -> None:
+            print(f"追踪: {summary.workflow_name}，{format_summary(summary)}", file=sys.stderr)
+        sinks.append(CallbackSink(on_run=print_summary))
+    if args.trace_file:
+        sinks.append(JsonLinesSink(args.trace_file))
+    if not sinks:
+        return None
+    return sinks[0] if len(sinks) == 1 else MultiSink(sinks)
+
+
+def _prefetch_budget(args: argparse.Namespace) -> Optional[int]:
+    """--prefetch 指定的预读字节数，空跑时不预读"""
+    if args.dry_run or args.prefetch is None:
+        return None
+    return int(args.prefetch * 1024 * 1024)
+
+
+def cmd_run(manager: WorkflowManager, args: argparse.Namespace, start_time: float) -> int:
+    """执行工作流并等待完成"""
+    workflows = _find_workflows(manager, [args.workflow])
+    if workflows is None:
+        return EXIT_NOT_FOUND
+    workflow = workflows[0]
+    try:
+        trace_sink = _create_trace_sink(args)
+    except OSError as e:
+        print(f"无法打开追踪文件: {e}", file=sys.stderr)
+        return EXIT_FAILED
+
+    first_launch: List[float] = []
+    launch_lock = threading.Lock()
+    system_launcher = None if args.dry_run else create_launcher(args.launcher)
+
+    def launcher(path: str) -> None:
+        with launch_lock:
+            if not first_launch:
+                first_launch.append(time.perf_counter())
+        if args.dry_run:
+            print(f"[空跑] 打开 {path}")
+        else:
+            system_launcher(path)
+
+    engine = ExecutionEngine(
+        launcher=launcher,
+        trace_sink=trace_sink,
+        prefetch_budget=_prefetch_budget(args)
+    )
+    run = engine.start(workflow)
+    status = None
+    try:
+        while status is None:
+            try:
+                event = engine.events.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if event.kind == EVENT_ACTION_STARTED:
+                action = run.actions[event.index]
+                print(f"({event.index + 1}/{event.total}) {action.path}", file=sys.stderr)
+            elif event.kind == EVENT_ACTION_FAILED:
+                print(event.message, file=sys.stderr)
+            elif event.kind == EVENT_FINISHED:
+                status = event.status
+    except KeyboardInterrupt:
+        run.cancel()
+        run.join()
+        status = run.status
+    finally:
+        if system_launcher is not None:
+            system_launcher.close()
+        if trace_sink is not None:
+            trace_sink.close()
+
+    if args.timing and first_launch:
+        print(f"启动到首个动作耗时: {(first_launch[0] - start_time) * 1000:.1f} ms", file=sys.stderr)
+    print(f"执行结束: {workflow.name} ({status})", file=sys.stderr)
+    return EXIT_OK if status == STATUS_COMPLETED else EXIT_FAILED
+
+
+def cmd_simulate(manager: WorkflowManager, args: argparse.Namespace) -> int:
+    """用虚拟时钟模拟执行工作流，输出每个工作流的用时和打开时间线"""
+    from src.core.simulator import simulate_workflows
+
+    workflows = _find_workflows(manager, args.workflows) if args.workflows else list(manager.workflows.values())
+    if workflows is None:
+        return EXIT_NOT_FOUND
+
+    def check_path(path: str) -> None:
+        # 与系统启动器一致，路径不存在时打开失败，工作流在此停止
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"路径不存在: {path}")
+
+    begin = time.perf_counter()
+    report = simulate_workflows(
+        sorted(workflows, key=lambda w: w.name),
+        launch_time=args.launch_time,
+        launcher=check_path if args.check_paths else None
+    )
+    elapsed = time.perf_counter() - begin
+    for result in report.results:
+        print(
+            f"{result.workflow_name}\t{result.status}\t{result.duration:.3f}\t"
+            f"{len(result.launches)}\t{result.peak_concurrency}\t{result.error}"
+        )
+        if args.timeline:
+            for launch in result.launches:
+                print(f"\t{launch.start:.3f}\t{launch.end:.3f}\t{launch.index + 1}\t{launch.path}\t{launch.error}")
+    print(
+        f"模拟了 {len(report.results)} 个工作流的 {sum(len(result.launches) for result in report.results)} 次打开，"
+        f"用时 {elapsed * 1000:.0f} ms；同时开始执行时 {report.duration:.3f} 秒后全部结束，"
+        f"其中 {report.overlap:.3f} 秒有多个工作流同时执行（最多 {report.peak_workflows} 个）",
+        file=sys.stderr
+    )
+    if report.failed:
+        print(f"{len(report.failed)} 个工作流执行失败", file=sys.stderr)
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+def _format_time(timestamp: Optional[float]) -> str:
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)) if timestamp is not None else '-'
+
+
+def cmd_schedule(manager: WorkflowManager, args: argparse.Namespace) -> int:
+    """查看和修改工作流的定时计划"""
+    from src.core.scheduler import Scheduler
+
+    if args.schedule_command == 'list':
+        workflows = _find_workflows(manager, args.workflows) if args.workflows else list(manager.workflows.values())
+        if workflows is None:
+            return EXIT_NOT_FOUND
+        # 只用来计算下一次执行时间，不启动调度线程
+        scheduler = Scheduler(manager)
+        scheduler.refresh_all()
+        for workflow in sorted(workflows, key=lambda w: w.name):
+            for schedule in workflow.schedules:
+                state = _format_time(scheduler.next_run(workflow.id, schedule.id)) if schedule.enabled else '已停用'
+                print(
+                    f"{workflow.name}\t{schedule.id}\t{schedule.describe()}\t{schedule.misfire}\t"
+                    f"上次 {_format_time(schedule.last_run)}\t下次 {state}"
+                )
+        return EXIT_OK
+
+    workflows = _find_workflows(manager, [args.workflow])
+    if workflows is None:
+        return EXIT_NOT_FOUND
+    workflow = workflows[0]
+    if args.schedule_command == 'add':
+        schedule = Schedule(interval=args.every, cron=args.cron, misfire=args.misfire)
+        success, error = manager.set_schedules(workflow.id, workflow.schedules + [schedule])
+        if not success:
+            print(error, file=sys.stderr)
+            return EXIT_FAILED
+        print(schedule.id)
+        return EXIT_OK
+
+    # 计划ID可以只写开头的一部分
+    remaining = [schedule for schedule in workflow.schedules if not schedule.id.startswith(args.schedule_id)]
+    if len(workflow.schedules) - len(remaining) != 1:
+        print(f"找不到唯一的定时计划: {args.schedule_id}", file=sys.stderr)
+        return EXIT_NOT_FOUND
+    manager.set_schedules(workflow.id, remaining)
+    return EXIT_OK
+
+
+def cmd_serve(manager: WorkflowManager, args: argparse.Namespace) -> int:
+    """不打开窗口，持续按定时计划执行工作流，直到按 Ctrl+C"""
+    from src.core.scheduler import Scheduler
+
+    try:
+        trace_sink = _create_trace_sink(args)
+    except OSError as e:
+        print(f"无法打开追踪文件: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    system_launcher = None if args.dry_run else create_launcher(args.launcher)
+
+    def launcher(path: str) -> None:
+        if args.dry_run:
+            print(f"[空跑] 打开 {path}")
+        else:
+            system_launcher(path)
+
+    engine = ExecutionEngine(
+        launcher=launcher,
+        trace_sink=trace_sink,
+        prefetch_budget=_prefetch_budget(args)
+    )
+    scheduler = Scheduler(manager)
+    success, error = scheduler.start()
+    if not success:
+        print(error, file=sys.stderr)
+        if system_launcher is not None:
+            system_launcher.close()
+        if trace_sink is not None:
+            trace_sink.close()
+        return EXIT_FAILED
+    upcoming = scheduler.upcoming(1)
+    print(
+        f"正在执行定时计划，下一次: {_format_time(upcoming[0].scheduled_time) if upcoming else '无'}，按 Ctrl+C 退出",
+        file=sys.stderr
+    )
+    next_reload = time.monotonic() + STORE_POLL_INTERVAL
+    try:
+        while True:
+            try:
+                event = engine.events.get(timeout=0.1)
+            except queue.Empty:
+                event = None
+            if event is not None and event.kind == EVENT_ACTION_FAILED:
+                print(event.message, file=sys.stderr)
+            elif event is not None and event.kind == EVENT_FINISHED:
+                print(f"执行结束: {event.workflow_name} ({event.status})", file=sys.stderr)
+
+            if time.monotonic() >= next_reload:
+                next_reload = time.monotonic() + STORE_POLL_INTERVAL
+                try:
+                    changed, removed = manager.reload_changes()
+                except StorageError as e:
+                    print(e, file=sys.stderr)
+                else:
+                    if changed or removed:
+                        scheduler.refresh(*changed, *removed)
+                for warning in manager.take_storage_warnings():
+                    print(warning, file=sys.stderr)
+            try:
+                runs = scheduler.poll()
+            except StorageError as e:
+                print(e, file=sys.stderr)
+                continue
+            for run in runs:
+                workflow = manager.workflows[run.workflow_id]
+                late = "（补执行）" if run.late else ""
+                print(f"定时执行{late}: {workflow.name}，计划时间 {_format_time(run.scheduled_time)}", file=sys.stderr)
+                engine.start(workflow)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+        engine.cancel_all(timeout=1.0)
+        if system_launcher is not None:
+            system_launcher.close()
+        if trace_sink is not None:
+            trace_sink.close()
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="workflow", description="工作流管理器命令行，不加载图形界面")
+    parser.add_argument('--store', help="工作流文件路径，默认与图形界面相同")
+    parser.add_argument('--journal', action='store_true', help="将JSON工作流文件切换为追加日志模式，每次修改只追加一条记录")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('list', help="列出所有工作流")
+
+    validate_parser = subparsers.add_parser('validate', help="检查工作流的动作路径")
+    validate_parser.add_argument('workflows', nargs='*', help="工作流ID或名称，默认检查全部")
+
+    export_parser = subparsers.add_parser('export', help="导出工作流")
+    export_parser.add_argument('workflows', nargs='*', help="工作流ID或名称，默认导出全部")
+    export_parser.add_argument('-o', '--output', help="输出文件，默认输出到标准输出")
+    export_parser.add_argument(
+        '--format', choices=['json', 'ndjson'], default='json',
+        help="json 与 workflows.json 相同；ndjson 每行一个工作流，可用 import 流式导入"
+    )
+
+    import_parser = subparsers.add_parser('import', help="导入每行一个工作流的工作流包")
+    import_parser.add_argument('file', help="工作流包文件")
+    import_parser.add_argument(
+        '--on-conflict', choices=MERGE_POLICIES, default=MERGE_SKIP,
+        help="ID或名称已存在时：skip 跳过；overwrite 替换ID相同的工作流；rename 作为新工作流导入。"
+             "后两者在名称重复时加序号改名"
+    )
+    import_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="每批提交的工作流数量")
+
+    where_parser = subparsers.add_parser('where', help="查找使用某个路径的动作")
+    where_parser.add_argument('path', help="文件或文件夹路径")
+    where_parser.add_argument('--children', action='store_true', help="同时查找文件夹下的所有路径")
+
+    rewrite_parser = subparsers.add_parser('rewrite-paths', help="文件夹移动后替换所有工作流中的路径")
+    rewrite_parser.add_argument('old', help="原文件夹路径")
+    rewrite_parser.add_argument('new', help="新文件夹路径")
+
+    convert_parser = subparsers.add_parser('convert', help="将JSON工作流文件转换为二进制格式，或将二进制格式转换回JSON")
+    convert_parser.add_argument('target', help="输出文件，不能已存在")
+    convert_parser.add_argument('--compress', action='store_true', help="转换为二进制格式时压缩动作和字符串")
+
+    schedule_parser = subparsers.add_parser('schedule', help="查看和修改工作流的定时计划")
+    schedule_commands = schedule_parser.add_subparsers(dest='schedule_command', required=True)
+    schedule_list_parser = schedule_commands.add_parser('list', help="列出定时计划及下一次执行时间")
+    schedule_list_parser.add_argument('workflows', nargs='*', help="工作流ID或名称，默认列出全部")
+    schedule_add_parser = schedule_commands.add_parser('add', help="添加定时计划，输出计划ID")
+    schedule_add_parser.add_argument('workflow', help="工作流ID或名称")
+    rule_group = schedule_add_parser.add_mutually_exclusive_group(required=True)
+    rule_group.add_argument('--every', type=float, metavar='SECONDS', help="每隔多少秒执行一次，从现在开始计算")
+    rule_group.add_argument('--cron', metavar='EXPR', help="cron 表达式（分 时 日 月 周），如 \"0 9 * * mon-fri\"")
+    schedule_add_parser.add_argument(
+        '--misfire', choices=MISFIRE_POLICIES, default=MISFIRE_ONCE,
+        help="错过计划时间后：skip 跳过；once 补执行一次；all 每次都补上"
+    )
+    schedule_remove_parser = schedule_commands.add_parser('remove', help="删除定时计划")
+    schedule_remove_parser.add_argument('workflow', help="工作流ID或名称")
+    schedule_remove_parser.add_argument('schedule_id', help="计划ID，可以只写开头的一部分")
+
+    serve_parser = subparsers.add_parser('serve', help="不打开窗口，持续按定时计划执行工作流")
+    serve_parser.add_argument('--dry-run', action='store_true', help="只输出要打开的路径，不真正打开")
+    serve_parser.add_argument(
+        '--launcher', choices=(LAUNCHER_STARTFILE, LAUNCHER_SUBPROCESS, LAUNCHER_POOLED),
+        help="打开路径的方式，默认 Windows 上为 startfile，其他平台为 subprocess（xdg-open 或 open）"
+    )
+    serve_parser.add_argument('--trace', action='store_true', help="每次执行结束后输出启动耗时和延后统计")
+    serve_parser.add_argument('--trace-file', metavar='FILE', help="把每个动作的追踪记录追加到文件（每行一个JSON对象）")
+    serve_parser.add_argument(
+        '--prefetch', type=float, nargs='?', const=DEFAULT_PREFETCH_BUDGET / 1024 / 1024, metavar='MB',
+        help=f"在动作等待延迟期间预读路径，每次执行最多预读 MB 兆字节（默认{DEFAULT_PREFETCH_BUDGET // 1024 // 1024}）"
+    )
+
+    simulate_parser = subparsers.add_parser('simulate', help="用虚拟时钟模拟执行工作流，不等待延迟、不打开路径")
+    simulate_parser.add_argument('workflows', nargs='*', help="工作流ID或名称，默认模拟全部")
+    simulate_parser.add_argument('--timeline', action='store_true', help="输出每个动作的打开时间")
+    simulate_parser.add_argument('--launch-time', type=float, default=0.0, metavar='SECONDS', help="假定每次打开占用的秒数")
+    simulate_parser.add_argument('--check-paths', action='store_true', help="路径不存在时按打开失败处理")
+
+    run_parser = subparsers.add_parser('run', help="执行工作流")
+    run_parser.add_argument('workflow', help="工作流ID或名称")
+    run_parser.add_argument('--dry-run', action='store_true', help="只输出要打开的路径，不真正打开")
+    run_parser.add_argument('--timing', action='store_true', help="输出从启动到首个动作的耗时")
+    run_parser.add_argument(
+        '--launcher', choices=(LAUNCHER_STARTFILE, LAUNCHER_SUBPROCESS, LAUNCHER_POOLED),
+        help="打开路径的方式，默认 Windows 上为 startfile，其他平台为 subprocess（xdg-open 或 open）"
+    )
+    run_parser.add_argument('--trace', action='store_true', help="执行结束后输出启动耗时和延后统计")
+    run_parser.add_argument('--trace-file', metavar='FILE', help="把每个动作的追踪记录追加到文件（每行一个JSON对象）")
+    run_parser.add_argument(
+        '--prefetch', type=float, nargs='?', const=DEFAULT_PREFETCH_BUDGET / 1024 / 1024, metavar='MB',
+        help=f"在动作等待延迟期间预读路径，每次执行最多预读 MB 兆字节（默认{DEFAULT_PREFETCH_BUDGET // 1024 // 1024}）"
+    )
+    return parser
+
+
+def main(argv: List[str], start_time: Optional[float] = None) -> int:
+    """命令行入口
+
+    Args:
+        argv: 命令行参数（不含程序名）
+        start_time: 进程启动时的 time.perf_counter()，用于统计启动耗时
+
+    Returns:
+        int: 退出码
+    """
+    start_time = start_time if start_time is not None else time.perf_counter()
+    args = build_parser().parse_args(argv)
+    try:
+        manager = WorkflowManager(args.store, journal=args.journal)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return EXIT_FAILED
+    try:
+        if args.command == 'list':
+            return cmd_list(manager, args)
+        if args.command == 'validate':
+            return cmd_validate(manager, args)
+        if args.command == 'export':
+            return cmd_export(manager, args)
+        if args.command == 'import':
+            return cmd_import(manager, args)
+        if args.command == 'where':
+            return cmd_where(manager, args)
+        if args.command == 'rewrite-paths':
+            return cmd_rewrite_paths(manager, args)
+        if args.command == 'convert':
+            return cmd_convert(manager, args)
+        if args.command == 'schedule':
+            return cmd_schedule(manager, args)
+        if args.command == 'serve':
+            return cmd_serve(manager, args)
+        if args.command == 'simulate':
+            return cmd_simulate(manager, args)
+        return cmd_run(manager, args, start_time)
+    finally:
+        for warning in manager.take_storage_warnings():
+            print(warning, file=sys.stderr)
+        manager.close()
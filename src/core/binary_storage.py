@@ -0,0 +1,455 @@
+from itertools import accumulate
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from array import array
+import json
+import mmap
+import os
+import struct
+import sys
+import uuid
+import zlib
+from src.core.filelock import FileLock
+from src.core.scene import Action, Schedule, Workflow
+from src.core.storage import (
+    BINARY_MAGIC, FORMAT_BINARY, JsonStorage, NameTable, WorkflowStorage, atomic_write, file_stamp
+)
+
+# 二进制格式的版本
+BINARY_VERSION = 1
+# 文件头的标志位：动作记录和字符串表用 zlib 压缩
+FLAG_COMPRESSED = 1
+COMPRESS_LEVEL = 6
+# 表示未设置的字符串引用
+NO_STRING = 0xFFFFFFFF
+# 字符串表超过上次整体重写时的两倍再多出这个数量后，下次提交时整体重写，去掉不再使用的字符串
+COMPACT_SLACK = 1024
+# Windows 上被映射的文件不能被替换，其他程序无法提交，因此改为整体读入内存
+USE_MMAP = os.name != 'nt'
+
+# 动作的标志位
+_INT_DELAY = 1  # 延迟原本是整数，读取时还原，与JSON互相转换时保持一致
+_HAS_DEPENDS = 2  # 设置了 depends_on，依赖索引在动作数组之后
+
+# 文件头：标识、版本、标志、字符串表ID、字符串表偏移、字符串数、字符串表字节数、
+# 索引偏移、工作流数、上次整体重写时的字符串数
+_HEADER = struct.Struct('<4sHHQQIIQII')
+# 索引项：ID、名称、最大并发数、定时计划（JSON 文本）的字符串引用，记录的偏移和字节数
+_INDEX_ENTRY = struct.Struct('<IIiIQI')
+# 动作：类型、路径、延迟、并行组、标志
+_ACTION = struct.Struct('<IIdIB')
+_COUNT = struct.Struct('<I')
+_SPAN = struct.Struct('<II')
+
+
+class _Header(NamedTuple):
+    magic: bytes
+    version: int
+    flags: int
+    table_id: int  # 整体重写时随机生成，相同时字符串引用保持不变
+    strings_offset: int
+    string_count: int
+    strings_length: int
+    index_offset: int
+    workflow_count: int
+    live_strings: int
+
+
+class _IndexEntry(NamedTuple):
+    id: int
+    name: int
+    max_concurrency: int
+    schedules: int
+    offset: int
+    length: int
+
+
+def _encode_actions(actions: Iterable[Action], ref: Callable[[str], int]) -> bytes:
+    """编码动作列表：动作数、定长的动作数组、各动作的依赖索引"""
+    records = []
+    depends = []
+    pack = _ACTION.pack
+    for action in actions:
+        flags = _INT_DELAY if type(action.delay) is int else 0
+        if action.depends_on is not None:
+            flags |= _HAS_DEPENDS
+            depends.append(struct.pack(f'<I{len(action.depends_on)}i', len(action.depends_on), *action.depends_on))
+        group = NO_STRING if action.group is None else ref(action.group)
+        records.append(pack(ref(action.type), ref(action.path), action.delay, group, flags))
+    return _COUNT.pack(len(records)) + b''.join(records) + b''.join(depends)
+
+
+def _decode_actions(data: bytes, string: Callable[[int], str]) -> List[Action]:
+    (count,) = _COUNT.unpack_from(data, 0)
+    position = _COUNT.size + count * _ACTION.size
+    actions = []
+    for type_ref, path_ref, delay, group_ref, flags in _ACTION.iter_unpack(data[_COUNT.size:position]):
+        depends_on = None
+        if flags & _HAS_DEPENDS:
+            (length,) = _COUNT.unpack_from(data, position)
+            depends_on = struct.unpack_from(f'<{length}i', data, position + _COUNT.size)
+            position += _COUNT.size + 4 * length
+        actions.append(Action(
+            type=string(type_ref),
+            path=string(path_ref),
+            delay=int(delay) if flags & _INT_DELAY else delay,
+            group=None if group_ref == NO_STRING else string(group_ref),
+            depends_on=depends_on
+        ))
+    return actions
+
+
+def _encode_schedules(schedules: List[Schedule]) -> str:
+    return json.dumps([schedule.to_dict() for schedule in schedules], ensure_ascii=False, separators=(',', ':'))
+
+
+class _StringTableBuilder:
+    """写入时的字符串表，已有的字符串保持原来的引用"""
+    def __init__(self, strings: Iterable[str] = ()):
+        self.strings: List[str] = list(strings)
+        self._refs: Dict[str, int] = {}
+        for ref, value in enumerate(self.strings):
+            self._refs.setdefault(value, ref)
+
+    def ref(self, value: str) -> int:
+        ref = self._refs.get(value)
+        if ref is None:
+            ref = len(self.strings)
+            self.strings.append(value)
+            self._refs[value] = ref
+        return ref
+
+    def encode(self) -> bytes:
+        """字符串数加一个偏移（相对字符串数据的开头），之后是 UTF-8 字符串数据"""
+        encoded = [value.encode('utf-8') for value in self.strings]
+        offsets = array('I', accumulate(map(len, encoded), initial=0))
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        return offsets.tobytes() + b''.join(encoded)
+
+
+class _Snapshot:
+    """一个版本的二进制工作流文件
+
+    打开时只读取文件头和索引，字符串在用到时解码，动作记录在读取对应的
+    工作流时才解码。文件被替换后旧版本仍然可用，延迟加载的工作流始终从
+    读到它的版本中读取动作。
+    """
+    def __init__(self, path: str, strings: Optional[List[str]] = None):
+        """
+        Args:
+            path: 文件路径
+            strings: 已知的全部字符串，刚写入文件时传入，省去解码
+
+        Raises:
+            ValueError: 文件格式错误
+        """
+        with open(path, 'rb') as f:
+            # 空文件无法映射，读入后与其他格式错误一起报告
+            if USE_MMAP and os.fstat(f.fileno()).st_size:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.data = f.read()
+        try:
+            self.header = _Header(*_HEADER.unpack_from(self.data, 0))
+            if self.header.magic != BINARY_MAGIC:
+                raise ValueError("工作流文件格式错误")
+            if self.header.version != BINARY_VERSION:
+                raise ValueError(f"不支持的二进制工作流文件版本: {self.header.version}")
+            self.compressed = bool(self.header.flags & FLAG_COMPRESSED)
+
+            start, length = self.header.strings_offset, self.header.strings_length
+            if self.compressed:
+                self._table = zlib.decompress(self.data[start:start + length])
+                self._table_start = 0
+            else:
+                self._table = self.data
+                self._table_start = start
+            self._blob_start = self._table_start + 4 * (self.header.string_count + 1)
+            self._strings: List[Optional[str]] = strings if strings is not None else [None] * self.header.string_count
+
+            self.index: Dict[str, _IndexEntry] = {}
+            start = self.header.index_offset
+            end = start + self.header.workflow_count * _INDEX_ENTRY.size
+            if end > len(self.data):
+                raise ValueError("工作流文件不完整")
+            for entry in _INDEX_ENTRY.iter_unpack(self.data[start:end]):
+                entry = _IndexEntry(*entry)
+                self.index[self.string(entry.id)] = entry
+        except (struct.error, zlib.error, IndexError, UnicodeDecodeError) as e:
+            raise ValueError(f"工作流文件格式错误: {e}") from None
+
+    def string(self, ref: int) -> str:
+        value = self._strings[ref]
+        if value is None:
+            start, end = _SPAN.unpack_from(self._table, self._table_start + 4 * ref)
+            value = sys.intern(self._table[self._blob_start + start:self._blob_start + end].decode('utf-8'))
+            self._strings[ref] = value
+        return value
+
+    def all_strings(self) -> List[str]:
+        return [self.string(ref) for ref in range(self.header.string_count)]
+
+    def raw_record(self, entry: _IndexEntry) -> bytes:
+        """文件中的动作记录，压缩时为压缩后的数据"""
+        return self.data[entry.offset:entry.offset + entry.length]
+
+    def actions(self, workflow_id: str) -> List[Action]:
+        data = self.raw_record(self.index[workflow_id])
+        if self.compressed:
+            data = zlib.decompress(data)
+        return _decode_actions(data, self.string)
+
+    def workflow(self, workflow_id: str, lazy: bool = True) -> Workflow:
+        """读取工作流，lazy 为 True 时动作在首次访问时才解码"""
+        entry = self.index[workflow_id]
+        schedules = None
+        if entry.schedules != NO_STRING:
+            schedules = [Schedule.from_dict(data) for data in json.loads(self.string(entry.schedules))]
+        return Workflow(
+            name=self.string(entry.name),
+            id=workflow_id,
+            max_concurrency=entry.max_concurrency,
+            actions=None if lazy else self.actions(workflow_id),
+            actions_loader=(lambda: self.actions(workflow_id)) if lazy else None,
+            schedules=schedules
+        )
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+
+class BinaryStorage(WorkflowStorage):
+    """紧凑的二进制存储
+
+    文件依次为文件头、每个工作流一条的动作记录、字符串表和索引。路径、名称等
+    字符串在字符串表中只存一份，动作是定长的引用和延迟；索引记录每个工作流的
+    名称、定时计划和动作记录的位置。加载时只读取索引，动作列表在首次访问时
+    才从映射的文件中解码，read_workflow 可以只读取一个工作流。
+
+    提交时整体写入新文件后原子替换。字符串表保持原有的引用，未变更的动作记录
+    直接按字节复制；字符串表比上次整体重写时增长一倍以上时重新编码全部工作流。
+    与 JsonStorage 相同，多个进程通过文件锁互斥，提交前先读取其他进程的修改。
+    """
+    format = FORMAT_BINARY
+
+    def __init__(self, path: str, compress: Optional[bool] = None, lock_timeout: float = 10.0):
+        """
+        Args:
+            path: 文件路径
+            compress: 是否压缩动作记录和字符串表，None 表示沿用已有文件的设置，新文件不压缩
+            lock_timeout: 等待其他进程释放文件锁的最长秒数
+        """
+        super().__init__(path)
+        self.compress = compress
+        self._lock = FileLock(f"{path}.lock", lock_timeout)
+        self._snapshot: Optional[_Snapshot] = None  # 最近一次读写的文件版本
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        # 已从文件读到、尚未交给调用方的其他进程的修改
+        self._external_changed: Dict[str, Workflow] = {}
+        self._external_removed: Set[str] = set()
+
+    def load(self) -> Dict[str, Workflow]:
+        with self._lock:
+            self._external_changed, self._external_removed = {}, set()
+            self._open()
+            snapshot = self._snapshot
+        if snapshot is None:
+            return {}
+        return {workflow_id: snapshot.workflow(workflow_id) for workflow_id in snapshot.index}
+
+    def read_workflow(self, workflow_id: str) -> Optional[Workflow]:
+        """通过索引只读取一个工作流及其动作，不解码其他工作流，工作流不存在时返回 None"""
+        with self._lock:
+            if self._snapshot is None:
+                self._open()
+            else:
+                self._read_external()
+            snapshot = self._snapshot
+        if snapshot is None or workflow_id not in snapshot.index:
+            return None
+        return snapshot.workflow(workflow_id, lazy=False)
+
+    def save_all(self, workflows: Dict[str, Workflow]) -> None:
+        with self._lock:
+            self._external_changed, self._external_removed = {}, set()
+            self._write(list(workflows.items()), base=None)
+
+    def commit(self, workflows: Dict[str, Workflow], changed: Iterable[str] = (), removed: Iterable[str] = ()) -> None:
+        changed, removed = list(changed), list(removed)
+        with self._lock:
+            self._read_external()
+            base = self._snapshot
+            # 其他进程可能已保存了同名的工作流
+            names = NameTable(
+                (workflow_id, base.string(entry.name)) for workflow_id, entry in (base.index.items() if base else ())
+            )
+            names.check(workflows, changed, removed)
+            # 与 JsonStorage 相同：保持原有顺序，修改的工作流原位替换，新增的排在最后
+            items: Dict[str, Optional[Workflow]] = dict.fromkeys(base.index if base else ())
+            for workflow_id in removed:
+                items.pop(workflow_id, None)
+            for workflow_id in changed:
+                if workflow_id in workflows:
+                    items[workflow_id] = workflows[workflow_id]
+            self._write(list(items.items()), base)
+            for workflow_id in changed + removed:
+                self._external_changed.pop(workflow_id, None)
+                self._external_removed.discard(workflow_id)
+
+    def refresh(self) -> Optional[Tuple[Dict[str, Workflow], List[str]]]:
+        # 文件未变化时只需一次 stat，不必获取文件锁
+        if file_stamp(self.path) == self._stamp and not (self._external_changed or self._external_removed):
+            return None
+        with self._lock:
+            self._read_external()
+            changed, removed = self._external_changed, self._external_removed
+            self._external_changed, self._external_removed = {}, set()
+        if not changed and not removed:
+            return None
+        return changed, list(removed)
+
+    def close(self) -> None:
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+
+    def _open(self) -> None:
+        """打开当前文件，文件不存在或为空时没有工作流"""
+        self._stamp = file_stamp(self.path)
+        self._snapshot = _Snapshot(self.path) if self._stamp is not None and self._stamp[1] else None
+
+    def _read_external(self) -> None:
+        """文件被其他进程替换时打开新版本，与之前的版本比较得出其他进程的修改"""
+        stamp = file_stamp(self.path)
+        if stamp == self._stamp or stamp is None:
+            # 文件被删除时保留已有内容，下次提交会重新写出
+            return
+        old = self._snapshot
+        self._open()
+        new = self._snapshot
+        same_table = (
+            old is not None and new is not None
+            and old.header.table_id == new.header.table_id
+            and old.compressed == new.compressed
+        )
+        new_index = new.index if new is not None else {}
+        for workflow_id, entry in new_index.items():
+            old_entry = old.index.get(workflow_id) if old is not None else None
+            if old_entry is not None:
+                if same_table:
+                    # 字符串引用相同，直接比较索引项和记录的字节
+                    unchanged = old_entry[:4] == entry[:4] and old.raw_record(old_entry) == new.raw_record(entry)
+                else:
+                    unchanged = old.workflow(workflow_id, lazy=False) == new.workflow(workflow_id, lazy=False)
+                if unchanged:
+                    continue
+            self._external_changed[workflow_id] = new.workflow(workflow_id)
+            self._external_removed.discard(workflow_id)
+        if old is not None:
+            for workflow_id in old.index:
+                if workflow_id not in new_index:
+                    self._external_changed.pop(workflow_id, None)
+                    self._external_removed.add(workflow_id)
+
+    def _write(self, items: List[Tuple[str, Optional[Workflow]]], base: Optional[_Snapshot]) -> None:
+        """写入新文件，值为 None 的工作流沿用 base 中的数据"""
+        compress = self.compress if self.compress is not None else bool(base and base.compressed)
+        reuse = (
+            base is not None
+            and base.compressed == compress
+            and base.header.string_count <= 2 * base.header.live_strings + COMPACT_SLACK
+        )
+        if reuse:
+            builder = _StringTableBuilder(base.all_strings())
+            table_id, live_strings = base.header.table_id, base.header.live_strings
+        else:
+            builder = _StringTableBuilder()
+            table_id, live_strings = uuid.uuid4().int >> 64, 0
+
+        records: List[bytes] = []
+        entries: List[bytes] = []
+        offset = _HEADER.size
+        for workflow_id, workflow in items:
+            if workflow is None and reuse:
+                entry = base.index[workflow_id]
+                record = base.raw_record(entry)
+                entry = entry._replace(offset=offset)
+            else:
+                if workflow is None:
+                    workflow = base.workflow(workflow_id)
+                record = _encode_actions(workflow.read_actions(), builder.ref)
+                if compress:
+                    record = zlib.compress(record, COMPRESS_LEVEL)
+                entry = _IndexEntry(
+                    id=builder.ref(workflow.id),
+                    name=builder.ref(workflow.name),
+                    max_concurrency=workflow.max_concurrency,
+                    schedules=builder.ref(_encode_schedules(workflow.schedules)) if workflow.schedules else NO_STRING,
+                    offset=offset,
+                    length=0
+                )
+            entries.append(_INDEX_ENTRY.pack(*entry._replace(length=len(record))))
+            records.append(record)
+            offset += len(record)
+
+        table = builder.encode()
+        if compress:
+            table = zlib.compress(table, COMPRESS_LEVEL)
+        header = _HEADER.pack(
+            BINARY_MAGIC, BINARY_VERSION, FLAG_COMPRESSED if compress else 0, table_id,
+            offset, len(builder.strings), len(table), offset + len(table), len(entries),
+            live_strings or len(builder.strings)
+        )
+
+        def write(f) -> None:
+            f.write(header)
+            for record in records:
+                f.write(record)
+            f.write(table)
+            f.write(b''.join(entries))
+
+        atomic_write(self.path, write, binary=True)
+        self._stamp = file_stamp(self.path)
+        self._snapshot = _Snapshot(self.path, builder.strings)
+
+
+def json_to_binary(json_path: str, binary_path: str, compress: bool = False) -> int:
+    """将 workflows.json 转换为二进制格式
+
+    Args:
+        json_path: workflows.json 路径
+        binary_path: 二进制文件路径，已存在时被覆盖
+        compress: 是否压缩
+
+    Returns:
+        int: 转换的工作流数量
+    """
+    workflows = JsonStorage(json_path).load()
+    storage = BinaryStorage(binary_path, compress=compress)
+    try:
+        storage.save_all(workflows)
+    finally:
+        storage.close()
+    return len(workflows)
+
+
+def binary_to_json(binary_path: str, json_path: str) -> int:
+    """将二进制格式转换为 workflows.json，与 json_to_binary 互逆
+
+    输出的格式与当前版本保存的 workflows.json 相同，旧版本文件中省略的字段按默认值写出。
+
+    Args:
+        binary_path: 二进制文件路径
+        json_path: workflows.json 路径，已存在时被覆盖
+
+    Returns:
+        int: 转换的工作流数量
+    """
+    storage = BinaryStorage(binary_path)
+    try:
+        workflows = storage.load()
+        JsonStorage(json_path).save_all(workflows)
+    finally:
+        storage.close()
+    return len(workflows)
@@ -0,0 +1,196 @@
+from dataclasses import dataclass, field
+from typing import IO, Callable, Iterable, Iterator, List, Optional
+import json
+import os
+from src.core.scene import (
+    MERGE_ADDED, MERGE_RENAMED, MERGE_REPLACED, MERGE_SKIP, MERGE_SKIPPED,
+    Workflow, WorkflowManager
+)
+from src.core.storage import atomic_write
+
+# 工作流包文件的扩展名
+BUNDLE_EXTENSION = '.ndjson'
+# 每批合并的工作流数量
+DEFAULT_BATCH_SIZE = 500
+# 同步写入时每批至少包含已有工作流数量的这个比例。JSON 存储每次提交都
+# 重写整个文件，批次随工作流数量增大，总写入量才与最终文件大小成正比
+BATCH_GROWTH = 0.1
+# 报告中最多保留的错误信息条数
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass
+class ImportReport:
+    """导入工作流包的进度和结果，导入过程中不断更新"""
+    added: int = 0
+    replaced: int = 0
+    renamed: int = 0
+    skipped: int = 0
+    invalid: int = 0  # 无法解析的行数
+    bytes_read: int = 0
+    errors: List[str] = field(default_factory=list)  # 最多 MAX_REPORTED_ERRORS 条错误信息
+    imported_ids: List[str] = field(default_factory=list)  # 新增、替换或改名的工作流ID
+
+    @property
+    def imported(self) -> int:
+        """新增、替换或改名的工作流数量"""
+        return self.added + self.replaced + self.renamed
+
+
+def encode_bundle_line(workflow: Workflow) -> str:
+    """将工作流编码为工作流包中的一行，字符串中的换行已被转义"""
+    return json.dumps(workflow.to_dict(), ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def write_bundle(workflows: Iterable[Workflow], f: IO[str]) -> int:
+    """逐个写入工作流，每行一个
+
+    延迟加载的工作流读取动作后不保留，内存占用与工作流数量无关。
+
+    Args:
+        workflows: 要导出的工作流
+        f: 文本文件对象
+
+    Returns:
+        int: 写入的工作流数量
+    """
+    count = 0
+    for workflow in workflows:
+        f.write(encode_bundle_line(workflow))
+        count += 1
+    return count
+
+
+def export_bundle(path: str, workflows: Iterable[Workflow]) -> int:
+    """将工作流原子地导出为工作流包文件
+
+    Args:
+        path: 目标文件路径
+        workflows: 要导出的工作流
+
+    Returns:
+        int: 导出的工作流数量
+    """
+    counts = []
+    atomic_write(path, lambda f: counts.append(write_bundle(workflows, f)))
+    return counts[0]
+
+
+def _parse_line(line: bytes, line_number: int, report: ImportReport) -> Optional[Workflow]:
+    """解析一行，空行和无法解析的行返回 None，错误记入报告"""
+    try:
+        # 第一行可能带有记事本等编辑器写入的 BOM
+        text = line.decode('utf-8-sig' if line_number == 1 else 'utf-8').strip()
+        if not text:
+            return None
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            raise ValueError("不是JSON对象")
+        if not isinstance(data.get('name'), str) or not data['name']:
+            raise ValueError("缺少工作流名称")
+        if not isinstance(data.get('id', ''), str):
+            raise ValueError("工作流ID不是字符串")
+        return Workflow.from_dict(data)
+    except (ValueError, KeyError, TypeError) as e:
+        report.invalid += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(f"第 {line_number} 行: {e}")
+        return None
+
+
+def _merge(manager: WorkflowManager, batch: List[Workflow], policy: str, report: ImportReport) -> None:
+    outcomes = manager.merge_workflows(batch, policy)
+    for workflow, outcome in zip(batch, outcomes):
+        if outcome == MERGE_SKIPPED:
+            report.skipped += 1
+            continue
+        if outcome == MERGE_ADDED:
+            report.added += 1
+        elif outcome == MERGE_REPLACED:
+            report.replaced += 1
+        elif outcome == MERGE_RENAMED:
+            report.renamed += 1
+        report.imported_ids.append(workflow.id)
+
+
+def iter_import(
+    manager: WorkflowManager,
+    path: str,
+    policy: str = MERGE_SKIP,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[ImportReport]:
+    """流式导入工作流包，按工作流ID合并到管理器中
+
+    逐行读取和解析，每攒够一批就通过 merge_workflows 合并并提交，
+    同时只有一批工作流在解析中，文件大小不影响额外占用的内存。
+    无法解析的行被跳过并记入报告。中途停止迭代时，已提交的批次保留。
+
+    Args:
+        manager: 工作流管理器
+        path: 工作流包文件路径
+        policy: ID或名称冲突时的处理方式，见 MERGE_POLICIES
+        batch_size: 每批合并的工作流数量
+
+    Yields:
+        ImportReport: 每提交一批产生一次，始终是同一个报告对象
+
+    Raises:
+        OSError: 读取文件失败
+        StorageError: 同步写入失败，失败的一批不生效
+    """
+    report = ImportReport()
+    batch: List[Workflow] = []
+    limit = _batch_limit(manager, batch_size)
+    with open(path, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            report.bytes_read += len(line)
+            workflow = _parse_line(line, line_number, report)
+            if workflow is None:
+                continue
+            batch.append(workflow)
+            if len(batch) >= limit:
+                _merge(manager, batch, policy, report)
+                batch = []
+                limit = _batch_limit(manager, batch_size)
+                yield report
+    if batch:
+        _merge(manager, batch, policy, report)
+    yield report
+
+
+def _batch_limit(manager: WorkflowManager, batch_size: int) -> int:
+    if manager.save_delay is not None:
+        # 后台写入会合并连续的提交，小批次不增加写入次数
+        return batch_size
+    return max(batch_size, int(len(manager.workflows) * BATCH_GROWTH))
+
+
+def import_bundle(
+    manager: WorkflowManager,
+    path: str,
+    policy: str = MERGE_SKIP,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[Callable[[ImportReport, int], None]] = None
+) -> ImportReport:
+    """导入整个工作流包
+
+    Args:
+        manager: 工作流管理器
+        path: 工作流包文件路径
+        policy: ID或名称冲突时的处理方式，见 MERGE_POLICIES
+        batch_size: 每批合并的工作流数量
+        progress: 每提交一批调用一次，参数为 (报告, 文件总字节数)
+
+    Returns:
+        ImportReport: 导入结果
+
+    Raises:
+        OSError: 读取文件失败
+        StorageError: 同步写入失败，失败的一批不生效
+    """
+    total = os.path.getsize(path)
+    report = ImportReport()
+    for report in iter_import(manager, path, policy, batch_size):
+        if progress is not None:
+            progress(report, total)
+    return report
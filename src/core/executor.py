@@ -0,0 +1,504 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+import heapq
+import queue
+import threading
+import time
+import uuid
+from src.core.launcher import create_launcher
+from src.core.prefetch import Prefetcher
+from src.core.scene import Action, Workflow
+from src.core.tracing import OUTCOME_FAILED, OUTCOME_OK, ActionTrace, RunSummary, TraceSink, summarize_run
+
+# 执行状态
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_PAUSED = 'paused'
+STATUS_COMPLETED = 'completed'
+STATUS_CANCELLED = 'cancelled'
+STATUS_FAILED = 'failed'
+
+# 事件类型
+EVENT_STARTED = 'started'
+EVENT_ACTION_STARTED = 'action_started'
+EVENT_ACTION_FINISHED = 'action_finished'
+EVENT_ACTION_FAILED = 'action_failed'
+EVENT_PAUSED = 'paused'
+EVENT_RESUMED = 'resumed'
+EVENT_FINISHED = 'finished'
+
+
+@dataclass
+class ExecutionEvent:
+    """执行进度事件，由工作线程放入队列，UI线程取出处理"""
+    run_id: str
+    workflow_id: str
+    workflow_name: str
+    kind: str
+    status: str
+    index: int = -1  # 相关动作的索引，-1 表示与具体动作无关
+    completed: int = 0
+    total: int = 0
+    message: str = ''
+
+
+def resolve_dependencies(actions: List[Action]) -> List[List[int]]:
+    """计算每个动作的前置动作
+
+    没有设置并行字段的动作依赖上一步；相邻且 group 相同的动作组成一步，
+    共享同一组前置动作，下一步依赖组内所有动作；设置了 depends_on 的动作
+    只依赖指定的前面动作，无效索引被忽略。
+
+    Args:
+        actions: 动作列表
+
+    Returns:
+        List[List[int]]: 每个动作的前置动作索引
+    """
+    predecessors: List[List[int]] = []
+    previous_step: List[int] = []  # 上一步包含的动作
+    current_step: List[int] = []  # 当前步包含的动作
+    current_group: Optional[str] = None
+    for index, action in enumerate(actions):
+        if action.group is None or action.group != current_group:
+            # 开始新的一步
+            if current_step:
+                previous_step = current_step
+            current_step = []
+            current_group = action.group
+        current_step.append(index)
+
+        if action.depends_on is not None:
+            predecessors.append(sorted({i for i in action.depends_on if 0 <= i < index}))
+        else:
+            predecessors.append(list(previous_step))
+    return predecessors
+
+
+class ActionQueue:
+    """一次执行的调度状态
+
+    记录按计划时间排序的待触发动作、每个动作尚未完成的前置动作数和正在打开的
+    动作数。时间由调用方传入，本身不读取时钟也不加锁：WorkflowRun 在持有条件
+    变量时以执行时钟调用，模拟执行（src.core.simulator）以虚拟时钟调用，
+    两者的调度结果因此一致。
+    """
+    def __init__(
+        self,
+        actions: List[Action],
+        max_concurrency: int,
+        on_scheduled: Optional[Callable[[int, float], None]] = None
+    ):
+        """
+        Args:
+            actions: 动作列表
+            max_concurrency: 同时打开的最大动作数
+            on_scheduled: 动作开始计算延迟时调用，参数为动作索引和计划时间
+        """
+        self.actions = actions
+        self.max_concurrency = max(1, max_concurrency)
+        self.in_flight = 0
+        self._on_scheduled = on_scheduled
+        self._heap: List[Tuple[float, int]] = []  # (计划时间, 动作索引) 小根堆
+        predecessors = resolve_dependencies(actions)
+        self._remaining = [len(preds) for preds in predecessors]  # 每个动作尚未完成的前置动作数
+        self._dependents: List[List[int]] = [[] for _ in actions]  # 每个动作的后续动作
+        for index, preds in enumerate(predecessors):
+            for pred in preds:
+                self._dependents[pred].append(index)
+
+    @property
+    def idle(self) -> bool:
+        """没有待触发和正在打开的动作"""
+        return not self._heap and self.in_flight == 0
+
+    def start(self, now: float) -> None:
+        """开始计算没有前置动作的动作的延迟"""
+        for index, count in enumerate(self._remaining):
+            if count == 0:
+                self._schedule(index, now)
+
+    def pop_due(self, now: float) -> List[Tuple[float, int]]:
+        """取出已到计划时间的动作，不超过并发限制，返回 (计划时间, 动作索引) 列表"""
+        due_actions = []
+        while self._heap and self.in_flight < self.max_concurrency and self._heap[0][0] <= now:
+            due_actions.append(heapq.heappop(self._heap))
+            self.in_flight += 1
+        return due_actions
+
+    def next_due(self) -> Optional[float]:
+        """最早的计划时间，没有待触发的动作或并发已满时为 None"""
+        if self._heap and self.in_flight < self.max_concurrency:
+            return self._heap[0][0]
+        return None
+
+    def finish(self, index: int, now: float, succeeded: bool) -> None:
+        """动作打开结束，成功时开始计算其后续动作的延迟"""
+        self.in_flight -= 1
+        if not succeeded:
+            return
+        for dependent in self._dependents[index]:
+            self._remaining[dependent] -= 1
+            if self._remaining[dependent] == 0:
+                self._schedule(dependent, now)
+
+    def clear(self) -> None:
+        """丢弃所有待触发的动作"""
+        self._heap = []
+
+    def _schedule(self, index: int, now: float) -> None:
+        due = now + self.actions[index].delay
+        heapq.heappush(self._heap, (due, index))
+        if self._on_scheduled is not None:
+            self._on_scheduled(index, due)
+
+
+class WorkflowRun:
+    """一次工作流执行
+
+    调度线程维护按计划时间排序的待触发动作，前置动作全部完成后才开始计算
+    动作的延迟，到期的动作交给线程池打开，同时打开的数量不超过工作流的
+    max_concurrency。等待时阻塞在条件变量上，暂停、继续和取消会立即唤醒
+    调度线程，暂停期间的时间不计入延迟。
+
+    指定 trace_sink 时记录每个动作的计划时间、实际开始时间、启动器耗时和
+    结果，结束时计算摘要；不指定时不读取任何额外的时钟。
+
+    指定 prefetch_budget 时，有延迟的动作在等待期间由 Prefetcher 预读路径，
+    最多读入 prefetch_budget 字节，执行结束或取消时停止。
+    """
+    def __init__(
+        self,
+        workflow: Workflow,
+        events: 'queue.Queue[ExecutionEvent]',
+        launcher: Callable[[str], None],
+        on_finished: Optional[Callable[['WorkflowRun'], None]] = None,
+        trace_sink: Optional[TraceSink] = None,
+        prefetch_budget: Optional[int] = None
+    ):
+        self.id = str(uuid.uuid4())
+        self.workflow_id = workflow.id
+        self.workflow_name = workflow.name
+        # 执行期间工作流可能被编辑，这里保存动作快照
+        self.actions: List[Action] = list(workflow.actions)
+        self.max_concurrency = max(1, workflow.max_concurrency)
+        self.status = STATUS_PENDING
+        self.completed = 0
+        self.error = ''
+        self.summary: Optional[RunSummary] = None  # 追踪摘要，执行结束后设置
+
+        self._trace_sink = trace_sink
+        self._traces: List[ActionTrace] = []
+        self._started_at = 0.0  # 开始执行的 Unix 时间戳，仅在追踪时记录
+        self.prefetcher = Prefetcher(self._clock, prefetch_budget) if prefetch_budget else None
+
+        self._events = events
+        self._launcher = launcher
+        self._on_finished = on_finished
+        self._cond = threading.Condition()
+        self._cancelled = False
+        self._paused_at: Optional[float] = None
+        self._paused_total = 0.0
+        # 调度状态，在工作线程中创建，仅在持有 _cond 时访问
+        self._queue: Optional[ActionQueue] = None
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"workflow-run-{self.id[:8]}",
+            daemon=True
+        )
+
+    @property
+    def total(self) -> int:
+        """动作总数"""
+        return len(self.actions)
+
+    @property
+    def is_active(self) -> bool:
+        """是否仍在执行（包括暂停中）"""
+        return self.status in (STATUS_PENDING, STATUS_RUNNING, STATUS_PAUSED)
+
+    def start(self) -> None:
+        """启动工作线程"""
+        self._thread.start()
+
+    def pause(self) -> bool:
+        """暂停执行，返回是否成功"""
+        with self._cond:
+            if self.status != STATUS_RUNNING:
+                return False
+            self._paused_at = time.monotonic()
+            self.status = STATUS_PAUSED
+            self._cond.notify_all()
+        self._emit(EVENT_PAUSED)
+        return True
+
+    def resume(self) -> bool:
+        """继续执行，返回是否成功"""
+        with self._cond:
+            if self.status != STATUS_PAUSED or self._paused_at is None:
+                return False
+            self._paused_total += time.monotonic() - self._paused_at
+            self._paused_at = None
+            self.status = STATUS_RUNNING
+            self._cond.notify_all()
+        self._emit(EVENT_RESUMED)
+        return True
+
+    def cancel(self) -> None:
+        """取消执行，正在打开的动作完成后工作线程退出"""
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """等待工作线程结束"""
+        self._thread.join(timeout)
+
+    def _clock(self) -> float:
+        """执行时钟，不包含暂停的时间"""
+        if self._paused_at is not None:
+            return self._paused_at - self._paused_total
+        return time.monotonic() - self._paused_total
+
+    def _emit(self, kind: str, index: int = -1, message: str = '') -> None:
+        """发送进度事件"""
+        self._events.put(ExecutionEvent(
+            run_id=self.id,
+            workflow_id=self.workflow_id,
+            workflow_name=self.workflow_name,
+            kind=kind,
+            status=self.status,
+            index=index,
+            completed=self.completed,
+            total=self.total,
+            message=message
+        ))
+
+    def _prefetch(self, index: int, due: float) -> None:
+        """动作开始计算延迟时预读它的路径，调用时需持有 _cond"""
+        action = self.actions[index]
+        if action.delay > 0:
+            self.prefetcher.submit(action.path, due)
+
+    def _trace(self, index: int, due: float, started_clock: float, started: float, begin: float, error: str) -> None:
+        """记录动作的执行情况，追踪出错不影响执行"""
+        action = self.actions[index]
+        drift = max(0.0, started_clock - due)
+        trace = ActionTrace(
+            run_id=self.id,
+            workflow_id=self.workflow_id,
+            workflow_name=self.workflow_name,
+            index=index,
+            path=action.path,
+            delay=action.delay,
+            scheduled=started - drift,
+            started=started,
+            duration=time.perf_counter() - begin,
+            drift=drift,
+            outcome=OUTCOME_FAILED if error else OUTCOME_OK,
+            error=error
+        )
+        self._traces.append(trace)
+        try:
+            self._trace_sink.record_action(trace)
+        except Exception:
+            pass
+
+    def _launch(self, index: int, due: float) -> None:
+        """在线程池中打开动作，due 为按执行时钟计算的计划时间"""
+        action = self.actions[index]
+        self._emit(EVENT_ACTION_STARTED, index)
+        tracing = self._trace_sink is not None
+        if tracing:
+            started_clock, started, begin = self._clock(), time.time(), time.perf_counter()
+        try:
+            self._launcher(action.path)
+        except Exception as e:
+            if tracing:
+                self._trace(index, due, started_clock, started, begin, str(e) or type(e).__name__)
+            with self._cond:
+                self._queue.finish(index, self._clock(), succeeded=False)
+                if not self.error:
+                    self.error = f"执行动作时出错：{str(e)}"
+                    self._emit(EVENT_ACTION_FAILED, index, self.error)
+                self._cond.notify_all()
+            return
+
+        if tracing:
+            self._trace(index, due, started_clock, started, begin, '')
+        with self._cond:
+            self.completed += 1
+            self._emit(EVENT_ACTION_FINISHED, index)
+            self._queue.finish(index, self._clock(), succeeded=True)
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        """调度线程主循环"""
+        if self._trace_sink is not None:
+            self._started_at = time.time()
+        queue = ActionQueue(
+            self.actions, self.max_concurrency,
+            on_scheduled=self._prefetch if self.prefetcher is not None else None
+        )
+        with self._cond:
+            self.status = STATUS_RUNNING
+            self._queue = queue
+            queue.start(self._clock())
+        self._emit(EVENT_STARTED)
+
+        workers = min(self.max_concurrency, max(1, len(self.actions)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"workflow-launch-{self.id[:8]}") as pool:
+            with self._cond:
+                while True:
+                    # 取消或出错后不再打开新动作，等待已打开的动作结束
+                    if self._cancelled or self.error:
+                        if queue.in_flight == 0:
+                            break
+                        self._cond.wait()
+                        continue
+                    if queue.idle:
+                        break
+                    if self._paused_at is not None:
+                        self._cond.wait()
+                        continue
+
+                    now = self._clock()
+                    for due, index in queue.pop_due(now):
+                        pool.submit(self._launch, index, due)
+                    # 并发已满时等待动作结束的通知
+                    due = queue.next_due()
+                    self._cond.wait(None if due is None else due - now)
+
+        with self._cond:
+            if self.error:
+                self.status = STATUS_FAILED
+            elif self._cancelled and self.completed < self.total:
+                self.status = STATUS_CANCELLED
+            else:
+                self.status = STATUS_COMPLETED
+            self._paused_at = None
+            queue.clear()
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+        if self._trace_sink is not None:
+            # 在结束事件之前记录，处理结束事件时已能取得摘要
+            self.summary = summarize_run(
+                self.id, self.workflow_id, self.workflow_name, self.status,
+                sorted(self._traces, key=lambda trace: trace.started), time.time() - self._started_at
+            )
+            try:
+                self._trace_sink.record_run(self.summary)
+            except Exception:
+                pass
+        self._emit(EVENT_FINISHED, message=self.error)
+        if self._on_finished:
+            self._on_finished(self)
+
+
+class ExecutionEngine:
+    """工作流执行引擎
+
+    每次执行在各自的工作线程中运行，多个工作流可以同时执行。
+    进度通过线程安全的队列返回，UI线程使用 after() 定时调用 poll_events 取出。
+    """
+    def __init__(
+        self,
+        launcher: Optional[Callable[[str], None]] = None,
+        trace_sink: Optional[TraceSink] = None,
+        prefetch_budget: Optional[int] = None
+    ):
+        """
+        Args:
+            launcher: 打开路径的函数，默认使用当前平台的系统启动器，见 src.core.launcher
+            trace_sink: 接收每个动作的追踪记录和每次执行的摘要，为 None 时不追踪
+            prefetch_budget: 每次执行在动作等待延迟期间最多预读的字节数，为 None 时不预读，见 src.core.prefetch
+        """
+        self.launcher = launcher or create_launcher()
+        self.trace_sink = trace_sink
+        self.prefetch_budget = prefetch_budget
+        self.events: 'queue.Queue[ExecutionEvent]' = queue.Queue()
+        self._runs: Dict[str, WorkflowRun] = {}
+        self._lock = threading.Lock()
+
+    def start(self, workflow: Workflow) -> WorkflowRun:
+        """开始执行工作流
+
+        Args:
+            workflow: 要执行的工作流
+
+        Returns:
+            WorkflowRun: 本次执行
+        """
+        run = WorkflowRun(
+            workflow, self.events, self.launcher,
+            on_finished=self._on_run_finished,
+            trace_sink=self.trace_sink,
+            prefetch_budget=self.prefetch_budget
+        )
+        with self._lock:
+            self._runs[run.id] = run
+        run.start()
+        return run
+
+    def get_run(self, run_id: str) -> Optional[WorkflowRun]:
+        """获取正在进行的执行"""
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def active_runs(self, workflow_id: Optional[str] = None) -> List[WorkflowRun]:
+        """获取正在进行的执行，可按工作流ID过滤"""
+        with self._lock:
+            runs = list(self._runs.values())
+        return [
+            run for run in runs
+            if run.is_active and (workflow_id is None or run.workflow_id == workflow_id)
+        ]
+
+    def pause(self, run_id: str) -> bool:
+        """暂停执行"""
+        run = self.get_run(run_id)
+        return run.pause() if run else False
+
+    def resume(self, run_id: str) -> bool:
+        """继续执行"""
+        run = self.get_run(run_id)
+        return run.resume() if run else False
+
+    def cancel(self, run_id: str) -> bool:
+        """取消执行"""
+        run = self.get_run(run_id)
+        if run:
+            run.cancel()
+            return True
+        return False
+
+    def cancel_all(self, timeout: Optional[float] = None) -> None:
+        """取消所有执行
+
+        Args:
+            timeout: 等待每个工作线程结束的最长时间，None 表示不等待
+        """
+        runs = self.active_runs()
+        for run in runs:
+            run.cancel()
+        if timeout is not None:
+            for run in runs:
+                run.join(timeout)
+
+    def poll_events(self, max_events: int = 100) -> List[ExecutionEvent]:
+        """非阻塞地取出已产生的进度事件"""
+        events = []
+        while len(events) < max_events:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def _on_run_finished(self, run: WorkflowRun) -> None:
+        """执行结束后移除记录"""
+        with self._lock:
+            self._runs.pop(run.id, None)
@@ -0,0 +1,87 @@
+from typing import IO, Optional
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock_file(f: IO[bytes]) -> None:
+    """非阻塞地锁定文件，已被其他进程锁定时抛出 OSError"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+
+def _unlock_file(f: IO[bytes]) -> None:
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """跨进程的排他文件锁
+
+    锁定单独的锁文件而不是数据文件本身，数据文件可以被原子地替换。
+    同一进程内可重入，不同线程之间互斥。
+    """
+    def __init__(self, path: str, timeout: float = 10.0):
+        """
+        Args:
+            path: 锁文件路径，不存在时自动创建
+            timeout: 等待其他进程释放锁的最长时间（秒）
+        """
+        self.path = path
+        self.timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._count = 0
+        self._file: Optional[IO[bytes]] = None
+
+    def acquire(self) -> None:
+        """获取锁，超时时抛出 TimeoutError"""
+        self._thread_lock.acquire()
+        if self._count == 0:
+            try:
+                self._file = self._acquire_file()
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._count += 1
+
+    def release(self) -> None:
+        """释放锁"""
+        self._count -= 1
+        if self._count == 0:
+            try:
+                _unlock_file(self._file)
+            finally:
+                self._file.close()
+                self._file = None
+        self._thread_lock.release()
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    def _acquire_file(self) -> IO[bytes]:
+        f = open(self.path, 'a+b')
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                _lock_file(f)
+                return f
+            except OSError:
+                if time.monotonic() >= deadline:
+                    f.close()
+                    raise TimeoutError(f"等待文件锁超时: {self.path}")
+                time.sleep(0.05)
@@ -0,0 +1,184 @@
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+import fnmatch
+import os
+import queue
+import re
+import stat
+import threading
+import time
+
+# 每批最多包含的动作数量
+DEFAULT_BATCH_SIZE = 200
+# 路径产生得慢时（如网络目录），至少每隔这么多秒交付一批
+FLUSH_INTERVAL = 0.1
+
+
+@dataclass
+class IngestOptions:
+    """批量添加拖入路径的选项"""
+    delay: float = 0.0  # 所有新动作共用的延迟时间
+    expand_folders: bool = False  # 将文件夹展开为其中的文件，否则作为文件夹动作添加
+    recursive: bool = True  # 展开时包含子文件夹
+    patterns: Tuple[str, ...] = ()  # 文件名通配符，为空时不过滤
+    include_hidden: bool = False  # 展开时包含隐藏的文件和文件夹
+
+
+def parse_patterns(text: str) -> Tuple[str, ...]:
+    """解析以分号、逗号或空白分隔的通配符，如 "*.pdf; *.docx" """
+    return tuple(pattern for pattern in re.split(r"[;,\s]+", text) if pattern)
+
+
+def matches_patterns(name: str, patterns: Tuple[str, ...]) -> bool:
+    """文件名是否匹配任一通配符，不区分大小写"""
+    if not patterns:
+        return True
+    name = name.lower()
+    return any(fnmatch.fnmatchcase(name, pattern.lower()) for pattern in patterns)
+
+
+def _is_hidden(entry: os.DirEntry) -> bool:
+    if entry.name.startswith('.'):
+        return True
+    # 只有 Windows 有隐藏属性，且 scandir 已带回文件属性，无需额外访问文件系统；
+    # 其他系统上 stat 需要一次额外的 lstat，结果也不含该属性
+    if os.name != 'nt':
+        return False
+    attributes = getattr(entry.stat(follow_symlinks=False), 'st_file_attributes', 0)
+    return bool(attributes & getattr(stat, 'FILE_ATTRIBUTE_HIDDEN', 0))
+
+
+def scan_files(
+    root: str,
+    options: IngestOptions,
+    cancelled: Callable[[], bool] = lambda: False
+) -> Iterator[str]:
+    """流式遍历目录下的文件
+
+    每次只读取一个目录，目录内按名称排序，先产生当前目录的文件再进入子目录。
+    不跟随符号链接，避免循环；无法访问的目录被跳过。
+
+    Args:
+        root: 要展开的目录
+        options: 展开选项
+        cancelled: 返回 True 时停止遍历
+
+    Yields:
+        str: 匹配的文件路径
+    """
+    stack = [root]
+    while stack and not cancelled():
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name.lower())
+        except OSError:
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            try:
+                if not options.include_hidden and _is_hidden(entry):
+                    continue
+                is_directory = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_directory:
+                if options.recursive:
+                    subdirectories.append(entry.path)
+            elif matches_patterns(entry.name, options.patterns):
+                yield entry.path
+        stack.extend(reversed(subdirectories))
+
+
+def iter_actions(
+    paths: Iterable[str],
+    options: IngestOptions,
+    cancelled: Callable[[], bool] = lambda: False
+) -> Iterator[Tuple[str, str]]:
+    """将拖入的路径转换为动作
+
+    Yields:
+        Tuple[str, str]: (动作类型, 路径)，不存在的路径被忽略
+    """
+    for path in paths:
+        if cancelled():
+            return
+        if os.path.isdir(path):
+            if options.expand_folders:
+                for file_path in scan_files(path, options, cancelled):
+                    yield 'file', file_path
+            else:
+                yield 'folder', path
+        elif os.path.isfile(path) and matches_patterns(os.path.basename(path), options.patterns):
+            yield 'file', path
+
+
+class IngestJob:
+    """在后台线程中展开拖入的路径，按批交付给UI线程
+
+    UI线程定时调用 poll 取出已产生的动作。队列有上限，UI来不及处理时
+    后台线程会等待，不会无限占用内存。
+    """
+    def __init__(self, paths: List[str], options: IngestOptions, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.paths = list(paths)
+        self.options = options
+        self.batch_size = batch_size
+        self.error: Optional[Exception] = None
+        self._queue: queue.Queue = queue.Queue(maxsize=16)
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="drop-ingest", daemon=True)
+        self._thread.start()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """停止展开，已交付的动作不受影响"""
+        self._cancelled.set()
+
+    def poll(self) -> Tuple[List[Tuple[str, str]], bool]:
+        """取出已产生的动作
+
+        Returns:
+            Tuple[List[Tuple[str, str]], bool]: (动作列表, 是否已全部交付)
+        """
+        # 后台线程在结束前放入所有批次，先读取结束标志才能保证不遗漏
+        done = self._done.is_set()
+        items: List[Tuple[str, str]] = []
+        while True:
+            try:
+                items.extend(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items, done and self._queue.empty()
+
+    def _put(self, batch: List[Tuple[str, str]]) -> bool:
+        """放入一批动作，取消时返回 False"""
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(batch, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self) -> None:
+        batch: List[Tuple[str, str]] = []
+        last_flush = time.monotonic()
+        try:
+            for item in iter_actions(self.paths, self.options, self._cancelled.is_set):
+                batch.append(item)
+                if len(batch) >= self.batch_size or time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                    if not self._put(batch):
+                        return
+                    batch = []
+                    last_flush = time.monotonic()
+            if batch:
+                self._put(batch)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
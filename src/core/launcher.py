@@ -0,0 +1,290 @@
+from typing import List, Optional, Sequence
+import os
+import subprocess
+import sys
+import threading
+
+# 启动器类型
+LAUNCHER_STARTFILE = 'startfile'
+LAUNCHER_SUBPROCESS = 'subprocess'
+LAUNCHER_POOLED = 'pooled'
+LAUNCHER_RECORDING = 'recording'
+LAUNCHER_KINDS = (LAUNCHER_STARTFILE, LAUNCHER_SUBPROCESS, LAUNCHER_POOLED, LAUNCHER_RECORDING)
+
+# 等待辅助进程打开一个路径的最长秒数
+LAUNCH_TIMEOUT = 30.0
+# 关闭时等待辅助进程退出的最长秒数
+CLOSE_TIMEOUT = 2.0
+
+
+class LaunchError(Exception):
+    """启动器无法打开路径"""
+
+
+class Launcher:
+    """启动器基类：用系统关联程序打开路径
+
+    实例可以直接作为 ExecutionEngine 的 launcher 调用，打开失败时抛出异常。
+    """
+    def __call__(self, path: str) -> None:
+        self.launch(path)
+
+    def launch(self, path: str) -> None:
+        """打开路径，失败时抛出异常"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """释放启动器占用的资源，之后不能再打开路径"""
+
+
+class StartfileLauncher(Launcher):
+    """使用 os.startfile 打开路径，仅适用于 Windows"""
+    def launch(self, path: str) -> None:
+        os.startfile(path)
+
+
+def _default_open_command() -> List[str]:
+    if sys.platform == 'darwin':
+        return ['open']
+    if os.name == 'nt':
+        return ['explorer']
+    return ['xdg-open']
+
+
+class SubprocessLauncher(Launcher):
+    """运行打开命令（Linux 上为 xdg-open，macOS 上为 open）打开路径
+
+    命令在新会话中运行，不等待它结束，工作流管理器退出后打开的程序仍然保留。
+    """
+    def __init__(self, command: Optional[Sequence[str]] = None):
+        self.command = list(command) if command else _default_open_command()
+
+    def launch(self, path: str) -> None:
+        # 与 os.startfile 一致，路径不存在时报错，而不是交给打开命令处理
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"路径不存在: {path}")
+        try:
+            subprocess.Popen(
+                self.command + [path],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                close_fds=True,
+                start_new_session=os.name == 'posix'
+            )
+        except FileNotFoundError:
+            raise LaunchError(f"找不到打开命令: {self.command[0]}") from None
+
+
+class RecordingLauncher(Launcher):
+    """只记录路径、不真正打开的启动器，用于测试和基准测试"""
+    def __init__(self):
+        self.launched: List[str] = []
+        self._lock = threading.Lock()
+
+    def launch(self, path: str) -> None:
+        with self._lock:
+            self.launched.append(path)
+
+
+def _serve(conn, backend: Launcher) -> None:
+    """辅助进程主循环：逐批接收路径，依次打开，按顺序返回每个路径的错误信息"""
+    while True:
+        try:
+            paths = conn.recv()
+        except (EOFError, OSError):
+            # 主进程已退出
+            return
+        if paths is None:
+            return
+        errors: List[Optional[str]] = []
+        for path in paths:
+            try:
+                backend.launch(path)
+                errors.append(None)
+            except Exception as e:
+                errors.append(str(e) or type(e).__name__)
+        conn.send(errors)
+
+
+class _LaunchRequest:
+    """一次等待辅助进程处理的打开请求"""
+    __slots__ = ('path', 'error', 'done')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+    def finish(self, error: Optional[str]) -> None:
+        self.error = error
+        self.done.set()
+
+
+class PooledLauncher(Launcher):
+    """在常驻的辅助进程中打开路径
+
+    辅助进程在第一次打开时启动（也可以提前调用 start），之后一直保留。所有
+    线程的请求由一个转发线程合并成批，通过管道一次发送，辅助进程依次用
+    backend 打开后一次返回结果。辅助进程中每次打开仍与 backend 相同，没有
+    复用任何状态，基准测试 launcher.pooled 比 launcher.subprocess 慢，因此
+    不作为默认启动器，只在需要把打开操作隔离到单独进程时使用。
+
+    辅助进程意外退出时，已发出的请求失败，尚未发出的请求由重新启动的辅助进程处理；
+    无法启动辅助进程时退回在当前进程中打开。
+    """
+    def __init__(self, backend: Optional[Launcher] = None, timeout: float = LAUNCH_TIMEOUT):
+        self.backend = backend or create_launcher()
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        # 以下状态仅在持有 _cond 时访问
+        self._pending: List[_LaunchRequest] = []
+        self._thread: Optional[threading.Thread] = None
+        self._in_process = False  # 辅助进程无法启动，直接在当前进程中打开
+        self._closed = False
+
+    def start(self) -> None:
+        """提前启动辅助进程，避免第一次打开时等待"""
+        with self._cond:
+            if not self._closed:
+                self._ensure_helper()
+
+    def launch(self, path: str) -> None:
+        request = _LaunchRequest(path)
+        with self._cond:
+            if self._closed:
+                raise LaunchError("启动器已关闭")
+            self._ensure_helper()
+            in_process = self._in_process
+            if not in_process:
+                self._pending.append(request)
+                self._cond.notify_all()
+        if in_process:
+            self.backend.launch(path)
+            return
+        if not request.done.wait(self.timeout):
+            raise LaunchError(f"打开路径超时: {path}")
+        if request.error is not None:
+            raise LaunchError(request.error)
+
+    def close(self) -> None:
+        """让辅助进程退出，尚未发送的请求失败"""
+        with self._cond:
+            self._closed = True
+            thread = self._thread
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(CLOSE_TIMEOUT * 2)
+
+    def _ensure_helper(self) -> None:
+        """调用时必须持有 _cond"""
+        if self._thread is not None or self._in_process:
+            return
+        try:
+            # 只有用到辅助进程时才导入，不增加命令行的启动耗时
+            import multiprocessing
+            # 不使用 fork：图形界面进程中有多个线程，fork 出的子进程可能死锁
+            context = multiprocessing.get_context('spawn')
+            conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_serve,
+                args=(child_conn, self.backend),
+                name='workflow-launcher',
+                daemon=True
+            )
+            process.start()
+        except Exception:
+            self._in_process = True
+            return
+        child_conn.close()
+        self._thread = threading.Thread(
+            target=self._forward,
+            args=(process, conn),
+            name='workflow-launcher-forward',
+            daemon=True
+        )
+        self._thread.start()
+
+    def _forward(self, process, conn) -> None:
+        """转发线程：把积累的请求成批发给辅助进程，收到结果后唤醒等待的线程"""
+        failure = ''
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    batch, self._pending = self._pending, []
+                    failure = "启动器已关闭"
+                    break
+                batch, self._pending = self._pending, []
+            try:
+                conn.send([request.path for request in batch])
+            except (OSError, ValueError):
+                # 辅助进程没有收到这一批，放回队列由重新启动的辅助进程处理
+                with self._cond:
+                    self._pending[:0] = batch
+                batch = []
+                break
+            try:
+                errors = conn.recv()
+            except (EOFError, OSError) as e:
+                # 无法确定这一批中哪些路径已经打开，不再重试
+                failure = f"启动器辅助进程已退出: {e or type(e).__name__}"
+                break
+            for request, error in zip(batch, errors):
+                request.finish(error)
+
+        for request in batch:
+            request.finish(failure)
+        try:
+            conn.send(None)
+        except (OSError, ValueError):
+            pass
+        conn.close()
+        process.join(CLOSE_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
+            process.join(CLOSE_TIMEOUT)
+
+        with self._cond:
+            self._thread = None
+            if self._closed:
+                pending, self._pending = self._pending, []
+                for request in pending:
+                    request.finish("启动器已关闭")
+            elif self._pending:
+                # 辅助进程退出后又有新请求，重新启动
+                self._ensure_helper()
+                if self._in_process:
+                    pending, self._pending = self._pending, []
+                    for request in pending:
+                        request.finish("无法启动启动器辅助进程")
+
+
+def default_launcher_kind() -> str:
+    """当前平台默认的启动器类型"""
+    return LAUNCHER_STARTFILE if hasattr(os, 'startfile') else LAUNCHER_SUBPROCESS
+
+
+def create_launcher(kind: Optional[str] = None) -> Launcher:
+    """创建启动器
+
+    Args:
+        kind: 启动器类型，见 LAUNCHER_KINDS，默认使用当前平台的系统启动器
+
+    Returns:
+        Launcher: 启动器，使用完毕后调用 close
+
+    Raises:
+        ValueError: 未知的启动器类型
+    """
+    kind = kind or default_launcher_kind()
+    if kind == LAUNCHER_STARTFILE:
+        return StartfileLauncher()
+    if kind == LAUNCHER_SUBPROCESS:
+        return SubprocessLauncher()
+    if kind == LAUNCHER_POOLED:
+        return PooledLauncher()
+    if kind == LAUNCHER_RECORDING:
+        return RecordingLauncher()
+    raise ValueError(f"未知的启动器类型: {kind}")
@@ -0,0 +1,142 @@
+from typing import Callable, List, Optional, Set, Tuple
+import heapq
+import os
+import stat
+import threading
+import time
+
+# 一次执行最多预读的字节数
+DEFAULT_PREFETCH_BUDGET = 64 * 1024 * 1024
+# 单个文件最多预读的字节数，程序打开大文件时通常先读开头部分
+PREFETCH_FILE_LIMIT = 16 * 1024 * 1024
+# 没有 posix_fadvise 时每次读取的字节数，两次读取之间检查是否取消
+PREFETCH_CHUNK = 1024 * 1024
+# 文件夹最多预先列出的条目数
+DIRECTORY_LIST_LIMIT = 1000
+# 只预读计划时间在这个秒数以内的路径，太早读入的数据可能在打开前被挤出缓存
+PREFETCH_HORIZON = 30.0
+
+
+class Prefetcher:
+    """在动作等待延迟期间预读即将打开的路径
+
+    后台线程按计划时间从早到晚处理提交的路径：先 stat，文件夹预先列出条目
+    （最多 DIRECTORY_LIST_LIMIT 个），文件把开头部分读入系统缓存，支持
+    posix_fadvise 的平台上交给内核预读，否则在后台分块读取。读入的字节数
+    受 budget 限制，同一路径只预读一次；计划时间已到或调用 close 后不再
+    继续读取，避免与打开它的程序争用文件。
+
+    预读只是优化，路径不存在或无法访问时直接跳过，由执行时报告。
+    """
+    def __init__(self, clock: Callable[[], float] = time.monotonic, budget: int = DEFAULT_PREFETCH_BUDGET):
+        """
+        Args:
+            clock: 计划时间使用的时钟
+            budget: 最多预读的字节数
+        """
+        self.clock = clock
+        self.budget = budget
+        self.bytes_read = 0  # 已预读（或交给内核预读）的字节数
+        self.files = 0
+        self.directories = 0
+        self._buffer: Optional[bytearray] = None  # 分块读取的缓冲区，仅后台线程使用
+        self._cond = threading.Condition()
+        # 以下状态仅在持有 _cond 时访问
+        self._pending: List[Tuple[float, int, str]] = []  # (计划时间, 序号, 路径) 小根堆
+        self._counter = 0
+        self._seen: Set[str] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, path: str, due: float) -> None:
+        """提交一个将在 due（按 clock 计算）打开的路径"""
+        with self._cond:
+            if self._closed or path in self._seen:
+                return
+            self._seen.add(path)
+            self._counter += 1
+            heapq.heappush(self._pending, (due, self._counter, path))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="workflow-prefetch", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        """停止预读，正在读取的文件在当前分块结束后放弃"""
+        with self._cond:
+            self._closed = True
+            self._pending = []
+            self._cond.notify_all()
+
+    def _next(self) -> Optional[Tuple[float, str]]:
+        """等待下一个需要预读的路径，关闭或预算用完时返回 None"""
+        with self._cond:
+            while not self._closed and self.bytes_read < self.budget:
+                if not self._pending:
+                    self._cond.wait()
+                    continue
+                due, _, path = self._pending[0]
+                remaining = due - self.clock()
+                if remaining <= 0:
+                    # 已经到了打开的时间，预读没有意义
+                    heapq.heappop(self._pending)
+                    continue
+                if remaining > PREFETCH_HORIZON:
+                    # 暂停时执行时钟不走，最多等待 PREFETCH_HORIZON 后重新计算
+                    self._cond.wait(min(remaining - PREFETCH_HORIZON, PREFETCH_HORIZON))
+                    continue
+                heapq.heappop(self._pending)
+                return due, path
+            return None
+
+    def _run(self) -> None:
+        """后台线程主循环"""
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            due, path = item
+            try:
+                self._warm(path, due)
+            except OSError:
+                pass
+
+    def _warm(self, path: str, due: float) -> None:
+        st = os.stat(path)
+        if stat.S_ISDIR(st.st_mode):
+            with os.scandir(path) as entries:
+                for count, entry in enumerate(entries):
+                    if count >= DIRECTORY_LIST_LIMIT or self._closed:
+                        break
+                    # 文件管理器显示文件夹时需要每个条目的属性
+                    entry.stat(follow_symlinks=False)
+            self.directories += 1
+            return
+        if not stat.S_ISREG(st.st_mode):
+            return
+
+        length = min(st.st_size, PREFETCH_FILE_LIMIT, self.budget - self.bytes_read)
+        if length <= 0:
+            return
+        if hasattr(os, 'posix_fadvise'):
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, length, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+            self.bytes_read += length
+            self.files += 1
+            return
+
+        if self._buffer is None:
+            self._buffer = bytearray(PREFETCH_CHUNK)
+        view = memoryview(self._buffer)
+        with open(path, 'rb', buffering=0) as f:
+            remaining = length
+            while remaining > 0 and not self._closed and self.clock() < due:
+                count = f.readinto(view[:min(remaining, PREFETCH_CHUNK)])
+                if not count:
+                    break
+                remaining -= count
+                self.bytes_read += count
+        self.files += 1
@@ -1,95 +1,821 @@
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple
-import json
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from typing import Callable, List, Dict, Iterable, Iterator, NamedTuple, Optional, Sequence, Set, Tuple, TYPE_CHECKING
+import functools
 import os
+import sys
+import threading
+import time
 import uuid
+from src.core.search import DEFAULT_SEARCH_LIMIT, SearchIndex, SearchResult
 from src.utils.path_utils import PathUtils
 
-@dataclass
-class Action:
-    """工作流动作类"""
+if TYPE_CHECKING:
+    from src.core.storage import WorkflowStorage
+
+# 工作流默认的最大并发动作数
+DEFAULT_MAX_CONCURRENCY = 4
+
+# 合并工作流时ID或名称冲突的处理方式
+MERGE_SKIP = 'skip'  # 跳过ID或名称已存在的工作流
+MERGE_OVERWRITE = 'overwrite'  # 替换ID相同的工作流，名称与其他工作流重复时改名
+MERGE_RENAME = 'rename'  # ID相同时作为新工作流导入，名称重复时改名
+MERGE_POLICIES = (MERGE_SKIP, MERGE_OVERWRITE, MERGE_RENAME)
+
+# 合并的结果
+MERGE_ADDED = 'added'
+MERGE_REPLACED = 'replaced'
+MERGE_RENAMED = 'renamed'
+MERGE_SKIPPED = 'skipped'
+
+# 定时计划错过计划时间（系统休眠、程序未运行）后的处理方式
+MISFIRE_SKIP = 'skip'  # 跳过错过的执行，等待下一次计划时间
+MISFIRE_ONCE = 'once'  # 立即补执行一次
+MISFIRE_ALL = 'all'  # 每一次错过的执行都补上，次数有上限
+MISFIRE_POLICIES = (MISFIRE_SKIP, MISFIRE_ONCE, MISFIRE_ALL)
+
+# 动作路径在工作流之间大量重复，缓存规范化的结果
+_normalize_path = functools.lru_cache(maxsize=65536)(PathUtils.normalize_path)
+
+class Action(NamedTuple):
+    """工作流动作类
+
+    默认情况下动作依次执行，延迟从上一个动作完成时开始计算。
+    相邻且 group 相同的动作组成一个并行组，组内动作同时开始计时；
+    depends_on 显式指定所依赖的前面动作的索引，设置后覆盖默认的顺序依赖。
+
+    动作是不可变的元组，没有实例字典，复制工作流时直接共享；
+    修改动作需要用 _replace 生成新动作。
+    """
     type: str  # 'folder' 或 'file'
     path: str
     delay: float
+    group: Optional[str] = None  # 并行组名称
+    depends_on: Optional[Tuple[int, ...]] = None  # 依赖的动作索引，() 表示执行开始后即可计时
+
+    def to_dict(self) -> Dict:
+        """将动作转换为字典，未设置的并行字段不写入"""
+        data = {
+            'type': self.type,
+            'path': self.path,
+            'delay': self.delay
+        }
+        if self.group is not None:
+            data['group'] = self.group
+        if self.depends_on is not None:
+            data['depends_on'] = list(self.depends_on)
+        return data
+
+def make_action(
+    action_type: str,
+    path: str,
+    delay: float,
+    group: Optional[str] = None,
+    depends_on: Optional[Sequence[int]] = None
+) -> Action:
+    """创建动作，路径、类型和组名使用驻留字符串，相同的值在所有工作流间只存一份"""
+    return Action(
+        type=sys.intern(action_type),
+        path=sys.intern(path),
+        delay=delay,
+        group=sys.intern(group) if group else None,
+        depends_on=tuple(depends_on) if depends_on is not None else None
+    )
+
+def reindex_dependencies(depends_on: Optional[Sequence[int]], removed_index: int) -> Optional[List[int]]:
+    """移除动作后修正依赖索引
+
+    Args:
+        depends_on: 原依赖索引
+        removed_index: 被移除的动作索引
+
+    Returns:
+        Optional[List[int]]: 修正后的依赖索引
+    """
+    if depends_on is None:
+        return None
+    return [
+        index - 1 if index > removed_index else index
+        for index in depends_on
+        if index != removed_index
+    ]
+
+def remap_dependencies(
+    depends_on: Optional[Sequence[int]],
+    new_positions: Sequence[Optional[int]]
+) -> Optional[List[int]]:
+    """批量删除或移动动作后修正依赖索引
+
+    移动后依赖排到后面的动作不再生效，执行时会被忽略。
+
+    Args:
+        depends_on: 原依赖索引
+        new_positions: 原第 i 个动作的新位置，被删除的动作为 None
+
+    Returns:
+        Optional[List[int]]: 修正后的依赖索引
+    """
+    if depends_on is None:
+        return None
+    count = len(new_positions)
+    return [
+        new_positions[index]
+        for index in depends_on
+        if 0 <= index < count and new_positions[index] is not None
+    ]
 
 @dataclass
-class Workflow:
-    """工作流类"""
-    name: str
+class Schedule:
+    """工作流的定时执行计划，interval 和 cron 只设置其中一个
+
+    时间均为 Unix 时间戳（秒）。计划的检查和下一次执行时间的计算见 src.core.scheduler。
+    """
+    interval: Optional[float] = None  # 执行间隔（秒），从 anchor 开始计算，不随执行耗时漂移
+    cron: Optional[str] = None  # cron 表达式（分 时 日 月 周），按本地时间
+    misfire: str = MISFIRE_ONCE  # 错过计划时间后的处理方式，MISFIRE_POLICIES 之一
+    enabled: bool = True
+    anchor: float = field(default_factory=time.time)  # 间隔计划的起点
+    last_run: Optional[float] = None  # 最近一次执行的计划时间
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
-    actions: List[Action] = field(default_factory=list)
 
-    def add_action(self, action_type: str, path: str, delay: float) -> None:
+    def describe(self) -> str:
+        """计划规则的简短说明"""
+        if self.cron is not None:
+            return f"cron {self.cron}"
+        return f"每 {self.interval:g} 秒"
+
+    def to_dict(self) -> Dict:
+        """将计划转换为字典，未设置的字段不写入"""
+        data: Dict = {'id': self.id}
+        if self.cron is not None:
+            data['cron'] = self.cron
+        else:
+            data['interval'] = self.interval
+            data['anchor'] = self.anchor
+        data['misfire'] = self.misfire
+        if not self.enabled:
+            data['enabled'] = False
+        if self.last_run is not None:
+            data['last_run'] = self.last_run
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Schedule':
+        """从字典创建计划"""
+        return cls(
+            interval=data.get('interval'),
+            cron=data.get('cron'),
+            misfire=data.get('misfire', MISFIRE_ONCE),
+            enabled=data.get('enabled', True),
+            anchor=data.get('anchor', 0.0),
+            last_run=data.get('last_run'),
+            id=data.get('id') or str(uuid.uuid4())
+        )
+
+class Workflow:
+    """工作流类
+
+    存储后端可以只提供名称等基本信息，并通过 actions_loader 在首次访问
+    actions 时再读取动作列表。
+    """
+    __slots__ = ('name', 'id', 'max_concurrency', 'schedules', '_actions', '_actions_loader')
+
+    def __init__(
+        self,
+        name: str,
+        id: Optional[str] = None,
+        actions: Optional[List[Action]] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        actions_loader: Optional[Callable[[], List[Action]]] = None,
+        schedules: Optional[List[Schedule]] = None
+    ):
+        self.name = name
+        self.id = id or str(uuid.uuid4())
+        self.max_concurrency = max_concurrency  # 同时打开的动作数上限
+        self.schedules: List[Schedule] = schedules if schedules is not None else []  # 定时执行计划
+        self._actions: Optional[List[Action]] = actions
+        self._actions_loader = actions_loader
+        if actions is None and actions_loader is None:
+            self._actions = []
+
+    @property
+    def actions(self) -> List[Action]:
+        """动作列表，延迟加载的工作流在首次访问时读取"""
+        if self._actions is None:
+            self._actions = self._actions_loader()
+            self._actions_loader = None
+        return self._actions
+
+    @actions.setter
+    def actions(self, actions: List[Action]) -> None:
+        self._actions = actions
+        self._actions_loader = None
+
+    def read_actions(self) -> List[Action]:
+        """读取动作列表，延迟加载的工作流读取后不保留，用于遍历大量工作流时控制内存"""
+        if self._actions is None:
+            return self._actions_loader()
+        return self._actions
+
+    @property
+    def actions_loaded(self) -> bool:
+        """动作列表是否已加载"""
+        return self._actions is not None
+
+    def snapshot(self) -> 'Workflow':
+        """当前状态的副本，交给其他线程读取，之后对本工作流的修改不影响副本
+
+        动作不可变，只复制列表；未加载动作的工作流的副本仍在读取时才加载。
+        """
+        return Workflow(
+            name=self.name,
+            id=self.id,
+            actions=list(self._actions) if self._actions is not None else None,
+            max_concurrency=self.max_concurrency,
+            actions_loader=self._actions_loader,
+            schedules=[replace(schedule) for schedule in self.schedules]
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Workflow):
+            return NotImplemented
+        return (
+            self.id == other.id
+            and self.name == other.name
+            and self.max_concurrency == other.max_concurrency
+            and self.schedules == other.schedules
+            and self.actions == other.actions
+        )
+
+    def __repr__(self) -> str:
+        actions = repr(self._actions) if self.actions_loaded else '<未加载>'
+        return f"Workflow(name={self.name!r}, id={self.id!r}, actions={actions}, max_concurrency={self.max_concurrency!r})"
+
+    def add_action(
+        self,
+        action_type: str,
+        path: str,
+        delay: float,
+        group: Optional[str] = None,
+        depends_on: Optional[List[int]] = None
+    ) -> None:
         """添加动作到工作流"""
-        self.actions.append(Action(type=action_type, path=path, delay=delay))
+        self.actions.append(make_action(action_type, path, delay, group, depends_on))
 
     def remove_action(self, index: int) -> None:
         """从工作流中移除动作"""
         if 0 <= index < len(self.actions):
-            del self.actions[index]
+            actions = self.actions
+            del actions[index]
+            for position in range(index, len(actions)):
+                depends_on = actions[position].depends_on
+                if depends_on is not None:
+                    actions[position] = actions[position]._replace(
+                        depends_on=tuple(reindex_dependencies(depends_on, index))
+                    )
 
     def to_dict(self) -> Dict:
-        """将工作流转换为字典"""
-        return {
+        """将工作流转换为字典，延迟加载的工作流不会因此保留动作列表，没有定时计划时不写入"""
+        data = {
             'id': self.id,
             'name': self.name,
-            'actions': [
-                {
-                    'type': action.type,
-                    'path': action.path,
-                    'delay': action.delay
-                }
-                for action in self.actions
-            ]
+            'max_concurrency': self.max_concurrency,
+            'actions': [action.to_dict() for action in self.read_actions()]
         }
+        if self.schedules:
+            data['schedules'] = [schedule.to_dict() for schedule in self.schedules]
+        return data
 
     @classmethod
     def from_dict(cls, data: Dict) -> 'Workflow':
         """从字典创建工作流"""
-        workflow = cls(
+        return cls(
             name=data['name'],
-            id=data.get('id', str(uuid.uuid4()))  # 为旧数据生成新ID
+            id=data.get('id', str(uuid.uuid4())),  # 为旧数据生成新ID
+            max_concurrency=data.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+            actions=[
+                make_action(
+                    action_data['type'],
+                    action_data['path'],
+                    action_data['delay'],
+                    action_data.get('group'),
+                    action_data.get('depends_on')
+                )
+                for action_data in data.get('actions', [])
+            ],
+            schedules=[Schedule.from_dict(schedule_data) for schedule_data in data.get('schedules', [])]
         )
-        for action_data in data.get('actions', []):
-            workflow.add_action(
-                action_type=action_data['type'],
-                path=action_data['path'],
-                delay=action_data['delay']
-            )
-        return workflow
+
+class StorageError(Exception):
+    """读写工作流存储失败"""
+    pass
+
+class NameConflictError(StorageError):
+    """提交的工作流名称与其他进程已保存的工作流重复，本次提交没有写入"""
+    def __init__(self, workflow_ids: List[str], names: List[str]):
+        super().__init__(f"工作流名称已被其他程序使用: {', '.join(names)}")
+        self.workflow_ids = workflow_ids  # 名称冲突的工作流ID
+        self.names = names
 
 class WorkflowManager:
-    """工作流管理器类"""
-    def __init__(self, workflows_file: Optional[str] = None):
-        self.workflows_file = workflows_file or os.path.join(PathUtils.get_app_dir(), "workflows.json")
+    """工作流管理器类
+
+    默认每次修改后立即在调用线程中写入存储，写入失败时抛出 StorageError，
+    修改保留在内存中并在下一次提交时重试。指定 save_delay 后改为由后台
+    线程写入：最后一次修改后 save_delay 秒内没有新的修改才写入，多次修改
+    合并为一次写入，退出前需调用 flush。
+    """
+    def __init__(
+        self,
+        workflows_file: Optional[str] = None,
+        storage: Optional['WorkflowStorage'] = None,
+        load: bool = True,
+        save_delay: Optional[float] = None,
+        journal: bool = False
+    ):
+        """
+        Args:
+            workflows_file: 工作流文件路径，默认为程序目录下的 workflows.json
+            storage: 存储后端，指定时忽略 workflows_file
+            load: 是否立即加载工作流，为 False 时需要稍后调用 load_workflows
+            save_delay: 后台写入的合并时间窗口（秒），为 None 时同步写入
+            journal: 是否将JSON工作流文件切换为追加日志模式，见 JournalStorage
+        """
+        # 存储模块依赖本模块中的 Workflow，在此导入以避免循环导入
+        from src.core.storage import open_storage
+
+        self.workflows_file = storage.path if storage else (workflows_file or os.path.join(PathUtils.get_app_dir(), "workflows.json"))
+        self.journal = journal
+        self.storage = storage or open_storage(self.workflows_file, journal=journal)
+        self._auto_storage = storage is None  # 存储后端是否按文件格式自动选择
         self.workflows: Dict[str, Workflow] = {}  # key 是工作流ID
-        self.load_workflows()
+        self._name_index: Dict[str, str] = {}  # 名称 -> 工作流ID
+        self._duplicate_names: Set[str] = set()  # 重建索引时有多个工作流使用的名称
+        self._indexed_names: Dict[str, str] = {}  # 工作流ID -> 写入索引时的名称
+        # 路径索引在首次查询路径时建立：规范化路径 -> {工作流ID: 动作索引}
+        self._path_index: Optional[Dict[str, Dict[str, List[int]]]] = None
+        self._indexed_paths: Dict[str, List[str]] = {}  # 工作流ID -> 写入索引时各动作的规范化路径
+        self._sorted_paths: Optional[List[str]] = None  # 按顺序排列的索引路径，用于前缀查询
+        # 搜索索引在调用 build_search_index 或 search 后建立
+        self.search_index: Optional[SearchIndex] = None
+        self._search_builder: Optional[Iterator[int]] = None
+        # 尚未写入存储的变更，写入失败时保留到下一次提交
+        self._dirty: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._pending_lock = threading.Lock()
+        # 写入与批量修改互斥，后台线程不会写入进行到一半的批量修改
+        self._write_lock = threading.RLock()
+        self._batch_depth = 0
+
+        # 后台写入
+        self.save_delay = save_delay
+        self.save_error: Optional[StorageError] = None  # 最近一次后台写入的错误
+        self._writer: Optional[threading.Thread] = None
+        self._writer_condition = threading.Condition()
+        self._write_deadline: Optional[float] = None
+        self._writer_stopping = False
+        if load:
+            self.load_workflows()
 
     def load_workflows(self) -> None:
-        """从文件加载工作流"""
-        if os.path.exists(self.workflows_file):
+        """从文件加载工作流
+
+        存储后端按文件格式自动选择时重新识别格式，文件被转换为其他格式后换用对应的后端。
+        """
+        try:
+            if self._auto_storage:
+                self._reopen_storage()
+            self.workflows = self.storage.load()
+        except Exception as e:
+            print(f"加载工作流文件时出错: {e}")
+            self.workflows = {}
+        with self._pending_lock:
+            self._dirty.clear()
+            self._removed.clear()
+        self._rebuild_name_index()
+        self._path_index = None
+        self._rebuild_search_index()
+
+    def _reopen_storage(self) -> None:
+        """文件格式与当前存储后端不一致时换用对应的后端"""
+        from src.core.storage import FORMAT_JOURNAL, FORMAT_JSON, detect_format, open_storage
+
+        file_format = detect_format(self.workflows_file)
+        if self.journal and file_format == FORMAT_JSON:
+            file_format = FORMAT_JOURNAL
+        if file_format == self.storage.format:
+            return
+        with self._write_lock:
+            previous, self.storage = self.storage, open_storage(self.workflows_file, journal=self.journal)
+        previous.close()
+
+    def save_workflows(self) -> None:
+        """保存工作流到文件，只重新编码有变更的工作流
+
+        Raises:
+            StorageError: 写入失败
+        """
+        self.flush()
+
+    def flush(self) -> None:
+        """立即写入所有未保存的修改，不等待后台写入的时间窗口
+
+        Raises:
+            StorageError: 写入失败
+        """
+        with self._writer_condition:
+            self._write_deadline = None
+        self._write_pending()
+        self.save_error = None
+
+    def take_storage_warnings(self) -> List[str]:
+        """取出存储后端产生的提示，如丢弃了不完整的日志记录、后台合并日志失败、
+        首次打开SQLite数据库时迁移了已有的工作流
+
+        提示不影响已加载的工作流和写入结果，每条只返回一次，由界面或命令行显示。
+        """
+        return self.storage.take_warnings()
+
+    def reload_changes(self) -> Tuple[List[str], List[str]]:
+        """读取其他进程提交的修改，按工作流ID合并
+
+        本进程中尚未写入的修改优先，对应的工作流不会被覆盖。
+
+        Returns:
+            Tuple[List[str], List[str]]: (新增或修改的工作流ID, 删除的工作流ID)
+
+        Raises:
+            StorageError: 读取失败
+        """
+        with self._write_lock:
             try:
-                with open(self.workflows_file, 'r', encoding='utf-8') as f:
-                    workflows_data = json.load(f)
-                    self.workflows = {
-                        data.get('id', str(uuid.uuid4())): Workflow.from_dict(data)
-                        for data in workflows_data.values()
-                    }
+                changes = self.storage.refresh()
             except Exception as e:
-                print(f"加载工作流文件时出错: {e}")
-                self.workflows = {}
+                raise StorageError(f"读取工作流文件时出错: {e}") from e
+        if not changes:
+            return [], []
 
-    def save_workflows(self) -> None:
-        """保存工作流到文件"""
+        external, removed = changes
+        with self._pending_lock:
+            pending = self._dirty | self._removed
+        changed_ids = []
+        removed_ids = []
+        # 其他进程保存的工作流与本进程的工作流重名时，需要重建名称索引
+        conflict = False
+        for workflow_id, workflow in external.items():
+            if workflow_id in pending:
+                continue
+            owner = self._name_owner(workflow.name)
+            conflict = conflict or (owner is not None and owner != workflow_id)
+            self.workflows[workflow_id] = workflow
+            self._index_workflow(workflow)
+            changed_ids.append(workflow_id)
+        for workflow_id in removed:
+            if workflow_id in pending or workflow_id not in self.workflows:
+                continue
+            conflict = conflict or self.workflows[workflow_id].name in self._duplicate_names
+            del self.workflows[workflow_id]
+            self._unindex_workflow(workflow_id)
+            removed_ids.append(workflow_id)
+        if conflict:
+            self._rebuild_name_index()
+        return changed_ids, removed_ids
+
+    def mark_dirty(self, *workflow_ids: str) -> None:
+        """标记被直接修改过的工作流，下次保存时重新写入"""
+        workflow_ids = [workflow_id for workflow_id in workflow_ids if workflow_id in self.workflows]
+        with self._pending_lock:
+            self._dirty.update(workflow_ids)
+        for workflow_id in workflow_ids:
+            self._index_workflow(self.workflows[workflow_id])
+
+    def close(self) -> None:
+        """写入未保存的修改，停止后台写入并关闭存储后端
+
+        Raises:
+            StorageError: 写入或关闭失败
+        """
         try:
-            workflows_data = {
-                workflow.id: workflow.to_dict()
-                for workflow in self.workflows.values()
-            }
-            with open(self.workflows_file, 'w', encoding='utf-8') as f:
-                json.dump(workflows_data, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            print(f"保存工作流文件时出错: {e}")
+            self.flush()
+        finally:
+            self._stop_writer()
+            try:
+                self.storage.close()
+            except Exception as e:
+                raise StorageError(f"关闭工作流存储时出错: {e}") from e
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """批量修改，其中的所有修改合并为一次提交，全部成功或全部不生效
+
+        with 块中抛出异常或同步写入失败时，所有工作流恢复到批量修改之前的
+        状态，异常继续抛出。可以嵌套，只有最外层提交。使用后台写入时提交
+        只是安排写入，写入错误由 flush 抛出。
+
+        Raises:
+            StorageError: 同步写入失败
+        """
+        with self._write_lock:
+            if self._batch_depth:
+                self._batch_depth += 1
+                try:
+                    yield
+                finally:
+                    self._batch_depth -= 1
+                return
+
+            snapshot = self._snapshot()
+            self._batch_depth = 1
+            try:
+                yield
+            except BaseException:
+                self._batch_depth = 0
+                self._restore(snapshot)
+                raise
+            self._batch_depth = 0
+            try:
+                self._commit()
+            except StorageError:
+                with self._pending_lock:
+                    touched = self._dirty | self._removed
+                self._restore(snapshot)
+                # 存储后端可能已缓存了本批修改，让这些工作流在下次提交时按恢复后的状态重写
+                with self._pending_lock:
+                    for workflow_id in touched:
+                        (self._dirty if workflow_id in self.workflows else self._removed).add(workflow_id)
+                raise
+
+    def _snapshot(self) -> Tuple:
+        """记录全部工作流的状态，用于回滚批量修改"""
+        with self._pending_lock:
+            pending = (set(self._dirty), set(self._removed))
+        states = {
+            workflow_id: (
+                workflow.name,
+                workflow.max_concurrency,
+                [replace(schedule) for schedule in workflow.schedules],
+                list(workflow._actions) if workflow._actions is not None else None,
+                workflow._actions_loader
+            )
+            for workflow_id, workflow in self.workflows.items()
+        }
+        return dict(self.workflows), states, pending
+
+    def _restore(self, snapshot: Tuple) -> None:
+        """恢复 _snapshot 记录的状态"""
+        workflows, states, (dirty, removed) = snapshot
+        for workflow_id, (name, max_concurrency, schedules, actions, actions_loader) in states.items():
+            workflow = workflows[workflow_id]
+            workflow.name = name
+            workflow.max_concurrency = max_concurrency
+            workflow.schedules = schedules
+            workflow._actions = actions
+            workflow._actions_loader = actions_loader
+        self.workflows = workflows
+        with self._pending_lock:
+            self._dirty, self._removed = dirty, removed
+        self._rebuild_name_index()
+        self._path_index = None
+        self._rebuild_search_index()
+
+    def _commit(self, changed: Iterable[str] = (), removed: Iterable[str] = ()) -> None:
+        """将一次变更连同之前未写入的变更提交到存储后端
+
+        批量修改中只记录变更，由最外层的 batch 统一提交。
+
+        Raises:
+            StorageError: 同步写入失败
+        """
+        with self._pending_lock:
+            for workflow_id in removed:
+                self._dirty.discard(workflow_id)
+                self._removed.add(workflow_id)
+            for workflow_id in changed:
+                self._removed.discard(workflow_id)
+                self._dirty.add(workflow_id)
+        if self._batch_depth:
+            return
+        if self.save_delay is None:
+            self._write_pending()
+        else:
+            self._schedule_write()
+
+    def _write_pending(self) -> None:
+        """写入未保存的变更，失败时放回待写入集合
+
+        Raises:
+            NameConflictError: 部分工作流的名称已被其他进程使用，这些工作流没有写入，其余变更已写入
+            StorageError: 写入失败
+        """
+        with self._write_lock:
+            with self._pending_lock:
+                dirty, removed = self._dirty, self._removed
+                self._dirty, self._removed = set(), set()
+                workflows = dict(self.workflows)
+            if not dirty and not removed:
+                return
+            try:
+                self.storage.commit(workflows, list(dirty), list(removed))
+            except NameConflictError as e:
+                # 名称冲突的工作流留待改名后再写入，其余变更照常写入
+                rejected = dirty & set(e.workflow_ids)
+                self._restore_pending(rejected, set())
+                dirty -= rejected
+                if dirty or removed:
+                    try:
+                        self.storage.commit(workflows, list(dirty), list(removed))
+                    except Exception as retry_error:
+                        self._restore_pending(dirty, removed)
+                        raise StorageError(f"保存工作流文件时出错: {retry_error}") from retry_error
+                raise
+            except Exception as e:
+                self._restore_pending(dirty, removed)
+                raise StorageError(f"保存工作流文件时出错: {e}") from e
+
+    def _restore_pending(self, dirty: Set[str], removed: Set[str]) -> None:
+        """将写入失败的变更放回待写入集合，写入期间又有新的变更时以新的为准"""
+        with self._pending_lock:
+            for workflow_id in removed:
+                if workflow_id not in self._dirty:
+                    self._removed.add(workflow_id)
+            for workflow_id in dirty:
+                if workflow_id not in self._removed:
+                    self._dirty.add(workflow_id)
+
+    def _schedule_write(self) -> None:
+        """安排后台写入，时间窗口内的新修改会推迟写入"""
+        with self._writer_condition:
+            self._write_deadline = time.monotonic() + self.save_delay
+            if self._writer is None:
+                self._writer_stopping = False
+                self._writer = threading.Thread(target=self._writer_loop, name="workflow-writer", daemon=True)
+                self._writer.start()
+            self._writer_condition.notify()
+
+    def _writer_loop(self) -> None:
+        """后台写入线程"""
+        with self._writer_condition:
+            while True:
+                if self._write_deadline is None:
+                    if self._writer_stopping:
+                        return
+                    self._writer_condition.wait()
+                    continue
+                remaining = self._write_deadline - time.monotonic()
+                if remaining > 0:
+                    self._writer_condition.wait(remaining)
+                    continue
+                self._write_deadline = None
+                self._writer_condition.release()
+                try:
+                    self._write_pending()
+                    self.save_error = None
+                except StorageError as e:
+                    self.save_error = e
+                finally:
+                    self._writer_condition.acquire()
+
+    def _stop_writer(self) -> None:
+        """停止后台写入线程"""
+        with self._writer_condition:
+            writer = self._writer
+            self._writer = None
+            self._writer_stopping = True
+            self._write_deadline = None
+            self._writer_condition.notify()
+        if writer is not None:
+            writer.join()
+
+    def _rebuild_name_index(self) -> None:
+        """重建名称索引
+
+        有重名时名称属于已保存的工作流，尚未写入的同名工作流提交时会因名称冲突被拒绝。
+        """
+        with self._pending_lock:
+            pending = self._dirty | self._removed
+        self._name_index = {}
+        self._duplicate_names = set()
+        for workflow_id, workflow in self.workflows.items():
+            owner = self._name_index.get(workflow.name)
+            if owner is not None:
+                self._duplicate_names.add(workflow.name)
+                if owner not in pending or workflow_id in pending:
+                    continue
+            self._name_index[workflow.name] = workflow_id
+        self._indexed_names = {workflow_id: workflow.name for workflow_id, workflow in self.workflows.items()}
+
+    def _index_name(self, workflow: Workflow) -> None:
+        """将工作流的当前名称写入索引，并移除它之前的名称
+
+        工作流的名称可能已在外部被直接修改，旧名称从 _indexed_names 中取得。
+        """
+        self._unindex_name(workflow.id)
+        self._name_index[workflow.name] = workflow.id
+        self._indexed_names[workflow.id] = workflow.name
+
+    def _unindex_name(self, workflow_id: str) -> None:
+        """从索引中移除工作流的名称"""
+        name = self._indexed_names.pop(workflow_id, None)
+        if name is not None and self._name_index.get(name) == workflow_id:
+            del self._name_index[name]
+
+    def _index_workflow(self, workflow: Workflow) -> None:
+        """更新工作流的名称索引、路径索引和搜索索引"""
+        self._index_name(workflow)
+        self._index_paths(workflow)
+        if self.search_index is not None:
+            self.search_index.add(workflow)
+
+    def _unindex_workflow(self, workflow_id: str) -> None:
+        """从名称索引、路径索引和搜索索引中移除工作流"""
+        self._unindex_name(workflow_id)
+        self._unindex_paths(workflow_id)
+        if self.search_index is not None:
+            self.search_index.remove(workflow_id)
+
+    def _rebuild_search_index(self) -> None:
+        """工作流被整体替换后，重新建立已启用的搜索索引"""
+        if self.search_index is not None:
+            self.search_index = None
+            for _ in self.build_search_index():
+                pass
+
+    def _fill_search_index(self, chunk_size: int) -> Iterator[int]:
+        """分批将建立索引时已有的工作流加入搜索索引"""
+        workflow_ids = list(self.workflows)
+        for start in range(0, len(workflow_ids), chunk_size):
+            # 迭代的间隙中工作流可能已被修改，修改时已同步更新索引
+            self.search_index.add_many(
+                self.workflows[workflow_id] for workflow_id in workflow_ids[start:start + chunk_size]
+                if workflow_id in self.workflows and workflow_id not in self.search_index
+            )
+            yield min(start + chunk_size, len(workflow_ids))
+        self._search_builder = None
+
+    def _ensure_path_index(self) -> Dict[str, Dict[str, List[int]]]:
+        """建立路径索引，延迟加载的工作流读取动作建立索引，但不保留动作列表"""
+        if self._path_index is None:
+            self._path_index = {}
+            self._indexed_paths = {}
+            self._sorted_paths = None
+            for workflow in self.workflows.values():
+                self._index_paths(workflow)
+        return self._path_index
+
+    def _index_paths(self, workflow: Workflow) -> None:
+        """将工作流当前的动作路径写入索引，并移除之前写入的路径，索引未建立时不处理"""
+        if self._path_index is None:
+            return
+        self._unindex_paths(workflow.id)
+        paths = [_normalize_path(action.path) for action in workflow.read_actions()]
+        for position, path in enumerate(paths):
+            usages = self._path_index.get(path)
+            if usages is None:
+                usages = self._path_index[path] = {}
+                self._sorted_paths = None
+            usages.setdefault(workflow.id, []).append(position)
+        self._indexed_paths[workflow.id] = paths
+
+    def _unindex_paths(self, workflow_id: str) -> None:
+        """从路径索引中移除工作流"""
+        paths = self._indexed_paths.pop(workflow_id, None)
+        if paths is None:
+            return
+        for path in set(paths):
+            usages = self._path_index.get(path)
+            if usages is None:
+                continue
+            usages.pop(workflow_id, None)
+            if not usages:
+                del self._path_index[path]
+                self._sorted_paths = None
+
+    def _matching_paths(self, path: str, include_children: bool) -> List[str]:
+        """查找索引中等于规范化路径 path 或位于其下的路径"""
+        index = self._ensure_path_index()
+        matches = [path] if path in index else []
+        if include_children:
+            if self._sorted_paths is None:
+                self._sorted_paths = sorted(index)
+            prefix = path if path.endswith(os.sep) else path + os.sep
+            position = bisect_left(self._sorted_paths, prefix)
+            while position < len(self._sorted_paths) and self._sorted_paths[position].startswith(prefix):
+                matches.append(self._sorted_paths[position])
+                position += 1
+        return matches
+
+    def _name_owner(self, name: str) -> Optional[str]:
+        """获取使用该名称的工作流ID"""
+        workflow_id = self._name_index.get(name)
+        if workflow_id is None:
+            return None
+        workflow = self.workflows.get(workflow_id)
+        if workflow is None or workflow.name != name:
+            # 名称已被直接修改但尚未调用 update_workflow，该索引项已失效
+            del self._name_index[name]
+            return None
+        return workflow_id
 
     def is_name_duplicate(self, name: str, exclude_id: Optional[str] = None) -> bool:
         """检查工作流名称是否重复
@@ -101,11 +827,13 @@ class WorkflowManager:
         Returns:
             bool: 如果名称重复返回True，否则返回False
         """
-        # 检查除了当前编辑的工作流之外的所有工作流是否有重名
-        for workflow_id, workflow in self.workflows.items():
-            if workflow_id != exclude_id and workflow.name == name:
-                return True
-        return False
+        workflow_id = self._name_owner(name)
+        return workflow_id is not None and workflow_id != exclude_id
+
+    def get_workflow_by_name(self, name: str) -> Optional[Workflow]:
+        """按名称获取工作流"""
+        workflow_id = self._name_owner(name)
+        return self.workflows[workflow_id] if workflow_id is not None else None
 
     def add_workflow(self, workflow: Workflow) -> Tuple[bool, str]:
         """添加工作流
@@ -119,9 +847,45 @@ class WorkflowManager:
         if self.is_name_duplicate(workflow.name):
             return False, "工作流名称已存在"
         self.workflows[workflow.id] = workflow
-        self.save_workflows()
+        self._index_workflow(workflow)
+        try:
+            self._commit(changed=[workflow.id])
+        except NameConflictError as e:
+            if self._reject_names(e, {workflow.id: None}):
+                return False, "工作流名称已存在"
+            raise
         return True, ""
 
+    def add_workflows(self, workflows: Iterable[Workflow]) -> List[Tuple[bool, str]]:
+        """批量添加工作流，所有添加成功的工作流只提交一次
+
+        Args:
+            workflows: 要添加的工作流
+
+        Returns:
+            List[Tuple[bool, str]]: 每个工作流的 (是否成功, 错误信息)
+        """
+        results = []
+        added: Dict[str, int] = {}  # 工作流ID -> 在结果中的位置
+        for workflow in workflows:
+            if self.is_name_duplicate(workflow.name):
+                results.append((False, "工作流名称已存在"))
+                continue
+            self.workflows[workflow.id] = workflow
+            self._index_workflow(workflow)
+            added[workflow.id] = len(results)
+            results.append((True, ""))
+        if added:
+            try:
+                self._commit(changed=list(added))
+            except NameConflictError as e:
+                rejected = self._reject_names(e, dict.fromkeys(added))
+                if not rejected:
+                    raise
+                for workflow_id in rejected:
+                    results[added[workflow_id]] = (False, "工作流名称已存在")
+        return results
+
     def update_workflow(self, workflow: Workflow) -> Tuple[bool, str]:
         """更新工作流
 
@@ -133,15 +897,66 @@ class WorkflowManager:
         """
         if self.is_name_duplicate(workflow.name, workflow.id):
             return False, "工作流名称已存在"
+        previous_name = self._indexed_names.get(workflow.id) if workflow.id in self.workflows else None
         self.workflows[workflow.id] = workflow
-        self.save_workflows()
+        self._index_workflow(workflow)
+        try:
+            self._commit(changed=[workflow.id])
+        except NameConflictError as e:
+            if self._reject_names(e, {workflow.id: previous_name}):
+                return False, "工作流名称已存在"
+            raise
+        return True, ""
+
+    def rename_workflows(self, renames: Dict[str, str]) -> Tuple[bool, str]:
+        """批量重命名工作流，全部成功或全部不生效
+
+        本批工作流之间可以互换名称。
+
+        Args:
+            renames: 工作流ID -> 新名称
+
+        Returns:
+            Tuple[bool, str]: (是否成功, 错误信息)
+        """
+        if len(set(renames.values())) != len(renames):
+            return False, "工作流名称已存在"
+        for workflow_id, name in renames.items():
+            if workflow_id not in self.workflows:
+                return False, "工作流不存在"
+            owner = self._name_owner(name)
+            if owner is not None and owner != workflow_id and owner not in renames:
+                return False, "工作流名称已存在"
+
+        previous_names = {workflow_id: self.workflows[workflow_id].name for workflow_id in renames}
+        for workflow_id in renames:
+            self._unindex_name(workflow_id)
+        for workflow_id, name in renames.items():
+            workflow = self.workflows[workflow_id]
+            workflow.name = name
+            self._index_workflow(workflow)
+        try:
+            self._commit(changed=list(renames))
+        except NameConflictError as e:
+            if not self._reject_names(e, previous_names):
+                raise
+            # 全部成功或全部不生效：其余工作流也恢复原名称
+            for workflow_id in renames:
+                self._unindex_name(workflow_id)
+            for workflow_id, name in previous_names.items():
+                workflow = self.workflows[workflow_id]
+                workflow.name = name
+                self._index_workflow(workflow)
+            self._commit(changed=list(renames))
+            return False, "工作流名称已存在"
         return True, ""
 
     def remove_workflow(self, workflow_id: str) -> bool:
         """移除工作流"""
         if workflow_id in self.workflows:
             del self.workflows[workflow_id]
-            self.save_workflows()
+            self._unindex_workflow(workflow_id)
+            self._commit(removed=[workflow_id])
             return True
         return False
 
@@ -166,10 +981,279 @@ class WorkflowManager:
         if not source_workflow:
             return False, "源工作流不存在"
 
-        new_workflow = Workflow(name=new_name)
-        for action in source_workflow.actions:
-            new_workflow.add_action(action.type, action.path, action.delay)
+        # 动作不可变，新工作流直接共享源工作流的动作；定时计划不复制，以免同一时间重复执行
+        new_workflow = Workflow(
+            name=new_name,
+            actions=list(source_workflow.actions),
+            max_concurrency=source_workflow.max_concurrency
+        )
 
         self.workflows[new_workflow.id] = new_workflow
-        self.save_workflows()
+        self._index_workflow(new_workflow)
+        try:
+            self._commit(changed=[new_workflow.id])
+        except NameConflictError as e:
+            if self._reject_names(e, {new_workflow.id: None}):
+                return False, "工作流名称已存在"
+            raise
         return True, ""
+
+    def set_schedules(self, workflow_id: str, schedules: List[Schedule]) -> Tuple[bool, str]:
+        """替换工作流的定时计划
+
+        Args:
+            workflow_id: 工作流ID
+            schedules: 新的定时计划
+
+        Returns:
+            Tuple[bool, str]: (是否成功, 错误信息)
+        """
+        # 调度模块依赖本模块，在此导入以避免循环导入
+        from src.core.scheduler import validate_schedule
+
+        workflow = self.get_workflow(workflow_id)
+        if not workflow:
+            return False, "工作流不存在"
+        for schedule in schedules:
+            valid, error = validate_schedule(schedule)
+            if not valid:
+                return False, error
+        workflow.schedules = list(schedules)
+        self._commit(changed=[workflow_id])
+        return True, ""
+
+    def record_schedule_runs(self, runs: Dict[Tuple[str, str], float]) -> List[str]:
+        """记录定时计划最近一次执行的计划时间，所有修改只提交一次
+
+        已删除的工作流和计划被忽略，时间早于已记录的时间时不修改。
+
+        Args:
+            runs: (工作流ID, 计划ID) -> 计划时间
+
+        Returns:
+            List[str]: 被修改的工作流ID
+        """
+        changed = set()
+        for (workflow_id, schedule_id), scheduled_time in runs.items():
+            workflow = self.workflows.get(workflow_id)
+            if workflow is None:
+                continue
+            for schedule in workflow.schedules:
+                if schedule.id == schedule_id and (schedule.last_run is None or schedule.last_run < scheduled_time):
+                    schedule.last_run = scheduled_time
+                    changed.add(workflow_id)
+        if changed:
+            self._commit(changed=list(changed))
+        return list(changed)
+
+    def merge_workflows(self, workflows: Iterable[Workflow], policy: str = MERGE_SKIP) -> List[str]:
+        """按工作流ID合并一批工作流，只提交一次，写入失败时本批全部恢复
+
+        与 batch 不同，回滚只记录本批涉及的工作流，不必复制全部工作流，
+        适合向很大的工作流集合中分批导入。合并的工作流对象直接放入管理器，
+        被替换的旧工作流对象保持不变。
+
+        Args:
+            workflows: 要合并的工作流
+            policy: ID或名称冲突时的处理方式，MERGE_POLICIES 之一
+
+        Returns:
+            List[str]: 每个工作流的合并结果，MERGE_ADDED / MERGE_REPLACED /
+            MERGE_RENAMED / MERGE_SKIPPED 之一，改名的工作流的名称已被修改
+
+        Raises:
+            ValueError: 未知的处理方式
+            StorageError: 同步写入失败
+        """
+        if policy not in MERGE_POLICIES:
+            raise ValueError(f"未知的冲突处理方式: {policy}")
+
+        outcomes = []
+        previous: Dict[str, Optional[Workflow]] = {}  # 工作流ID -> 本批之前的工作流
+        with self._write_lock:
+            for workflow in workflows:
+                existing = self.workflows.get(workflow.id)
+                if existing is not None:
+                    if policy == MERGE_SKIP:
+                        outcomes.append(MERGE_SKIPPED)
+                        continue
+                    if policy == MERGE_RENAME:
+                        workflow.id = str(uuid.uuid4())
+                        existing = None
+
+                outcome = MERGE_REPLACED if existing is not None else MERGE_ADDED
+                if self.is_name_duplicate(workflow.name, workflow.id):
+                    if policy == MERGE_SKIP:
+                        outcomes.append(MERGE_SKIPPED)
+                        continue
+                    workflow.name = self._unique_name(workflow.name)
+                    outcome = MERGE_RENAMED
+
+                previous.setdefault(workflow.id, existing)
+                self.workflows[workflow.id] = workflow
+                self._index_workflow(workflow)
+                outcomes.append(outcome)
+
+            if not previous:
+                return outcomes
+            try:
+                self._commit(changed=list(previous))
+            except StorageError:
+                for workflow_id, workflow in previous.items():
+                    if workflow is None:
+                        del self.workflows[workflow_id]
+                        self._unindex_workflow(workflow_id)
+                    else:
+                        self.workflows[workflow_id] = workflow
+                        self._index_workflow(workflow)
+                # 存储后端可能已缓存了本批修改，让这些工作流在下次提交时按恢复后的状态重写
+                with self._pending_lock:
+                    for workflow_id in previous:
+                        if workflow_id in self.workflows:
+                            self._removed.discard(workflow_id)
+                            self._dirty.add(workflow_id)
+                        else:
+                            self._dirty.discard(workflow_id)
+                            self._removed.add(workflow_id)
+                raise
+        return outcomes
+
+    def _reject_names(self, error: NameConflictError, previous_names: Dict[str, Optional[str]]) -> Set[str]:
+        """撤销同步写入时因名称已被其他进程使用而没有写入的新增和改名，并读取其他进程的修改
+
+        新增的工作流被移除，改名的工作流恢复原名称，其余修改留待下次提交写入。
+        后台写入时冲突的工作流保留在内存中，改名后再写入。
+
+        Args:
+            error: 存储后端报告的冲突
+            previous_names: 本次修改的工作流ID -> 修改前的名称，None 表示新增的工作流
+
+        Returns:
+            Set[str]: 被撤销的工作流ID
+        """
+        rejected = {workflow_id for workflow_id in error.workflow_ids if workflow_id in previous_names}
+        for workflow_id in rejected:
+            name = previous_names[workflow_id]
+            if name is None:
+                with self._pending_lock:
+                    self._dirty.discard(workflow_id)
+                del self.workflows[workflow_id]
+                self._unindex_workflow(workflow_id)
+            else:
+                workflow = self.workflows[workflow_id]
+                workflow.name = name
+                self._index_workflow(workflow)
+        if rejected:
+            self.reload_changes()
+        return rejected
+
+    def _unique_name(self, name: str) -> str:
+        """在名称后加上序号，得到未被使用的名称，如 日报 (2)"""
+        number = 2
+        while self._name_owner(f"{name} ({number})") is not None:
+            number += 1
+        return f"{name} ({number})"
+
+    def find_path_usages(self, path: str, include_children: bool = False) -> Dict[str, List[int]]:
+        """查找使用某个路径的动作
+
+        路径按规范化后的形式比较，Windows上不区分大小写和分隔符。首次查询时
+        建立索引，之后通过本管理器的修改会同步更新索引；直接修改动作后需调用
+        mark_dirty。
+
+        Args:
+            path: 文件或文件夹路径
+            include_children: 是否同时查找该文件夹下的所有路径
+
+        Returns:
+            Dict[str, List[int]]: 工作流ID -> 使用该路径的动作索引（升序）
+        """
+        usages: Dict[str, List[int]] = {}
+        for matched in self._matching_paths(_normalize_path(path), include_children):
+            for workflow_id, positions in self._path_index[matched].items():
+                usages.setdefault(workflow_id, []).extend(positions)
+        for positions in usages.values():
+            positions.sort()
+        return usages
+
+    def rewrite_path_prefix(self, old_prefix: str, new_prefix: str) -> Dict[str, int]:
+        """将所有工作流中位于 old_prefix 下的动作路径改为位于 new_prefix 下
+
+        用于项目文件夹被移动或改名之后。old_prefix 本身以及其下的路径都会被
+        替换，如 D:\\proj 会替换 D:\\proj\\a.txt，但不会替换 D:\\project。
+        所有修改在一次批量修改中提交，写入失败时全部恢复。
+
+        Args:
+            old_prefix: 原文件夹路径
+            new_prefix: 新文件夹路径
+
+        Returns:
+            Dict[str, int]: 工作流ID -> 被替换的动作数量
+
+        Raises:
+            StorageError: 同步写入失败
+        """
+        old = _normalize_path(old_prefix)
+        new_root = os.path.normpath(new_prefix)
+        if not new_prefix or _normalize_path(new_root) == old:
+            return {}
+        child_prefix = old if old.endswith(os.sep) else old + os.sep
+
+        counts: Dict[str, int] = {}
+        with self.batch():
+            for workflow_id in self.find_path_usages(old_prefix, include_children=True):
+                workflow = self.workflows[workflow_id]
+                # 在新列表中替换，不修改其他线程可能正在读取的动作列表
+                new_actions = list(workflow.actions)
+                # 逐个重新比较动作路径，索引中的位置可能因直接修改而过期
+                for position, action in enumerate(new_actions):
+                    normalized = _normalize_path(action.path)
+                    if normalized == old:
+                        new_path = new_root
+                    elif normalized.startswith(child_prefix):
+                        # 保留原路径中剩余部分的大小写
+                        original = os.path.normpath(action.path)
+                        rest = original if len(original) == len(normalized) else normalized
+                        new_path = os.path.join(new_root, rest[len(child_prefix):])
+                    else:
+                        continue
+                    new_actions[position] = action._replace(path=sys.intern(new_path))
+                    counts[workflow_id] = counts.get(workflow_id, 0) + 1
+                if workflow_id in counts:
+                    workflow.actions = new_actions
+                    self._index_workflow(workflow)
+            if counts:
+                self._commit(changed=list(counts))
+        return counts
+
+    def build_search_index(self, chunk_size: int = 1000) -> Iterator[int]:
+        """建立按名称和动作路径搜索的索引
+
+        返回的迭代器每索引 chunk_size 个工作流产生一次已索引的数量，界面可以
+        在空闲时逐步迭代，不必一次建立完。索引建立后通过本管理器的修改会同步
+        更新索引。
+
+        Args:
+            chunk_size: 每批索引的工作流数量
+
+        Returns:
+            Iterator[int]: 已索引的工作流数量，索引已建立时为空迭代器
+        """
+        if self.search_index is None:
+            self.search_index = SearchIndex()
+            self._search_builder = self._fill_search_index(chunk_size)
+        return self._search_builder if self._search_builder is not None else iter(())
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[SearchResult]:
+        """搜索名称或动作路径包含查询文本的工作流，索引未建立完时先建立完整的索引
+
+        Args:
+            query: 查询文本，不区分大小写
+            limit: 最多返回的结果数量
+
+        Returns:
+            List[SearchResult]: 按相关程度排列的结果，名称匹配的在路径匹配的之前
+        """
+        for _ in self.build_search_index():
+            pass
+        return self.search_index.search(query, limit)
@@ -0,0 +1,396 @@
+from bisect import bisect_left
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import heapq
+import itertools
+import math
+import queue
+import threading
+import time
+from src.core.filelock import FileLock
+from src.core.scene import MISFIRE_ALL, MISFIRE_ONCE, MISFIRE_POLICIES, Schedule, WorkflowManager
+
+# 计划时间过去不超过这么多秒时照常执行，不按错过处理
+MISFIRE_GRACE = 60.0
+# 错过多次时每个计划最多补执行的次数
+MAX_CATCH_UP = 100
+# 间隔计划的最小间隔（秒）
+MIN_INTERVAL = 1.0
+# 调度线程单次等待的最长秒数。系统休眠时等待所用的单调时钟会暂停，
+# 定期醒来按系统时间检查，休眠结束后最迟这么久就能发现错过的计划
+MAX_WAIT = 30.0
+# 查找 cron 表达式的下一次时间时最多检查的天数，足以找到闰年的 2 月 29 日是周几的组合
+CRON_SEARCH_DAYS = 366 * 28
+# 同一工作流文件只允许一个程序执行定时计划，锁文件名为工作流文件名加上这个后缀
+SCHEDULER_LOCK_SUFFIX = '.scheduler.lock'
+
+_MONTH_NAMES = {
+    name: number for number, name in enumerate(
+        ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1
+    )
+}
+_WEEKDAY_NAMES = {
+    name: number for number, name in enumerate(['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'])
+}
+
+
+def _parse_field(text: str, low: int, high: int, names: Dict[str, int]) -> Set[int]:
+    """解析 cron 表达式的一段，返回其中包含的值"""
+    def value(item: str) -> int:
+        if item.lower() in names:
+            return names[item.lower()]
+        if not item.isdigit():
+            raise ValueError(f"无法识别 {item!r}")
+        return int(item)
+
+    values: Set[int] = set()
+    for part in text.split(','):
+        step = 1
+        has_step = '/' in part
+        if has_step:
+            part, step_text = part.split('/', 1)
+            step = int(step_text) if step_text.isdigit() else 0
+            if step <= 0:
+                raise ValueError(f"步长必须是正整数: {text}")
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            first, last = part.split('-', 1)
+            start, end = value(first), value(last)
+        else:
+            # 5/15 表示从 5 开始每隔 15
+            start = value(part)
+            end = high if has_step else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"超出范围 {low}-{high}: {text}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """五段式 cron 表达式：分 时 日 月 周，按本地时间计算
+
+    每段支持 *、数字、a-b 范围、/n 步长和逗号分隔的列表，月和周也可以使用
+    英文缩写；周的 0 和 7 都表示周日。日和周都不以 * 开头时满足其一即可，与 cron 相同。
+    """
+    def __init__(self, text: str):
+        """
+        Raises:
+            ValueError: 表达式无效
+        """
+        self.text = text
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron 表达式应包含 5 段（分 时 日 月 周）: {text}")
+        try:
+            self.minutes = sorted(_parse_field(fields[0], 0, 59, {}))
+            self.hours = sorted(_parse_field(fields[1], 0, 23, {}))
+            self.days = _parse_field(fields[2], 1, 31, {})
+            self.months = _parse_field(fields[3], 1, 12, _MONTH_NAMES)
+            self.weekdays = {day % 7 for day in _parse_field(fields[4], 0, 7, _WEEKDAY_NAMES)}
+        except ValueError as e:
+            raise ValueError(f"无效的 cron 表达式 {text!r}: {e}") from None
+        self._days_restricted = not fields[2].startswith('*')
+        self._weekdays_restricted = not fields[4].startswith('*')
+
+    def _day_matches(self, day: date) -> bool:
+        if day.month not in self.months:
+            return False
+        day_ok = day.day in self.days
+        weekday_ok = day.isoweekday() % 7 in self.weekdays
+        if self._days_restricted and self._weekdays_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment: float) -> Optional[float]:
+        """晚于 moment 的第一个匹配时间，找不到时返回 None"""
+        start = datetime.fromtimestamp(moment).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        first_minute = start.hour * 60 + start.minute
+        for _ in range(CRON_SEARCH_DAYS):
+            if self._day_matches(day):
+                for hour in self.hours[bisect_left(self.hours, first_minute // 60):]:
+                    minute_from = first_minute - hour * 60 if hour == first_minute // 60 else 0
+                    for minute in self.minutes[bisect_left(self.minutes, minute_from):]:
+                        timestamp = datetime(day.year, day.month, day.day, hour, minute).timestamp()
+                        # 夏令时结束时本地时间重复，换算结果可能不晚于 moment
+                        if timestamp > moment:
+                            return timestamp
+            day += timedelta(days=1)
+            first_minute = 0
+        return None
+
+
+def validate_schedule(schedule: Schedule) -> Tuple[bool, str]:
+    """检查定时计划的设置
+
+    Returns:
+        Tuple[bool, str]: (是否有效, 错误信息)
+    """
+    if (schedule.interval is None) == (schedule.cron is None):
+        return False, "定时计划需要设置间隔或 cron 表达式中的一个"
+    if schedule.interval is not None and not schedule.interval >= MIN_INTERVAL:
+        return False, f"执行间隔不能小于 {MIN_INTERVAL:g} 秒"
+    if schedule.cron is not None:
+        try:
+            CronExpression(schedule.cron)
+        except ValueError as e:
+            return False, str(e)
+    if schedule.misfire not in MISFIRE_POLICIES:
+        return False, f"未知的错过处理方式: {schedule.misfire}"
+    return True, ""
+
+
+@dataclass
+class ScheduledRun:
+    """一次到期的定时执行"""
+    workflow_id: str
+    schedule_id: str
+    scheduled_time: float  # 计划时间（Unix 时间戳）
+    late: bool = False  # 是否是错过计划时间后的补执行
+
+
+class _Entry:
+    """调度线程中一个计划的状态，token 与堆中的项对应，不一致的堆项已过期"""
+    __slots__ = ('key', 'schedule', 'cron', 'due', 'token')
+
+    def __init__(self, key: Tuple[str, str], schedule: Schedule, cron: Optional[CronExpression]):
+        self.key = key
+        self.schedule = schedule
+        self.cron = cron
+        self.due = 0.0
+        self.token = 0
+
+    def next_after(self, moment: float) -> Optional[float]:
+        if self.cron is not None:
+            return self.cron.next_after(moment)
+        # 按起点加整数倍间隔计算，执行时间不会逐渐漂移
+        anchor, interval = self.schedule.anchor, self.schedule.interval
+        if moment < anchor:
+            return anchor
+        return anchor + (math.floor((moment - anchor) / interval) + 1) * interval
+
+
+def _same_rule(a: Schedule, b: Schedule) -> bool:
+    return (a.interval, a.cron, a.misfire, a.enabled, a.anchor) == (b.interval, b.cron, b.misfire, b.enabled, b.anchor)
+
+
+class Scheduler:
+    """定时执行服务
+
+    所有计划的下一次执行时间保存在一个小根堆中，由一个调度线程等待最早的
+    一项，每次触发和重新安排都是 O(log n)，不必为每个计划分配线程。计划被
+    修改或删除时不在堆中查找，只让原来的堆项失效，弹出时丢弃。
+
+    到期的执行放入队列，持有工作流管理器的线程（图形界面中为UI线程）定时
+    调用 poll 取出并记录最近一次执行时间，调度线程本身不访问工作流管理器。
+    程序未运行或系统休眠而错过的执行按计划的 misfire 处理。
+    """
+    def __init__(self, manager: WorkflowManager, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            manager: 工作流管理器，定时计划保存在其中的工作流上
+            clock: 返回当前 Unix 时间戳的函数
+        """
+        self.manager = manager
+        self.events: 'queue.Queue[ScheduledRun]' = queue.Queue()
+        self._clock = clock
+        self._cond = threading.Condition()
+        # 以下状态仅在持有 _cond 时访问
+        self._heap: List[Tuple[float, int, Tuple[str, str]]] = []  # (下一次执行时间, token, 键)
+        self._entries: Dict[Tuple[str, str], _Entry] = {}  # (工作流ID, 计划ID) -> 状态
+        self._tokens = itertools.count(1)
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._lock: Optional[FileLock] = None
+
+    @property
+    def running(self) -> bool:
+        """调度线程是否在运行"""
+        return self._thread is not None
+
+    def start(self) -> Tuple[bool, str]:
+        """读取所有计划并启动调度线程
+
+        同一工作流文件同时只能有一个程序执行定时计划，已被其他程序占用时不启动。
+
+        Returns:
+            Tuple[bool, str]: (是否成功, 错误信息)
+        """
+        if self._thread is not None:
+            return True, ""
+        lock = FileLock(self.manager.workflows_file + SCHEDULER_LOCK_SUFFIX, timeout=0)
+        try:
+            lock.acquire()
+        except (TimeoutError, OSError):
+            return False, "其他程序正在执行这个工作流文件的定时计划"
+        self._lock = lock
+        self.refresh_all()
+        with self._cond:
+            self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="workflow-scheduler", daemon=True)
+        self._thread.start()
+        return True, ""
+
+    def stop(self) -> None:
+        """停止调度线程，已到期但尚未取出的执行被丢弃"""
+        thread = self._thread
+        if thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        thread.join()
+        self._thread = None
+        with self._cond:
+            self._heap = []
+            self._entries = {}
+        self._lock.release()
+        self._lock = None
+
+    def refresh_all(self) -> None:
+        """按工作流管理器中的全部工作流重新读取计划"""
+        with self._cond:
+            keys = set(self._entries)
+            for workflow in self.manager.workflows.values():
+                for schedule in workflow.schedules:
+                    self._update((workflow.id, schedule.id), schedule)
+                    keys.discard((workflow.id, schedule.id))
+            for key in keys:
+                del self._entries[key]
+            self._cond.notify()
+
+    def refresh(self, *workflow_ids: str) -> None:
+        """重新读取这些工作流的计划，工作流被修改、删除或载入其他程序的修改后调用"""
+        workflow_ids = set(workflow_ids)
+        with self._cond:
+            keys = {key for key in self._entries if key[0] in workflow_ids}
+            for workflow_id in workflow_ids:
+                workflow = self.manager.workflows.get(workflow_id)
+                for schedule in workflow.schedules if workflow else []:
+                    self._update((workflow_id, schedule.id), schedule)
+                    keys.discard((workflow_id, schedule.id))
+            for key in keys:
+                del self._entries[key]
+            self._cond.notify()
+
+    def next_run(self, workflow_id: str, schedule_id: str) -> Optional[float]:
+        """计划的下一次执行时间，计划已停用或不再执行时返回 None"""
+        with self._cond:
+            entry = self._entries.get((workflow_id, schedule_id))
+            return entry.due if entry else None
+
+    def upcoming(self, limit: int = 10) -> List[ScheduledRun]:
+        """最近的几次执行，按时间排列"""
+        with self._cond:
+            entries = heapq.nsmallest(limit, self._entries.values(), key=lambda entry: entry.due)
+            return [ScheduledRun(entry.key[0], entry.key[1], entry.due) for entry in entries]
+
+    def poll(self, max_runs: int = 100) -> List[ScheduledRun]:
+        """取出已到期的执行并记录各计划最近一次执行的时间
+
+        在调用工作流管理器的线程中调用。到期后工作流被删除或计划被停用的执行被丢弃。
+
+        Raises:
+            StorageError: 同步写入最近执行时间失败，执行仍然返回给下一次调用
+        """
+        runs: List[ScheduledRun] = []
+        while len(runs) < max_runs:
+            try:
+                runs.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        runs = [run for run in runs if self._is_current(run)]
+        if runs:
+            try:
+                self.manager.record_schedule_runs({
+                    (run.workflow_id, run.schedule_id): run.scheduled_time for run in runs
+                })
+            except Exception:
+                for run in runs:
+                    self.events.put(run)
+                raise
+        return runs
+
+    def _is_current(self, run: ScheduledRun) -> bool:
+        workflow = self.manager.workflows.get(run.workflow_id)
+        return workflow is not None and any(
+            schedule.id == run.schedule_id and schedule.enabled for schedule in workflow.schedules
+        )
+
+    def _update(self, key: Tuple[str, str], schedule: Schedule) -> None:
+        """重新安排一个计划，调用时必须持有 _cond"""
+        existing = self._entries.get(key)
+        if existing is not None and _same_rule(existing.schedule, schedule):
+            return
+        if not schedule.enabled or not validate_schedule(schedule)[0]:
+            self._entries.pop(key, None)
+            return
+        entry = _Entry(key, replace(schedule), CronExpression(schedule.cron) if schedule.cron is not None else None)
+        # 从上次执行之后开始计算，程序未运行期间错过的执行在调度线程中按 misfire 处理
+        due = entry.next_after(schedule.last_run if schedule.last_run is not None else self._clock())
+        if due is None:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = entry
+        self._push(entry, due)
+
+    def _push(self, entry: _Entry, due: float) -> None:
+        entry.due = due
+        entry.token = next(self._tokens)
+        heapq.heappush(self._heap, (due, entry.token, entry.key))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            # 过期的堆项太多时重建
+            self._heap = [(e.due, e.token, e.key) for e in self._entries.values()]
+            heapq.heapify(self._heap)
+
+    def _run(self) -> None:
+        """调度线程：等待最早的计划到期后触发"""
+        with self._cond:
+            while not self._stopping:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, token, key = self._heap[0]
+                entry = self._entries.get(key)
+                if entry is None or entry.token != token:
+                    heapq.heappop(self._heap)
+                    continue
+                now = self._clock()
+                if due > now:
+                    self._cond.wait(min(due - now, MAX_WAIT))
+                    continue
+                heapq.heappop(self._heap)
+                self._fire(entry, now)
+
+    def _fire(self, entry: _Entry, now: float) -> None:
+        """触发到期的计划并安排下一次，调用时必须持有 _cond
+
+        先收集所有已到期的计划时间，只有最近的一次在 MISFIRE_GRACE 内时照常执行，
+        更早的按 misfire 处理；下一次计划时间总是从当前时间之后计算。
+        """
+        workflow_id, schedule_id = entry.key
+        missed = [entry.due]
+        following = entry.next_after(entry.due)
+        while following is not None and following <= now and len(missed) < MAX_CATCH_UP:
+            missed.append(following)
+            following = entry.next_after(following)
+        if following is not None:
+            following = entry.next_after(now)
+
+        on_time = None
+        if now - missed[-1] <= MISFIRE_GRACE:
+            on_time = missed.pop()
+        if entry.schedule.misfire == MISFIRE_ALL:
+            for scheduled_time in missed:
+                self.events.put(ScheduledRun(workflow_id, schedule_id, scheduled_time, late=True))
+        elif entry.schedule.misfire == MISFIRE_ONCE and missed and on_time is None:
+            # 最近一次照常执行时不再另外补执行
+            self.events.put(ScheduledRun(workflow_id, schedule_id, missed[-1], late=True))
+        if on_time is not None:
+            self.events.put(ScheduledRun(workflow_id, schedule_id, on_time))
+        if following is None:
+            del self._entries[entry.key]
+        else:
+            self._push(entry, following)
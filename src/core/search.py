@@ -0,0 +1,262 @@
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, TYPE_CHECKING
+import heapq
+
+if TYPE_CHECKING:
+    from src.core.scene import Workflow
+
+# 默认返回的结果数量上限
+DEFAULT_SEARCH_LIMIT = 200
+# 每次查询在名称和路径中各自最多确认的候选数。查询很宽泛时只在这么多个
+# 候选中排序，返回部分结果，使每次按键的耗时不随工作流总数增长
+SEARCH_SCAN_LIMIT = 5000
+# 求交集时最少见片段的倒排集合最多处理这么多个条目，超过时只在其中一部分里查找
+SEARCH_INTERSECT_LIMIT = 100000
+
+_EMPTY: FrozenSet[str] = frozenset()
+
+
+class SearchResult(NamedTuple):
+    """搜索结果"""
+    workflow_id: str
+    path: Optional[str] = None  # 匹配的动作路径，按名称匹配时为 None
+
+
+def _grams(text: str) -> Set[str]:
+    """文本中所有相邻两个字符组成的片段，只有一个字符的文本以该字符本身作为片段"""
+    if len(text) == 1:
+        return {text}
+    return {text[position:position + 2] for position in range(len(text) - 1)}
+
+
+def _add_postings(postings: Dict[str, Set[str]], char_grams: Dict[str, Set[str]], grams: Set[str], item: str) -> None:
+    """把条目加入各片段的倒排集合，新出现的片段登记到所含字符下"""
+    for gram in grams:
+        items = postings.get(gram)
+        if items is None:
+            items = postings[gram] = set()
+            for char in gram:
+                char_grams.setdefault(char, set()).add(gram)
+        items.add(item)
+
+
+def _remove_postings(
+    postings: Dict[str, Set[str]],
+    char_grams: Dict[str, Set[str]],
+    grams: Set[str],
+    item: str
+) -> None:
+    for gram in grams:
+        items = postings[gram]
+        items.discard(item)
+        if items:
+            continue
+        del postings[gram]
+        for char in set(gram):
+            char_keys = char_grams[char]
+            char_keys.discard(gram)
+            if not char_keys:
+                del char_grams[char]
+
+
+def _candidates(postings: Dict[str, Set[str]], char_grams: Dict[str, Set[str]], text: str) -> Set[str]:
+    """含有查询全部片段的条目，调用方最多确认其中 SEARCH_SCAN_LIMIT 个
+
+    单个字符的查询合并含有该字符的全部片段的倒排集合；较长的查询从最少见
+    片段的倒排集合出发，分段与其余片段求交集，取够候选或处理完
+    SEARCH_INTERSECT_LIMIT 个条目即停止，此时结果只包含其中一部分。
+    """
+    if len(text) == 1:
+        candidates: Set[str] = set()
+        for gram in char_grams.get(text, _EMPTY):
+            candidates.update(islice(postings[gram], SEARCH_SCAN_LIMIT - len(candidates)))
+            if len(candidates) >= SEARCH_SCAN_LIMIT:
+                break
+        return candidates
+    ordered = sorted((postings.get(gram, _EMPTY) for gram in _grams(text)), key=len)
+    smallest, others = ordered[0], ordered[1:]
+    if len(smallest) <= SEARCH_SCAN_LIMIT:
+        return smallest.intersection(*others)
+    # 分段求交集，取够候选即停止，匹配项很密集时只需处理第一段
+    candidates = set()
+    entries = iter(smallest)
+    for _ in range(0, SEARCH_INTERSECT_LIMIT, SEARCH_SCAN_LIMIT):
+        chunk = set(islice(entries, SEARCH_SCAN_LIMIT))
+        if not chunk:
+            break
+        candidates |= chunk.intersection(*others)
+        if len(candidates) >= SEARCH_SCAN_LIMIT:
+            break
+    return candidates
+
+
+class SearchIndex:
+    """工作流名称和动作路径的搜索索引
+
+    按不区分大小写的子串匹配：名称或路径包含查询文本即命中，不容忍错字。
+    对小写的名称和路径建立二元片段（bigram）倒排索引，中文两个字即可命中；
+    每个字符另外记录含有它的片段，单个字符的查询也不必扫描。查询时取查询中
+    最少见片段的倒排集合与其余片段求交集，再逐个确认包含查询文本。路径在
+    工作流之间大量重复，只对不同的路径建立索引。
+
+    结果按以下顺序排列，同一级内按名称或路径排序：
+    名称以查询开头（名称相同的最前）、名称包含查询、
+    动作的文件名包含查询、动作的完整路径包含查询。
+    查询很宽泛时名称和路径各自只确认 SEARCH_SCAN_LIMIT 个候选，在其中排序后
+    返回部分结果，因此耗时取决于这个上限，而不是工作流总数。
+
+    延迟加载的工作流通过 read_actions 读取动作建立索引，不会保留动作列表。
+    """
+    def __init__(self):
+        self._names: Dict[str, str] = {}  # 工作流ID -> 小写名称
+        self._sorted_names: List[Tuple[str, str]] = []  # (小写名称, 工作流ID)，按名称排序
+        self._name_grams: Dict[str, Set[str]] = {}  # 片段 -> 工作流ID
+        self._name_chars: Dict[str, Set[str]] = {}  # 字符 -> 名称中含有它的片段
+        self._workflow_paths: Dict[str, Tuple[str, ...]] = {}  # 工作流ID -> 不重复的小写路径
+        self._path_users: Dict[str, Set[str]] = {}  # 小写路径 -> 使用它的工作流ID
+        self._path_texts: Dict[str, str] = {}  # 小写路径 -> 原路径
+        self._path_grams: Dict[str, Set[str]] = {}  # 片段 -> 小写路径
+        self._path_chars: Dict[str, Set[str]] = {}  # 字符 -> 路径中含有它的片段
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, workflow_id: object) -> bool:
+        return workflow_id in self._names
+
+    def add(self, workflow: 'Workflow') -> None:
+        """添加工作流，已存在时更新"""
+        self.add_many([workflow])
+
+    def add_many(self, workflows: Iterable['Workflow']) -> None:
+        """批量添加或更新工作流，名称列表只重新排序一次"""
+        new_rows = []
+        for workflow in workflows:
+            name = workflow.name.lower()
+            old_name = self._names.get(workflow.id)
+            if old_name != name:
+                if old_name is not None:
+                    self._remove_name(workflow.id, old_name)
+                self._names[workflow.id] = name
+                new_rows.append((name, workflow.id))
+                _add_postings(self._name_grams, self._name_chars, _grams(name), workflow.id)
+            self._set_paths(workflow.id, workflow.read_actions())
+
+        if len(new_rows) == 1:
+            insort(self._sorted_names, new_rows[0])
+        elif new_rows:
+            # 追加的有序片段与原列表合并，只需线性时间
+            new_rows.sort()
+            self._sorted_names.extend(new_rows)
+            self._sorted_names.sort()
+
+    def remove(self, workflow_id: str) -> None:
+        """移除工作流"""
+        name = self._names.pop(workflow_id, None)
+        if name is None:
+            return
+        self._remove_name(workflow_id, name)
+        for path in self._workflow_paths.pop(workflow_id, ()):
+            self._remove_path_user(path, workflow_id)
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[SearchResult]:
+        """搜索名称或动作路径包含查询文本的工作流，不区分大小写
+
+        Args:
+            query: 查询文本
+            limit: 最多返回的结果数量
+
+        Returns:
+            List[SearchResult]: 按相关程度排列的结果
+        """
+        text = query.strip().lower()
+        if not text or limit <= 0:
+            return []
+
+        results: List[SearchResult] = []
+        seen: Set[str] = set()
+        for workflow_id in self._name_matches(text, limit):
+            if workflow_id in seen:
+                continue
+            results.append(SearchResult(workflow_id))
+            seen.add(workflow_id)
+            if len(results) >= limit:
+                return results
+
+        for path in self._path_matches(text):
+            for workflow_id in sorted(self._path_users[path] - seen, key=self._names.__getitem__):
+                results.append(SearchResult(workflow_id, self._path_texts[path]))
+                seen.add(workflow_id)
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def _remove_name(self, workflow_id: str, name: str) -> None:
+        position = bisect_left(self._sorted_names, (name, workflow_id))
+        del self._sorted_names[position]
+        _remove_postings(self._name_grams, self._name_chars, _grams(name), workflow_id)
+
+    def _set_paths(self, workflow_id: str, actions: Iterable) -> None:
+        """更新工作流的路径，只处理新增和不再使用的路径"""
+        texts = {action.path.lower(): action.path for action in actions}
+        paths = tuple(texts)
+        old_paths = self._workflow_paths.get(workflow_id, ())
+        if paths == old_paths:
+            return
+        for path in set(old_paths).difference(texts):
+            self._remove_path_user(path, workflow_id)
+        for path in texts.keys() - set(old_paths):
+            users = self._path_users.get(path)
+            if users is None:
+                users = self._path_users[path] = set()
+                self._path_texts[path] = texts[path]
+                _add_postings(self._path_grams, self._path_chars, _grams(path), path)
+            users.add(workflow_id)
+        if paths:
+            self._workflow_paths[workflow_id] = paths
+        else:
+            self._workflow_paths.pop(workflow_id, None)
+
+    def _remove_path_user(self, path: str, workflow_id: str) -> None:
+        users = self._path_users[path]
+        users.discard(workflow_id)
+        if users:
+            return
+        del self._path_users[path]
+        del self._path_texts[path]
+        _remove_postings(self._path_grams, self._path_chars, _grams(path), path)
+
+    def _name_matches(self, text: str, limit: int) -> Iterator[str]:
+        """先产生名称以查询开头的工作流ID，再产生名称包含查询的，可能重复"""
+        rows = self._sorted_names
+        position = bisect_left(rows, (text,))
+        while position < len(rows) and rows[position][0].startswith(text):
+            yield rows[position][1]
+            position += 1
+
+        # 确认名称包含查询，只挑出排在最前的 limit 个
+        names = self._names
+        matches = [
+            (names[workflow_id], workflow_id)
+            for workflow_id in islice(_candidates(self._name_grams, self._name_chars, text), SEARCH_SCAN_LIMIT)
+            if text in names[workflow_id]
+        ]
+        for _, workflow_id in heapq.nsmallest(limit, matches):
+            yield workflow_id
+
+    def _path_matches(self, text: str) -> Iterator[str]:
+        """产生匹配的小写路径，文件名匹配的在前，同一级内按路径排序"""
+        candidates = islice(_candidates(self._path_grams, self._path_chars, text), SEARCH_SCAN_LIMIT)
+        paths = sorted(path for path in candidates if text in path)
+        # 包含分隔符的查询不可能出现在文件名中
+        if '/' in text or '\\' in text:
+            yield from paths
+            return
+        in_basename = []
+        elsewhere = []
+        for path in paths:
+            basename = path.rpartition('\\')[2].rpartition('/')[2]
+            (in_basename if text in basename else elsewhere).append(path)
+        yield from in_basename
+        yield from elsewhere
@@ -0,0 +1,196 @@
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple, Union
+import heapq
+from src.core.executor import STATUS_COMPLETED, STATUS_FAILED, ActionQueue
+from src.core.scene import Action, Workflow
+
+
+class VirtualClock:
+    """模拟执行使用的虚拟时钟，只在模拟器推进时前进
+
+    可以作为 clock 传给需要读取时间的对象，例如记录打开时间的启动器。
+    """
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance_to(self, moment: float) -> None:
+        """前进到指定时间，不会后退"""
+        if moment > self.now:
+            self.now = moment
+
+
+class SimulatedLaunch(NamedTuple):
+    """模拟中一次打开动作，时间为虚拟时钟的秒数"""
+    index: int
+    path: str
+    start: float
+    end: float
+    error: str = ''
+
+
+@dataclass
+class SimulationResult:
+    """一个工作流的模拟结果
+
+    时间线按打开时间排列；执行失败时与真实执行相同，出错的动作结束后不再
+    打开新动作，只等待已打开的动作结束。
+    """
+    workflow_id: str
+    workflow_name: str
+    status: str
+    start: float
+    end: float
+    launches: List[SimulatedLaunch] = field(default_factory=list)
+    peak_concurrency: int = 0  # 同时打开的最大动作数
+    error: str = ''
+
+    @property
+    def duration(self) -> float:
+        """从开始执行到最后一个动作打开结束的秒数"""
+        return self.end - self.start
+
+
+@dataclass
+class SimulationReport:
+    """同时开始执行多个工作流的模拟结果"""
+    results: List[SimulationResult]
+    duration: float  # 从开始到最后一个工作流结束的秒数
+    overlap: float  # 有两个及以上工作流同时执行的秒数
+    peak_workflows: int  # 同时执行的最大工作流数
+    peak_launches: int  # 所有工作流同时打开的最大动作数
+
+    @property
+    def failed(self) -> List[SimulationResult]:
+        """执行失败的工作流"""
+        return [result for result in self.results if result.status != STATUS_COMPLETED]
+
+
+LaunchTime = Union[float, Callable[[Action], float]]
+
+
+def simulate_workflow(
+    workflow: Workflow,
+    launch_time: LaunchTime = 0.0,
+    launcher: Optional[Callable[[str], None]] = None,
+    clock: Optional[VirtualClock] = None
+) -> SimulationResult:
+    """用虚拟时钟模拟执行一个工作流，不等待真实的延迟
+
+    调度与 WorkflowRun 使用同一个 ActionQueue：前置动作、并行组、
+    max_concurrency 和延迟的计算方式完全相同，但没有线程，延迟瞬间跳过，
+    结果是确定的。
+
+    Args:
+        workflow: 要模拟的工作流
+        launch_time: 每次打开占用的秒数，可以是按动作计算的函数
+        launcher: 代替启动器在打开时调用，抛出异常表示打开失败，默认不调用
+        clock: 虚拟时钟，默认从 0 开始
+
+    Returns:
+        SimulationResult: 模拟结果
+    """
+    clock = clock or VirtualClock()
+    queue = ActionQueue(list(workflow.actions), workflow.max_concurrency)
+    start = clock()
+    launches: List[SimulatedLaunch] = []
+    finishing: List[Tuple[float, int, str]] = []  # (结束时间, 动作索引, 错误) 小根堆
+    peak = 0
+    error = ''
+
+    queue.start(start)
+    while True:
+        if not error:
+            for _, index in queue.pop_due(clock()):
+                action = queue.actions[index]
+                failure = ''
+                if launcher is not None:
+                    try:
+                        launcher(action.path)
+                    except Exception as e:
+                        failure = str(e) or type(e).__name__
+                end = clock() + (launch_time(action) if callable(launch_time) else launch_time)
+                launches.append(SimulatedLaunch(index, action.path, clock(), end, failure))
+                heapq.heappush(finishing, (end, index, failure))
+            peak = max(peak, queue.in_flight)
+
+        # 下一个事件：最早结束的打开或最早到期的动作，出错后只等待已打开的动作
+        due = None if error else queue.next_due()
+        if finishing and (due is None or finishing[0][0] <= due):
+            moment = finishing[0][0]
+        elif due is not None:
+            moment = due
+        else:
+            break
+        clock.advance_to(moment)
+        while finishing and finishing[0][0] <= clock():
+            _, index, failure = heapq.heappop(finishing)
+            queue.finish(index, clock(), succeeded=not failure)
+            if failure and not error:
+                error = f"执行动作时出错：{failure}"
+
+    return SimulationResult(
+        workflow_id=workflow.id,
+        workflow_name=workflow.name,
+        status=STATUS_FAILED if error else STATUS_COMPLETED,
+        start=start,
+        end=max((launch.end for launch in launches), default=start),
+        launches=launches,
+        peak_concurrency=peak,
+        error=error
+    )
+
+
+def _peak_and_overlap(intervals: Iterable[Tuple[float, float]]) -> Tuple[int, float]:
+    """区间的最大重叠数和至少两个区间重叠的总时长，端点相接不算重叠"""
+    points = []
+    for start, end in intervals:
+        if end > start:
+            points.append((start, 1))
+            points.append((end, -1))
+    # 同一时刻先结束再开始
+    points.sort()
+    active = peak = 0
+    overlap = 0.0
+    previous = 0.0
+    for moment, change in points:
+        if active >= 2:
+            overlap += moment - previous
+        active += change
+        peak = max(peak, active)
+        previous = moment
+    return peak, overlap
+
+
+def simulate_workflows(
+    workflows: Iterable[Workflow],
+    launch_time: LaunchTime = 0.0,
+    launcher: Optional[Callable[[str], None]] = None
+) -> SimulationReport:
+    """模拟同时开始执行多个工作流
+
+    执行引擎中各次执行互不影响，因此逐个模拟后合并时间线，计算总用时和
+    工作流之间的重叠。同时打开的动作数只在 launch_time 大于 0 时有意义。
+
+    Args:
+        workflows: 要模拟的工作流
+        launch_time: 每次打开占用的秒数，可以是按动作计算的函数
+        launcher: 代替启动器在打开时调用，抛出异常表示打开失败，默认不调用
+
+    Returns:
+        SimulationReport: 模拟结果
+    """
+    results = [simulate_workflow(workflow, launch_time, launcher) for workflow in workflows]
+    peak_workflows, overlap = _peak_and_overlap((result.start, result.end) for result in results)
+    peak_launches, _ = _peak_and_overlap(
+        (launch.start, launch.end) for result in results for launch in result.launches
+    )
+    return SimulationReport(
+        results=results,
+        duration=max((result.end for result in results), default=0.0),
+        overlap=overlap,
+        peak_workflows=peak_workflows,
+        peak_launches=peak_launches
+    )
@@ -0,0 +1,212 @@
+from typing import Dict, Iterable, List, Optional
+import json
+import os
+import sqlite3
+import threading
+from src.core.scene import Action, NameConflictError, Schedule, Workflow, make_action
+from src.core.storage import FORMAT_SQLITE, JsonStorage, WorkflowStorage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workflows (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    max_concurrency INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_workflows_name ON workflows(name);
+CREATE TABLE IF NOT EXISTS actions (
+    workflow_id TEXT NOT NULL REFERENCES workflows(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    path TEXT NOT NULL,
+    delay REAL NOT NULL,
+    action_group TEXT,
+    depends_on TEXT,
+    PRIMARY KEY (workflow_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_actions_path ON actions(path);
+CREATE TABLE IF NOT EXISTS schedules (
+    workflow_id TEXT NOT NULL REFERENCES workflows(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (workflow_id, position)
+) WITHOUT ROWID;
+"""
+
+
+class SqliteStorage(WorkflowStorage):
+    """SQLite存储
+
+    加载时只读取工作流的名称、定时计划等基本信息，动作列表在工作流被打开
+    或执行时才按需查询。提交只写入变更的工作流，且在一个事务中完成。
+    """
+    format = FORMAT_SQLITE
+
+    def __init__(self, path: str, migrate_from: Optional[str] = None):
+        """
+        Args:
+            path: 数据库文件路径
+            migrate_from: 数据库首次创建时从该 workflows.json 导入已有工作流
+        """
+        super().__init__(path)
+        self.migrate_from = migrate_from
+        self._conn: Optional[sqlite3.Connection] = None
+        # 动作可能在UI线程以外的线程中按需加载，连接的访问需要加锁
+        self._lock = threading.RLock()
+
+    def load(self) -> Dict[str, Workflow]:
+        created = not os.path.exists(self.path)
+        self._connect()
+        if created and self.migrate_from and os.path.exists(self.migrate_from):
+            workflows = JsonStorage(self.migrate_from).load()
+            self.save_all(workflows)
+            self._warn(f"已从 {self.migrate_from} 迁移 {len(workflows)} 个工作流")
+
+        with self._lock:
+            rows = self._conn.execute("SELECT id, name, max_concurrency FROM workflows").fetchall()
+            schedule_rows = self._conn.execute(
+                "SELECT workflow_id, data FROM schedules ORDER BY workflow_id, position"
+            ).fetchall()
+        schedules: Dict[str, List[Schedule]] = {}
+        for workflow_id, data in schedule_rows:
+            schedules.setdefault(workflow_id, []).append(Schedule.from_dict(json.loads(data)))
+        return {
+            workflow_id: Workflow(
+                name=name,
+                id=workflow_id,
+                max_concurrency=max_concurrency,
+                actions_loader=lambda workflow_id=workflow_id: self.load_actions(workflow_id),
+                schedules=schedules.get(workflow_id)
+            )
+            for workflow_id, name, max_concurrency in rows
+        }
+
+    def load_actions(self, workflow_id: str) -> List[Action]:
+        """读取工作流的动作列表"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT type, path, delay, action_group, depends_on FROM actions "
+                "WHERE workflow_id = ? ORDER BY position",
+                (workflow_id,)
+            ).fetchall()
+        return [
+            make_action(
+                action_type,
+                path,
+                delay,
+                group,
+                json.loads(depends_on) if depends_on is not None else None
+            )
+            for action_type, path, delay, group, depends_on in rows
+        ]
+
+    def save_all(self, workflows: Dict[str, Workflow]) -> None:
+        with self._lock:
+            existing = {row[0] for row in self._conn.execute("SELECT id FROM workflows")}
+        self.commit(workflows, changed=workflows.keys(), removed=existing - workflows.keys())
+
+    def commit(self, workflows: Dict[str, Workflow], changed: Iterable[str] = (), removed: Iterable[str] = ()) -> None:
+        changed_workflows = [workflows[workflow_id] for workflow_id in changed if workflow_id in workflows]
+        removed = list(removed)
+        try:
+            self._write(changed_workflows, removed)
+        except sqlite3.IntegrityError:
+            # 名称的唯一索引冲突：其他进程已保存了同名的工作流，事务已回滚
+            conflicts = self._name_conflicts(changed_workflows, removed)
+            if conflicts:
+                raise NameConflictError([workflow.id for workflow in conflicts], [workflow.name for workflow in conflicts]) from None
+            raise
+
+    def _name_conflicts(self, changed_workflows: List[Workflow], removed: List[str]) -> List[Workflow]:
+        """数据库中已被本次未涉及的工作流使用了名称的变更工作流"""
+        involved = {workflow.id for workflow in changed_workflows}.union(removed)
+        with self._lock:
+            return [
+                workflow for workflow in changed_workflows
+                if any(
+                    row[0] not in involved
+                    for row in self._conn.execute("SELECT id FROM workflows WHERE name = ?", (workflow.name,))
+                )
+            ]
+
+    def _write(self, changed_workflows: List[Workflow], removed: List[str]) -> None:
+        """在一个事务中写入变更"""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM workflows WHERE id = ?", [(workflow_id,) for workflow_id in removed])
+            # 先给变更的工作流设置临时名称，避免互换名称时触发唯一索引冲突
+            self._conn.executemany(
+                "UPDATE workflows SET name = ? WHERE id = ?",
+                [('\0' + workflow.id, workflow.id) for workflow in changed_workflows]
+            )
+            self._conn.executemany(
+                "INSERT INTO workflows (id, name, max_concurrency) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET name = excluded.name, max_concurrency = excluded.max_concurrency",
+                [(workflow.id, workflow.name, workflow.max_concurrency) for workflow in changed_workflows]
+            )
+            self._conn.executemany(
+                "DELETE FROM schedules WHERE workflow_id = ?",
+                [(workflow.id,) for workflow in changed_workflows]
+            )
+            self._conn.executemany(
+                "INSERT INTO schedules (workflow_id, position, data) VALUES (?, ?, ?)",
+                [
+                    (workflow.id, position, json.dumps(schedule.to_dict(), ensure_ascii=False))
+                    for workflow in changed_workflows
+                    for position, schedule in enumerate(workflow.schedules)
+                ]
+            )
+            for workflow in changed_workflows:
+                # 未加载的动作列表不可能被修改过，无需重写
+                if not workflow.actions_loaded:
+                    continue
+                self._conn.execute("DELETE FROM actions WHERE workflow_id = ?", (workflow.id,))
+                self._conn.executemany(
+                    "INSERT INTO actions (workflow_id, position, type, path, delay, action_group, depends_on) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            workflow.id,
+                            position,
+                            action.type,
+                            action.path,
+                            action.delay,
+                            action.group,
+                            json.dumps(action.depends_on) if action.depends_on is not None else None
+                        )
+                        for position, action in enumerate(workflow.actions)
+                    ]
+                )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> None:
+        """打开数据库并创建表结构"""
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute("PRAGMA foreign_keys = ON")
+                self._conn.execute("PRAGMA journal_mode = WAL")
+                self._conn.executescript(SCHEMA)
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str) -> int:
+    """将 workflows.json 中的工作流导入SQLite数据库
+
+    Args:
+        json_path: workflows.json 路径
+        db_path: 数据库文件路径
+
+    Returns:
+        int: 导入的工作流数量
+    """
+    workflows = JsonStorage(json_path).load()
+    storage = SqliteStorage(db_path)
+    try:
+        storage.load()
+        storage.commit(workflows, changed=workflows.keys())
+    finally:
+        storage.close()
+    return len(workflows)
@@ -0,0 +1,697 @@
+from typing import Callable, Dict, Iterable, Iterator, IO, List, Optional, Set, Tuple
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from src.core.filelock import FileLock
+from src.core.scene import NameConflictError, StorageError, Workflow
+
+# 日志文件超过该大小（字节）后在后台合并进快照
+DEFAULT_COMPACT_THRESHOLD = 4 * 1024 * 1024
+# 合并失败后至少间隔这么多秒再重试
+COMPACT_RETRY_INTERVAL = 60.0
+# 追加日志和旧版本合并中的日志的文件名后缀
+JOURNAL_SUFFIX = '.journal'
+COMPACTING_SUFFIX = '.journal.compacting'
+
+# 工作流文件格式
+FORMAT_JSON = 'json'
+FORMAT_BINARY = 'binary'
+FORMAT_SQLITE = 'sqlite'
+FORMAT_JOURNAL = 'journal'  # JSON快照加追加日志
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+BINARY_EXTENSION = '.wfb'
+# 文件开头的标识，用于识别格式
+BINARY_MAGIC = b'WFBS'
+SQLITE_MAGIC = b'SQLite format 3\0'
+
+
+def atomic_write(path: str, write: Callable[[IO], None], binary: bool = False) -> None:
+    """原子地写入文件
+
+    先写入同目录下的临时文件并刷新到磁盘，再通过重命名替换目标文件，
+    因此目标文件要么是旧内容，要么是完整的新内容。
+
+    Args:
+        path: 目标文件路径
+        write: 向文件对象写入内容的函数
+        binary: 以二进制方式打开临时文件，默认为 UTF-8 文本
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        with (open(tmp_path, 'wb') if binary else open(tmp_path, 'w', encoding='utf-8')) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def encode_workflow(workflow: Workflow) -> str:
+    """将工作流编码为紧凑的JSON文本"""
+    return json.dumps(workflow.to_dict(), ensure_ascii=False, separators=(',', ':'))
+
+
+def encode_fragment(workflow: Workflow) -> str:
+    """将工作流编码为 workflows.json 中的一项
+
+    结果与 json.dump(..., indent=4) 输出的对应部分完全相同，
+    包含键和缩进一级的值，不含前后的分隔符。
+    """
+    value = json.dumps(workflow.to_dict(), ensure_ascii=False, indent=4).replace('\n', '\n    ')
+    return f"{json.dumps(workflow.id, ensure_ascii=False)}: {value}"
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+
+
+def iter_entries(text: str) -> Iterator[Tuple[str, str, Dict]]:
+    """逐项解析 workflows.json 的顶层对象
+
+    Yields:
+        Tuple[str, str, Dict]: (键, 该项在文本中的原样片段, 解析出的值)
+    """
+    index = _WHITESPACE.match(text, 0).end()
+    if text[index:index + 1] != '{':
+        raise ValueError("工作流文件格式错误")
+    index = _WHITESPACE.match(text, index + 1).end()
+    if text[index:index + 1] == '}':
+        return
+    while True:
+        start = index
+        key, index = _DECODER.raw_decode(text, index)
+        index = _WHITESPACE.match(text, index).end()
+        if not isinstance(key, str) or text[index:index + 1] != ':':
+            raise ValueError("工作流文件格式错误")
+        index = _WHITESPACE.match(text, index + 1).end()
+        value, index = _DECODER.raw_decode(text, index)
+        yield key, text[start:index], value
+        index = _WHITESPACE.match(text, index).end()
+        if text[index:index + 1] == ',':
+            index = _WHITESPACE.match(text, index + 1).end()
+        elif text[index:index + 1] == '}':
+            return
+        else:
+            raise ValueError("工作流文件格式错误")
+
+
+def file_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    """文件的修改时间、大小和索引号，文件被原子替换后索引号也会变化；文件不存在时返回 None"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def detect_format(path: str) -> str:
+    """识别工作流文件的格式
+
+    文件开头是二进制或SQLite的标识时按标识识别，与扩展名无关；文件不存在或
+    为空时按扩展名决定：.db/.sqlite/.sqlite3 为SQLite，.wfb 为二进制，其余为JSON；
+    其他内容除SQLite扩展名外都按JSON读取。JSON文件旁存在追加日志时为日志模式。
+
+    Returns:
+        str: FORMAT_JSON、FORMAT_JOURNAL、FORMAT_BINARY 或 FORMAT_SQLITE
+    """
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(len(SQLITE_MAGIC))
+    except FileNotFoundError:
+        head = b''
+    if head.startswith(BINARY_MAGIC):
+        return FORMAT_BINARY
+    if head == SQLITE_MAGIC or extension in SQLITE_EXTENSIONS:
+        return FORMAT_SQLITE
+    if not head and extension == BINARY_EXTENSION:
+        return FORMAT_BINARY
+    if has_journal(path):
+        return FORMAT_JOURNAL
+    return FORMAT_JSON
+
+
+def has_journal(path: str) -> bool:
+    """JSON文件旁是否存在追加日志（包括旧版本合并中的日志）"""
+    return os.path.exists(f"{path}{JOURNAL_SUFFIX}") or os.path.exists(f"{path}{COMPACTING_SUFFIX}")
+
+
+def open_storage(path: str, journal: bool = False) -> 'WorkflowStorage':
+    """根据文件格式选择存储后端，格式见 detect_format
+
+    SQLite数据库首次创建时自动迁移同目录下的 workflows.json。
+
+    Args:
+        path: 工作流文件路径
+        journal: 是否将JSON文件切换为追加日志模式；已有日志时总是使用日志模式
+    """
+    file_format = detect_format(path)
+    if journal and file_format not in (FORMAT_JSON, FORMAT_JOURNAL):
+        raise ValueError(f"只有JSON格式的工作流文件可以使用日志模式: {path}")
+    if journal or file_format == FORMAT_JOURNAL:
+        return JournalStorage(path)
+    # 这两个存储模块依赖本模块，在此导入以避免循环导入
+    if file_format == FORMAT_SQLITE:
+        from src.core.sqlite_storage import SqliteStorage
+        return SqliteStorage(path, migrate_from=os.path.join(os.path.dirname(path), "workflows.json"))
+    if file_format == FORMAT_BINARY:
+        from src.core.binary_storage import BinaryStorage
+        return BinaryStorage(path)
+    return JsonStorage(path)
+
+
+class NameTable:
+    """文件中工作流ID与名称的对应关系，提交前据此检查名称是否与其他进程保存的工作流重复"""
+    def __init__(self, names: Iterable[Tuple[str, str]] = ()):
+        self._names: Dict[str, str] = {}  # 工作流ID -> 名称
+        self._ids: Dict[str, Set[str]] = {}  # 名称 -> 工作流ID
+        for workflow_id, name in names:
+            self.set(workflow_id, name)
+
+    def set(self, workflow_id: str, name: str) -> None:
+        self.discard(workflow_id)
+        self._names[workflow_id] = name
+        self._ids.setdefault(name, set()).add(workflow_id)
+
+    def discard(self, workflow_id: str) -> None:
+        name = self._names.pop(workflow_id, None)
+        if name is not None:
+            ids = self._ids[name]
+            ids.discard(workflow_id)
+            if not ids:
+                del self._ids[name]
+
+    def check(self, workflows: Dict[str, Workflow], changed: Iterable[str], removed: Iterable[str]) -> None:
+        """检查提交后的名称是否重复
+
+        只检查新增或改名的工作流，文件中原有的重名不影响提交。本次一起改名的
+        工作流之间可以互换名称。
+
+        Raises:
+            NameConflictError: 新增或改名的工作流与文件中的其他工作流重名
+        """
+        changed = [workflow_id for workflow_id in changed if workflow_id in workflows]
+        leaving = set(removed)
+        renamed = []
+        for workflow_id in changed:
+            name = workflows[workflow_id].name
+            if self._names.get(workflow_id) != name:
+                leaving.add(workflow_id)
+                renamed.append(workflow_id)
+        conflicts = []
+        taken: Set[str] = set()
+        for workflow_id in renamed:
+            name = workflows[workflow_id].name
+            if name in taken or any(other not in leaving for other in self._ids.get(name, ())):
+                conflicts.append(workflow_id)
+            taken.add(name)
+        if conflicts:
+            raise NameConflictError(conflicts, [workflows[workflow_id].name for workflow_id in conflicts])
+
+    def apply(self, workflows: Dict[str, Workflow], changed: Iterable[str], removed: Iterable[str]) -> None:
+        """记录已写入的变更"""
+        for workflow_id in removed:
+            self.discard(workflow_id)
+        for workflow_id in changed:
+            if workflow_id in workflows:
+                self.set(workflow_id, workflows[workflow_id].name)
+
+
+class WorkflowStorage:
+    """工作流存储后端基类"""
+    format = FORMAT_JSON  # 文件格式，见 detect_format
+
+    def __init__(self, path: str):
+        self.path = path
+        # 不影响读写结果的提示，如丢弃了不完整的日志记录，由工作流管理器取出显示
+        self._warnings: List[str] = []
+        self._warnings_lock = threading.Lock()
+
+    def load(self) -> Dict[str, Workflow]:
+        """加载全部工作流，key 是工作流ID"""
+        raise NotImplementedError
+
+    def save_all(self, workflows: Dict[str, Workflow]) -> None:
+        """保存全部工作流"""
+        raise NotImplementedError
+
+    def commit(self, workflows: Dict[str, Workflow], changed: Iterable[str] = (), removed: Iterable[str] = ()) -> None:
+        """提交一次变更，默认整体保存
+
+        Args:
+            workflows: 变更后的全部工作流
+            changed: 新增或修改的工作流ID
+            removed: 删除的工作流ID
+        """
+        self.save_all(workflows)
+
+    def refresh(self) -> Optional[Tuple[Dict[str, Workflow], List[str]]]:
+        """读取其他进程提交的修改
+
+        Returns:
+            Optional[Tuple[Dict[str, Workflow], List[str]]]: (新增或修改的工作流, 删除的工作流ID)，
+            没有修改或后端不支持检测时返回 None
+        """
+        return None
+
+    def take_warnings(self) -> List[str]:
+        """取出并清空之前产生的提示，可能在后台线程中产生"""
+        with self._warnings_lock:
+            warnings, self._warnings = self._warnings, []
+        return warnings
+
+    def _warn(self, message: str) -> None:
+        with self._warnings_lock:
+            self._warnings.append(message)
+
+    def close(self) -> None:
+        """释放存储后端占用的资源"""
+        pass
+
+
+class JsonStorage(WorkflowStorage):
+    """JSON文件存储，每次提交整体重写 workflows.json
+
+    缓存每个工作流在文件中的片段：加载时直接取自文件原文，提交时只重新编码
+    变更的工作流，其余拼接缓存的片段，写出的文件与 json.dump(..., indent=4)
+    的结果完全相同。
+
+    多个进程可以同时使用同一个文件。读写都在跨进程文件锁内进行，并根据文件的
+    修改时间、大小和索引号判断文件是否被其他进程改写：提交前先读取其他进程的
+    修改，在其基础上只写入本次变更，不会覆盖其他进程的修改；读到的修改由
+    refresh 交给调用方合并。
+
+    文件旁出现追加日志时说明已有进程切换到日志模式，日志中的记录比文件新，
+    此时拒绝写入，需要重新打开存储。
+    """
+    def __init__(self, path: str, lock_timeout: float = 10.0):
+        super().__init__(path)
+        self._fragments: Dict[str, str] = {}  # 工作流ID -> 文件中的片段
+        self._stamp: Optional[Tuple[int, int, int]] = None  # 最近一次读写后的文件状态
+        self._verbatim = True  # 缓存的片段是否与 json.dump(..., indent=4) 的格式一致
+        self._names = NameTable()  # 文件中各工作流的名称
+        self._lock = FileLock(f"{path}.lock", lock_timeout)
+        # 已从文件读到、尚未交给调用方的其他进程的修改
+        self._external_changed: Dict[str, Workflow] = {}
+        self._external_removed: Set[str] = set()
+
+    def load(self) -> Dict[str, Workflow]:
+        with self._lock:
+            self._external_changed, self._external_removed = {}, set()
+            workflows, self._fragments = self._read()
+        return workflows
+
+    def save_all(self, workflows: Dict[str, Workflow]) -> None:
+        with self._lock:
+            self._external_changed, self._external_removed = {}, set()
+            self._write({workflow_id: encode_fragment(workflow) for workflow_id, workflow in workflows.items()})
+            self._names = NameTable((workflow_id, workflow.name) for workflow_id, workflow in workflows.items())
+
+    def commit(self, workflows: Dict[str, Workflow], changed: Iterable[str] = (), removed: Iterable[str] = ()) -> None:
+        changed, removed = list(changed), list(removed)
+        with self._lock:
+            self._read_external()
+            # 其他进程可能已保存了同名的工作流
+            self._names.check(workflows, changed, removed)
+            fragments = dict(self._fragments)
+            if not self._verbatim:
+                # 文件不是本程序写出的格式，首次写入时按统一格式重新编码
+                for workflow_id in fragments:
+                    if workflow_id in workflows and workflow_id not in self._external_changed:
+                        fragments[workflow_id] = encode_fragment(workflows[workflow_id])
+            for workflow_id in removed:
+                fragments.pop(workflow_id, None)
+            for workflow_id in changed:
+                if workflow_id in workflows:
+                    fragments[workflow_id] = encode_fragment(workflows[workflow_id])
+            self._write(fragments)
+            self._names.apply(workflows, changed, removed)
+            # 本次写入的工作流以本进程为准，之前读到的其他进程的修改作废
+            for workflow_id in changed + removed:
+                self._external_changed.pop(workflow_id, None)
+                self._external_removed.discard(workflow_id)
+
+    def refresh(self) -> Optional[Tuple[Dict[str, Workflow], List[str]]]:
+        # 文件未变化时只需一次 stat，不必获取文件锁
+        if file_stamp(self.path) == self._stamp and not (self._external_changed or self._external_removed):
+            return None
+        with self._lock:
+            self._read_external()
+            changed, removed = self._external_changed, self._external_removed
+            self._external_changed, self._external_removed = {}, set()
+        if not changed and not removed:
+            return None
+        return changed, list(removed)
+
+    def _read(self) -> Tuple[Dict[str, Workflow], Dict[str, str]]:
+        """读取文件并记录文件状态，返回工作流和对应的片段"""
+        self._stamp = file_stamp(self.path)
+        if self._stamp is None:
+            self._names = NameTable()
+            return {}, {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        # 原文片段用于比较是否有修改；不是本程序写出的格式时，写入前需要重新编码
+        self._verbatim = text.startswith('{\n    "')
+        workflows: Dict[str, Workflow] = {}
+        fragments: Dict[str, str] = {}
+        for key, fragment, data in iter_entries(text):
+            workflow = Workflow.from_dict(data)
+            workflows[workflow.id] = workflow
+            fragments[workflow.id] = fragment if workflow.id == key else encode_fragment(workflow)
+        self._names = NameTable((workflow_id, workflow.name) for workflow_id, workflow in workflows.items())
+        return workflows, fragments
+
+    def _read_external(self) -> None:
+        """文件被其他进程改写时重新读取，与缓存的片段比较得出其他进程的修改"""
+        stamp = file_stamp(self.path)
+        if stamp == self._stamp or stamp is None:
+            # 文件被删除时保留已有内容，下次提交会重新写出
+            return
+        workflows, fragments = self._read()
+        for workflow_id, fragment in fragments.items():
+            if self._fragments.get(workflow_id) != fragment:
+                self._external_changed[workflow_id] = workflows[workflow_id]
+                self._external_removed.discard(workflow_id)
+        for workflow_id in self._fragments:
+            if workflow_id not in fragments:
+                self._external_changed.pop(workflow_id, None)
+                self._external_removed.add(workflow_id)
+        self._fragments = fragments
+
+    def _write(self, fragments: Dict[str, str]) -> None:
+        """拼接全部片段写入文件"""
+        if has_journal(self.path):
+            raise StorageError(f"工作流文件 {self.path} 已切换为日志模式，请重新加载后再保存")
+
+        def write(f: IO[str]) -> None:
+            if not fragments:
+                f.write('{}')
+                return
+            f.write('{\n    ')
+            for index, fragment in enumerate(fragments.values()):
+                if index:
+                    f.write(',\n    ')
+                f.write(fragment)
+            f.write('\n}')
+
+        atomic_write(self.path, write)
+        self._fragments = fragments
+        self._verbatim = True
+        self._stamp = file_stamp(self.path)
+
+
+class JournalStorage(WorkflowStorage):
+    """追加日志存储
+
+    快照文件沿用 workflows.json 的格式，之后的每次变更以一行JSON追加到
+    workflows.json.journal，加载时先读快照再重放日志。日志超过阈值后由后台
+    线程把全部记录写入快照，再清空日志；快照原子地替换，已包含在快照中的
+    记录即使被重复重放结果也不变，因此任何时刻崩溃都不会丢失已提交的变更。
+    合并失败时日志保持不变，稍后重试。
+
+    与 JsonStorage 使用同一个文件锁，多个进程可以同时使用：每次读写前先读取
+    其他进程追加的记录，快照被其他进程改写时重新读取全部内容，读到的修改由
+    refresh 交给调用方合并。日志文件存在时 open_storage 总是选择本后端。
+    """
+    format = FORMAT_JOURNAL
+
+    def __init__(self, path: str, compact_threshold: int = DEFAULT_COMPACT_THRESHOLD, lock_timeout: float = 10.0):
+        super().__init__(path)
+        self.journal_path = f"{path}{JOURNAL_SUFFIX}"
+        # 旧版本合并时使用的日志，加载时一并重放
+        self.compacting_path = f"{path}{COMPACTING_SUFFIX}"
+        self.compact_threshold = compact_threshold
+        # 每个工作流最新的编码结果，合并时写入快照
+        self._records: Dict[str, str] = {}
+        self._snapshot_size = 0
+        self._journal_size = 0  # 已读取或写入的日志字节数
+        self._stamps: Optional[Tuple] = None  # 最近一次读写后快照和旧日志的状态
+        self._compactor: Optional[threading.Thread] = None
+        self._compact_failed_at: Optional[float] = None
+        self._names = NameTable()  # 快照和日志中各工作流的名称
+        self._lock = FileLock(f"{path}.lock", lock_timeout)
+        # 已从文件读到、尚未交给调用方的其他进程的修改
+        self._external_changed: Dict[str, Workflow] = {}
+        self._external_removed: Set[str] = set()
+
+    def load(self) -> Dict[str, Workflow]:
+        self.wait_for_compaction()
+        with self._lock:
+            self._external_changed, self._external_removed = {}, set()
+            workflows = self._read_all()
+            if os.path.exists(self.compacting_path):
+                # 上次合并未完成，先合并再继续追加
+                self._merge()
+            elif not os.path.exists(self.journal_path):
+                # 立即创建日志，其他进程据此改用日志模式，不再整体重写快照
+                open(self.journal_path, 'a', encoding='utf-8').close()
+        return workflows
+
+    def save_all(self, workflows: Dict[str, Workflow]) -> None:
+        self.wait_for_compaction()
+        with self._lock:
+            self._external_changed, self._external_removed = {}, set()
+            self._records = {
+                workflow.id: encode_workflow(workflow)
+                for workflow in workflows.values()
+            }
+            self._names = NameTable((workflow.id, workflow.name) for workflow in workflows.values())
+            self._merge()
+
+    def commit(self, workflows: Dict[str, Workflow], changed: Iterable[str] = (), removed: Iterable[str] = ()) -> None:
+        changed, removed = list(changed), list(removed)
+        with self._lock:
+            self._sync()
+            # 其他进程可能已保存了同名的工作流
+            self._names.check(workflows, changed, removed)
+            lines = []
+            for workflow_id in changed:
+                workflow = workflows.get(workflow_id)
+                if workflow is None:
+                    continue
+                record = encode_workflow(workflow)
+                self._records[workflow_id] = record
+                lines.append(f'{{"op":"put","workflow":{record}}}\n')
+            for workflow_id in removed:
+                self._records.pop(workflow_id, None)
+                lines.append(json.dumps({'op': 'delete', 'id': workflow_id}, ensure_ascii=False) + '\n')
+            # 本次写入的工作流以本进程为准，之前读到的其他进程的修改作废
+            for workflow_id in changed + removed:
+                self._external_changed.pop(workflow_id, None)
+                self._external_removed.discard(workflow_id)
+            if not lines:
+                return
+
+            data = ''.join(lines).encode('utf-8')
+            # 每次提交单独打开日志，其他进程合并后清空的日志不会被继续占用
+            with open(self.journal_path, 'ab') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_size += len(data)
+            self._names.apply(workflows, changed, removed)
+
+            # 阈值随快照大小增长，保证合并的开销均摊到每次提交上是常数
+            if self._journal_size > max(self.compact_threshold, self._snapshot_size // 2):
+                self._start_compaction()
+
+    def refresh(self) -> Optional[Tuple[Dict[str, Workflow], List[str]]]:
+        # 文件未变化时不必获取文件锁
+        if (
+            self._file_stamps() == self._stamps
+            and self._journal_file_size() == self._journal_size
+            and not (self._external_changed or self._external_removed)
+        ):
+            return None
+        with self._lock:
+            self._sync()
+            changed, removed = self._external_changed, self._external_removed
+            self._external_changed, self._external_removed = {}, set()
+        if not changed and not removed:
+            return None
+        return changed, list(removed)
+
+    def wait_for_compaction(self) -> None:
+        """等待后台合并结束"""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def close(self) -> None:
+        """退出前将日志合并进快照，使 workflows.json 自包含；清空的日志文件保留，下次仍以日志方式打开"""
+        self.wait_for_compaction()
+        with self._lock:
+            self._sync()
+            if self._journal_size > 0 or os.path.exists(self.compacting_path):
+                self._merge()
+
+    def _file_stamps(self) -> Tuple:
+        return file_stamp(self.path), file_stamp(self.compacting_path)
+
+    def _journal_file_size(self) -> int:
+        try:
+            return os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            return 0
+
+    def _read_all(self) -> Dict[str, Workflow]:
+        """读取快照并重放日志，调用时需持有文件锁"""
+        self._stamps = self._file_stamps()
+        workflows_data: Dict[str, Dict] = {}
+        self._snapshot_size = 0
+        if os.path.exists(self.path):
+            self._snapshot_size = os.path.getsize(self.path)
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for data in json.load(f).values():
+                    workflow_id = data.setdefault('id', str(uuid.uuid4()))  # 为旧数据生成新ID
+                    workflows_data[workflow_id] = data
+        self._replay(self.compacting_path, workflows_data)
+        self._journal_size = self._replay(self.journal_path, workflows_data)
+
+        workflows = {}
+        self._records = {}
+        for data in workflows_data.values():
+            workflow = Workflow.from_dict(data)
+            workflows[workflow.id] = workflow
+            self._records[workflow.id] = encode_workflow(workflow)
+        self._names = NameTable((workflow_id, workflow.name) for workflow_id, workflow in workflows.items())
+        return workflows
+
+    def _sync(self) -> None:
+        """读取其他进程的修改，调用时需持有文件锁
+
+        快照或旧日志被改写、日志变短时重新读取全部内容，否则只重放日志新增的部分。
+        """
+        journal_size = self._journal_file_size()
+        if self._file_stamps() == self._stamps and journal_size >= self._journal_size:
+            if journal_size > self._journal_size:
+                workflows_data: Dict[str, Dict] = {}
+                removed: Set[str] = set()
+                self._journal_size = self._replay(self.journal_path, workflows_data, self._journal_size, removed)
+                for workflow_id in removed:
+                    self._names.discard(workflow_id)
+                    if self._records.pop(workflow_id, None) is not None:
+                        self._external_changed.pop(workflow_id, None)
+                        self._external_removed.add(workflow_id)
+                for data in workflows_data.values():
+                    workflow = Workflow.from_dict(data)
+                    self._names.set(workflow.id, workflow.name)
+                    record = encode_workflow(workflow)
+                    if self._records.get(workflow.id) != record:
+                        self._records[workflow.id] = record
+                        self._external_changed[workflow.id] = workflow
+                        self._external_removed.discard(workflow.id)
+            return
+
+        old_records = self._records
+        workflows = self._read_all()
+        for workflow_id, record in self._records.items():
+            if old_records.get(workflow_id) != record:
+                self._external_changed[workflow_id] = workflows[workflow_id]
+                self._external_removed.discard(workflow_id)
+        for workflow_id in old_records:
+            if workflow_id not in self._records:
+                self._external_changed.pop(workflow_id, None)
+                self._external_removed.add(workflow_id)
+
+    def _replay(
+        self,
+        journal_path: str,
+        workflows_data: Dict[str, Dict],
+        start: int = 0,
+        removed: Optional[Set[str]] = None
+    ) -> int:
+        """从 start 字节处重放日志，返回有效内容的结尾位置
+
+        只有最后一行不完整或无法解析时视为写入中途崩溃，截掉该行并产生提示；
+        之后还有内容时说明日志损坏，抛出 StorageError，不丢弃后面的记录。
+
+        Args:
+            journal_path: 日志路径
+            workflows_data: 重放的目标，工作流ID -> 工作流数据
+            start: 开始重放的位置
+            removed: 传入时记录被删除的工作流ID
+        """
+        if not os.path.exists(journal_path):
+            return 0
+        valid_size = start
+        with open(journal_path, 'rb') as f:
+            f.seek(start)
+            for raw_line in f:
+                try:
+                    if not raw_line.endswith(b'\n'):
+                        raise ValueError("记录不完整")
+                    record = json.loads(raw_line.decode('utf-8'))
+                    if record['op'] == 'put':
+                        workflow_id = record['workflow']['id']
+                        workflows_data[workflow_id] = record['workflow']
+                        if removed is not None:
+                            removed.discard(workflow_id)
+                    elif record['op'] == 'delete':
+                        workflows_data.pop(record['id'], None)
+                        if removed is not None:
+                            removed.add(record['id'])
+                except Exception as e:
+                    if f.read(1):
+                        raise StorageError(f"工作流日志 {journal_path} 在第 {valid_size} 字节处损坏: {e}") from e
+                    self._warn(f"工作流日志末尾的记录不完整，已丢弃: {e}")
+                    break
+                valid_size += len(raw_line)
+        if valid_size < os.path.getsize(journal_path):
+            with open(journal_path, 'r+b') as f:
+                f.truncate(valid_size)
+        return valid_size
+
+    def _merge(self) -> None:
+        """把全部记录写入快照并清空日志，调用时需持有文件锁并已读取最新的记录"""
+        self._write_snapshot(dict(self._records))
+        if os.path.exists(self.compacting_path):
+            os.remove(self.compacting_path)
+        open(self.journal_path, 'w', encoding='utf-8').close()
+        self._journal_size = 0
+        self._stamps = self._file_stamps()
+        self._compact_failed_at = None
+
+    def _write_snapshot(self, records: Dict[str, str]) -> None:
+        """原子地写入快照"""
+        def write(f: IO[str]) -> None:
+            f.write('{')
+            for position, (workflow_id, record) in enumerate(records.items()):
+                if position:
+                    f.write(',')
+                f.write('\n')
+                f.write(json.dumps(workflow_id, ensure_ascii=False))
+                f.write(':')
+                f.write(record)
+            f.write('\n}')
+
+        atomic_write(self.path, write)
+        self._snapshot_size = os.path.getsize(self.path)
+
+    def _start_compaction(self) -> None:
+        """在后台合并日志，调用时需持有文件锁"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        if self._compact_failed_at is not None and time.monotonic() - self._compact_failed_at < COMPACT_RETRY_INTERVAL:
+            return
+
+        def compact() -> None:
+            try:
+                # 合并期间其他线程和进程的提交等待文件锁，合并前先读取它们已追加的记录
+                with self._lock:
+                    self._sync()
+                    self._merge()
+            except Exception as e:
+                # 日志保持不变，之后的提交超过阈值时重试
+                self._compact_failed_at = time.monotonic()
+                self._warn(f"合并工作流日志时出错，将在之后的保存中重试: {e}")
+
+        self._compactor = threading.Thread(target=compact, name="workflow-journal-compactor", daemon=True)
+        self._compactor.start()
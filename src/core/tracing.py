@@ -0,0 +1,203 @@
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import IO, Callable, Deque, Iterable, List, Optional
+import json
+import math
+import threading
+
+# 动作的执行结果
+OUTCOME_OK = 'ok'
+OUTCOME_FAILED = 'failed'
+
+# 内存环形缓冲区默认保留的动作记录和执行摘要数量
+DEFAULT_ACTION_CAPACITY = 10000
+DEFAULT_RUN_CAPACITY = 100
+
+
+@dataclass
+class ActionTrace:
+    """一个动作的执行记录
+
+    时间为 Unix 时间戳（秒），时长为秒。延后 drift 是实际调用启动器的时间
+    晚于计划时间的秒数，包括等待线程池空位的时间，不包括暂停的时间。
+    """
+    run_id: str
+    workflow_id: str
+    workflow_name: str
+    index: int
+    path: str
+    delay: float  # 动作配置的延迟
+    scheduled: float  # 计划开始时间
+    started: float  # 实际调用启动器的时间
+    duration: float  # 启动器调用耗时
+    drift: float
+    outcome: str  # OUTCOME_OK 或 OUTCOME_FAILED
+    error: str = ''
+
+
+@dataclass
+class RunSummary:
+    """一次执行的追踪摘要，时长均为秒"""
+    run_id: str
+    workflow_id: str
+    workflow_name: str
+    status: str
+    actions: int  # 调用了启动器的动作数
+    failed: int
+    launch_p50: float
+    launch_p95: float
+    launch_max: float
+    total_drift: float
+    max_drift: float
+    delay_total: float  # 这些动作配置的延迟之和
+    elapsed: float  # 从开始执行到结束，包括暂停
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """按最近秩法取分位数，列表为空时返回 0"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize_run(
+    run_id: str,
+    workflow_id: str,
+    workflow_name: str,
+    status: str,
+    traces: Iterable[ActionTrace],
+    elapsed: float
+) -> RunSummary:
+    """根据一次执行的动作记录计算摘要"""
+    traces = list(traces)
+    durations = sorted(trace.duration for trace in traces)
+    drifts = [trace.drift for trace in traces]
+    return RunSummary(
+        run_id=run_id,
+        workflow_id=workflow_id,
+        workflow_name=workflow_name,
+        status=status,
+        actions=len(traces),
+        failed=sum(trace.outcome == OUTCOME_FAILED for trace in traces),
+        launch_p50=_percentile(durations, 0.5),
+        launch_p95=_percentile(durations, 0.95),
+        launch_max=durations[-1] if durations else 0.0,
+        total_drift=sum(drifts),
+        max_drift=max(drifts, default=0.0),
+        delay_total=sum(trace.delay for trace in traces),
+        elapsed=elapsed
+    )
+
+
+def format_summary(summary: RunSummary) -> str:
+    """摘要的简短说明，用于状态栏和命令行输出"""
+    return (
+        f"启动耗时 p50 {summary.launch_p50 * 1000:.1f} ms / p95 {summary.launch_p95 * 1000:.1f} ms，"
+        f"累计延后 {summary.total_drift:.3f} 秒，配置延迟 {summary.delay_total:g} 秒，"
+        f"总用时 {summary.elapsed:.2f} 秒"
+    )
+
+
+class TraceSink:
+    """追踪记录的接收者基类
+
+    方法在执行引擎的工作线程中调用，实现需要线程安全；抛出的异常被忽略，
+    不影响执行。
+    """
+    def record_action(self, trace: ActionTrace) -> None:
+        """一个动作调用启动器结束后调用"""
+
+    def record_run(self, summary: RunSummary) -> None:
+        """一次执行结束后、发出结束事件之前调用"""
+
+    def close(self) -> None:
+        """释放资源"""
+
+
+class RingBufferSink(TraceSink):
+    """在内存中保留最近的动作记录和执行摘要"""
+    def __init__(self, action_capacity: int = DEFAULT_ACTION_CAPACITY, run_capacity: int = DEFAULT_RUN_CAPACITY):
+        # deque 的 append 是线程安全的
+        self.actions: Deque[ActionTrace] = deque(maxlen=action_capacity)
+        self.runs: Deque[RunSummary] = deque(maxlen=run_capacity)
+
+    def record_action(self, trace: ActionTrace) -> None:
+        self.actions.append(trace)
+
+    def record_run(self, summary: RunSummary) -> None:
+        self.runs.append(summary)
+
+    def find_run(self, run_id: str) -> Optional[RunSummary]:
+        """按执行ID查找仍在缓冲区中的摘要"""
+        for summary in reversed(self.runs):
+            if summary.run_id == run_id:
+                return summary
+        return None
+
+    def run_actions(self, run_id: str) -> List[ActionTrace]:
+        """仍在缓冲区中的某次执行的动作记录"""
+        return [trace for trace in list(self.actions) if trace.run_id == run_id]
+
+
+class JsonLinesSink(TraceSink):
+    """把记录追加到文件，每行一个JSON对象，kind 字段为 action 或 run"""
+    def __init__(self, path: str):
+        self.path = path
+        self._file: IO[str] = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def _write(self, kind: str, record: object, flush: bool) -> None:
+        line = json.dumps({'kind': kind, **asdict(record)}, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            if flush:
+                self._file.flush()
+
+    def record_action(self, trace: ActionTrace) -> None:
+        self._write('action', trace, flush=False)
+
+    def record_run(self, summary: RunSummary) -> None:
+        # 每次执行结束时写入磁盘，动作记录不逐条刷新
+        self._write('run', summary, flush=True)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class CallbackSink(TraceSink):
+    """把记录交给回调函数"""
+    def __init__(
+        self,
+        on_action: Optional[Callable[[ActionTrace], None]] = None,
+        on_run: Optional[Callable[[RunSummary], None]] = None
+    ):
+        self.on_action = on_action
+        self.on_run = on_run
+
+    def record_action(self, trace: ActionTrace) -> None:
+        if self.on_action:
+            self.on_action(trace)
+
+    def record_run(self, summary: RunSummary) -> None:
+        if self.on_run:
+            self.on_run(summary)
+
+
+class MultiSink(TraceSink):
+    """把记录依次交给多个接收者"""
+    def __init__(self, sinks: Iterable[TraceSink]):
+        self.sinks = list(sinks)
+
+    def record_action(self, trace: ActionTrace) -> None:
+        for sink in self.sinks:
+            sink.record_action(trace)
+
+    def record_run(self, summary: RunSummary) -> None:
+        for sink in self.sinks:
+            sink.record_run(summary)
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
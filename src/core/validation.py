@@ -0,0 +1,166 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+import os
+import stat
+import threading
+import time
+from src.core.scene import Workflow
+
+# 路径类型
+KIND_FILE = 'file'
+KIND_FOLDER = 'folder'
+
+
+class _StatEntry(NamedTuple):
+    kind: Optional[str]  # None 表示路径不存在或无法访问
+    checked_at: float
+    parent_mtime: Optional[float]
+
+
+class StatCache:
+    """路径状态缓存
+
+    缓存项在 ttl 秒内直接使用。过期后先检查父目录的修改时间：目录中增删或
+    重命名条目都会改变它，若未变化则缓存项仍然有效，只需续期。父目录的
+    修改时间本身只缓存 dir_ttl 秒，同一目录下的大量路径因此只需一次 stat。
+    """
+    def __init__(self, ttl: float = 30.0, dir_ttl: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.dir_ttl = dir_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, _StatEntry] = {}
+        self._dir_mtimes: Dict[str, tuple] = {}  # 目录 -> (修改时间, 检查时间)
+        self._lock = threading.Lock()
+
+    def kind(self, path: str) -> Optional[str]:
+        """获取路径类型
+
+        Returns:
+            Optional[str]: 'file'、'folder'，路径不存在或无法访问时为 None
+        """
+        key = os.path.normcase(os.path.abspath(path))
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry.checked_at < self.ttl:
+                self.hits += 1
+                return entry.kind
+
+        parent_mtime = self._parent_mtime(os.path.dirname(key), now)
+        if entry and parent_mtime is not None and entry.parent_mtime == parent_mtime:
+            with self._lock:
+                self.hits += 1
+                self._entries[key] = entry._replace(checked_at=now)
+            return entry.kind
+
+        kind = self._stat_kind(key)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = _StatEntry(kind, now, parent_mtime)
+        return kind
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """使缓存失效，path 为 None 时清空全部缓存"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._dir_mtimes.clear()
+            else:
+                self._entries.pop(os.path.normcase(os.path.abspath(path)), None)
+
+    def _parent_mtime(self, directory: str, now: float) -> Optional[float]:
+        """获取父目录的修改时间"""
+        with self._lock:
+            cached = self._dir_mtimes.get(directory)
+            if cached and now - cached[1] < self.dir_ttl:
+                return cached[0]
+        try:
+            mtime = os.stat(directory).st_mtime
+        except OSError:
+            mtime = None
+        with self._lock:
+            self._dir_mtimes[directory] = (mtime, now)
+        return mtime
+
+    @staticmethod
+    def _stat_kind(path: str) -> Optional[str]:
+        try:
+            mode = os.stat(path).st_mode
+        except OSError:
+            return None
+        return KIND_FOLDER if stat.S_ISDIR(mode) else KIND_FILE
+
+
+@dataclass
+class PathProblem:
+    """无效的动作路径"""
+    workflow_id: str
+    index: int
+    path: str
+    reason: str
+
+
+def describe_problem(action_type: str, kind: Optional[str]) -> Optional[str]:
+    """根据动作类型和路径实际类型给出问题描述，路径有效时返回 None"""
+    if kind is None:
+        return "路径不存在或无法访问"
+    if action_type == 'folder' and kind != KIND_FOLDER:
+        return "路径不是文件夹"
+    if action_type == 'file' and kind != KIND_FILE:
+        return "路径不是文件"
+    return None
+
+
+class PathValidator:
+    """动作路径预检
+
+    先对所有动作的路径去重，再在线程池中并发查询路径状态，结果经过
+    StatCache 缓存，多个工作流共用的路径不会重复访问文件系统。
+    """
+    def __init__(self, cache: Optional[StatCache] = None, max_workers: int = 8):
+        self.cache = cache or StatCache()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="path-check")
+        # 异步任务在单独的线程中汇总结果，避免占满查询线程池
+        self._coordinator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="path-validate")
+
+    def check_paths(self, paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        """并发查询路径类型
+
+        Returns:
+            Dict[str, Optional[str]]: 路径 -> 路径类型
+        """
+        unique_paths = list(dict.fromkeys(paths))
+        return dict(zip(unique_paths, self._pool.map(self.cache.kind, unique_paths)))
+
+    def validate(self, workflows: Iterable[Workflow]) -> Dict[str, List[PathProblem]]:
+        """检查工作流中所有动作的路径
+
+        Returns:
+            Dict[str, List[PathProblem]]: 工作流ID -> 无效路径，只包含有问题的工作流
+        """
+        snapshot = [(workflow.id, list(workflow.actions)) for workflow in workflows]
+        kinds = self.check_paths(action.path for _, actions in snapshot for action in actions)
+
+        problems: Dict[str, List[PathProblem]] = {}
+        for workflow_id, actions in snapshot:
+            for index, action in enumerate(actions):
+                reason = describe_problem(action.type, kinds[action.path])
+                if reason:
+                    problems.setdefault(workflow_id, []).append(PathProblem(workflow_id, index, action.path, reason))
+        return problems
+
+    def validate_async(self, workflows: Iterable[Workflow]) -> 'Future[Dict[str, List[PathProblem]]]':
+        """在后台检查工作流，返回 Future"""
+        return self._coordinator.submit(self.validate, list(workflows))
+
+    def check_paths_async(self, paths: Iterable[str]) -> 'Future[Dict[str, Optional[str]]]':
+        """在后台查询路径类型，返回 Future"""
+        return self._coordinator.submit(self.check_paths, list(paths))
+
+    def shutdown(self) -> None:
+        """停止线程池，不等待未完成的任务"""
+        self._coordinator.shutdown(wait=False)
+        self._pool.shutdown(wait=False)
@@ -1,7 +1,35 @@
-from ui.main_window import MainWindow
+import time
+
+# 尽早记录启动时间，用于统计命令行从启动到首个动作的耗时
+START_TIME = time.perf_counter()
+
+import argparse
+import sys
+from typing import List, Optional
+
+def parse_window_args(argv: List[str]) -> Optional[argparse.Namespace]:
+    """只有 --store 和 --journal 而没有命令时打开图形界面，返回这两个选项；否则返回 None"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--store')
+    parser.add_argument('--journal', action='store_true')
+    args, rest = parser.parse_known_args(argv)
+    return None if rest else args
 
 def main():
-    app = MainWindow()
+    # 打包后的程序以特殊参数运行自身来启动启动器辅助进程，这时不进入命令行或图形界面
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+
+    # 带命令时使用命令行模式，不导入任何图形界面模块
+    window_args = parse_window_args(sys.argv[1:])
+    if window_args is None:
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:], start_time=START_TIME))
+
+    # 只有打开窗口时才导入图形界面模块
+    from ui.main_window import MainWindow
+    app = MainWindow(start_time=START_TIME, workflows_file=window_args.store, journal=window_args.journal)
     app.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,517 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import tkinter.font as tkfont
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from src.core.scene import remap_dependencies
+
+# 动作类型的显示名称
+TYPE_LABELS = {'folder': "文件夹", 'file': "文件"}
+# 表格的列：(列名, 标题, 宽度, 是否随窗口拉伸)
+COLUMNS = [
+    ('index', "序号", 50, False),
+    ('type', "类型", 60, False),
+    ('path', "路径", 260, True),
+    ('delay', "延迟(秒)", 70, False),
+    ('group', "并行组", 70, False),
+    ('status', "状态", 110, False),
+]
+# 可以双击直接编辑的列，列名与动作字典的键相同
+EDITABLE_COLUMNS = ('type', 'path', 'delay', 'group')
+
+# 鼠标事件的修饰键
+_SHIFT_MASK = 0x0001
+_CONTROL_MASK = 0x0004
+
+
+class ActionGridView:
+    """动作表格视图
+
+    动作字典列表由调用方持有，表格只为可见窗口中的行创建固定数量的条目，
+    滚动时原地更新这些条目的内容。修改一个动作只更新对应的一行，删除和
+    移动只重新填充可见窗口，因此开销与动作总数无关。
+
+    选中的行按位置记录，支持 Ctrl 和 Shift 多选；双击单元格直接编辑类型、
+    路径、延迟和并行组，拖动选中的行或按 Alt+上/下 调整顺序。删除和移动
+    会同步修正 depends_on 中的依赖索引。
+    """
+    def __init__(
+        self,
+        parent: tk.Widget,
+        actions: List[Dict],
+        describe_problem: Optional[Callable[[Dict], Optional[str]]] = None,
+        on_edit: Optional[Callable[[int, str], None]] = None,
+        on_open: Optional[Callable[[int], None]] = None
+    ):
+        """
+        Args:
+            parent: 父组件
+            actions: 动作字典列表，表格直接修改该列表
+            describe_problem: 返回动作的问题说明，没有问题时返回 None
+            on_edit: 单元格编辑后调用，参数为 (位置, 字段)
+            on_open: 双击序号或状态列时调用，参数为位置
+        """
+        self.actions = actions
+        self.describe_problem = describe_problem
+        self.on_edit = on_edit
+        self.on_open = on_open
+        self._top = 0  # 可见窗口第一行的位置
+        self._visible = 1  # 可见窗口的行数
+        self._slot_count = 0  # 表格中的条目数，条目ID为 "0"、"1"……
+        self._selected: Set[int] = set()
+        self._anchor: Optional[int] = None  # Shift 多选的起点
+        self._cursor: Optional[int] = None  # 键盘操作的当前行
+        # 拖动：按下时所在的行、按在已选中的行上时松开后只选中的行、当前放置位置
+        self._drag_start: Optional[int] = None
+        self._click_only: Optional[int] = None
+        self._drop_target: Optional[int] = None
+        # 正在编辑的单元格
+        self._editor: Optional[ttk.Widget] = None
+        self._editing: Optional[Tuple[int, str]] = None
+
+        self.frame = ttk.Frame(parent)
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.frame.grid_columnconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(
+            self.frame, columns=[column[0] for column in COLUMNS], show='headings', selectmode='none', height=1
+        )
+        for name, heading, width, stretch in COLUMNS:
+            self.tree.heading(name, text=heading, anchor='w')
+            self.tree.column(name, width=width, minwidth=30, stretch=stretch, anchor='w')
+        self.tree.tag_configure('invalid', foreground="red")
+        self.tree.tag_configure('drop', background="#cce4ff")
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        # 选择、滚动和键盘导航作用于全部动作，而不是表格中的可见条目
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<ButtonPress-1>', self._on_press)
+        self.tree.bind('<B1-Motion>', self._on_drag)
+        self.tree.bind('<ButtonRelease-1>', self._on_release)
+        self.tree.bind('<Double-Button-1>', self._on_double_click)
+        self.tree.bind('<MouseWheel>', lambda e: self._scroll_by(-3 if e.delta > 0 else 3))
+        self.tree.bind('<Button-4>', lambda e: self._scroll_by(-3))
+        self.tree.bind('<Button-5>', lambda e: self._scroll_by(3))
+        self.tree.bind('<Up>', lambda e: self._move_cursor(-1, False))
+        self.tree.bind('<Down>', lambda e: self._move_cursor(1, False))
+        self.tree.bind('<Shift-Up>', lambda e: self._move_cursor(-1, True))
+        self.tree.bind('<Shift-Down>', lambda e: self._move_cursor(1, True))
+        self.tree.bind('<Prior>', lambda e: self._move_cursor(-self._visible, False))
+        self.tree.bind('<Next>', lambda e: self._move_cursor(self._visible, False))
+        self.tree.bind('<Home>', lambda e: self._move_cursor(-len(self.actions), False))
+        self.tree.bind('<End>', lambda e: self._move_cursor(len(self.actions), False))
+        self.tree.bind('<Alt-Up>', lambda e: self._shift_selection(-1))
+        self.tree.bind('<Alt-Down>', lambda e: self._shift_selection(1))
+        self.tree.bind('<Control-a>', self._select_all)
+        self.tree.bind('<F2>', self._edit_cursor)
+
+    def grid(self, **kwargs) -> None:
+        """布局表格视图"""
+        self.frame.grid(**kwargs)
+
+    def selected_positions(self) -> List[int]:
+        """按顺序返回选中行的位置"""
+        return sorted(self._selected)
+
+    def select(self, positions: Iterable[int]) -> None:
+        """选中指定的行，并滚动使第一行可见"""
+        self._selected = {position for position in positions if 0 <= position < len(self.actions)}
+        if self._selected:
+            self._cursor = self._anchor = min(self._selected)
+            self.see(self._cursor)
+        self._restore_selection()
+
+    def see(self, position: int) -> None:
+        """滚动使指定位置的行可见"""
+        if position < self._top:
+            self._top = position
+        elif position >= self._top + self._visible:
+            self._top = position - self._visible + 1
+        else:
+            return
+        self._clamp_top()
+        self._render()
+
+    def refresh(self) -> None:
+        """重新填充可见窗口，用于显示内容依赖的外部状态（如路径检查结果）变化之后"""
+        self._render()
+
+    def refresh_row(self, position: int) -> None:
+        """重新生成一行的显示内容，不在可见窗口中时不做任何事"""
+        slot = position - self._top
+        if 0 <= slot < self._slot_count:
+            values, tags = self._row(position)
+            self.tree.item(str(slot), values=values, tags=tags)
+
+    def rows_appended(self, start: int) -> None:
+        """调用方在列表末尾追加了从 start 开始的动作后调用，只填充可见窗口中的新行"""
+        end = min(len(self.actions), self._top + self._visible)
+        for position in range(max(start, self._top), end):
+            values, tags = self._row(position)
+            slot = position - self._top
+            if slot < self._slot_count:
+                self.tree.item(str(slot), values=values, tags=tags)
+            else:
+                self.tree.insert('', tk.END, iid=str(slot), values=values, tags=tags)
+                self._slot_count += 1
+        self._update_scrollbar()
+
+    def set_field(self, positions: Iterable[int], field: str, value: object) -> None:
+        """将多个动作的同一字段设为相同的值，只更新可见的行"""
+        self.commit_edit()
+        for position in positions:
+            self.actions[position][field] = value
+            self.refresh_row(position)
+
+    def remove_rows(self, positions: Iterable[int]) -> None:
+        """删除多个动作并修正依赖索引，删除后选中原第一个被删除位置上的行"""
+        self.commit_edit()
+        removed = {position for position in positions if 0 <= position < len(self.actions)}
+        if not removed:
+            return
+        new_positions: List[Optional[int]] = []
+        kept = []
+        for position, action in enumerate(self.actions):
+            if position in removed:
+                new_positions.append(None)
+            else:
+                new_positions.append(len(kept))
+                kept.append(action)
+        self._apply_order(kept, new_positions)
+
+        first = min(removed)
+        self._selected = {first} if first < len(self.actions) else set()
+        if not self._selected and self.actions:
+            self._selected = {len(self.actions) - 1}
+        self._cursor = self._anchor = min(self._selected) if self._selected else None
+        self._clamp_top()
+        self._render()
+
+    def move_rows(self, positions: Iterable[int], target: int, after: bool = False) -> None:
+        """将多个动作作为一个整体移动到 target 所在行之前（after 为 True 时之后）
+
+        被移动的动作保持原有的相对顺序，移动后保持选中。
+
+        Args:
+            positions: 要移动的动作位置
+            target: 放置位置参照的行，不能是被移动的行
+            after: 放在参照行之后
+        """
+        self.commit_edit()
+        count = len(self.actions)
+        moving = sorted({position for position in positions if 0 <= position < count})
+        if not moving or not 0 <= target < count or target in moving:
+            return
+        moving_set = set(moving)
+        order = [position for position in range(count) if position not in moving_set]
+        insert_at = bisect_left(order, target + 1 if after else target)
+        order[insert_at:insert_at] = moving
+
+        new_positions: List[Optional[int]] = [0] * count
+        for new_position, old_position in enumerate(order):
+            new_positions[old_position] = new_position
+        self._apply_order([self.actions[position] for position in order], new_positions)
+
+        self._selected = set(range(insert_at, insert_at + len(moving)))
+        self._cursor = self._anchor = insert_at
+        if not self._top <= insert_at < self._top + self._visible:
+            self._top = insert_at - self._visible // 2
+        self._clamp_top()
+        self._render()
+
+    def begin_edit(self, position: int, field: str) -> None:
+        """在单元格上显示编辑框，回车或离开时提交，Esc 取消"""
+        self.commit_edit()
+        if field not in EDITABLE_COLUMNS or not 0 <= position < len(self.actions):
+            return
+        self.see(position)
+        bbox = self.tree.bbox(str(position - self._top), field)
+        if not bbox:
+            return
+        x, y, width, height = bbox
+        action = self.actions[position]
+        if field == 'type':
+            editor = ttk.Combobox(self.tree, values=list(TYPE_LABELS.values()), state='readonly')
+            editor.set(TYPE_LABELS.get(action['type'], action['type']))
+            editor.bind('<<ComboboxSelected>>', lambda e: self.commit_edit())
+        else:
+            editor = ttk.Entry(self.tree)
+            editor.insert(0, self._cell_text(action, field))
+            editor.select_range(0, tk.END)
+            # 下拉框打开时也会失去焦点，因此只有输入框在失去焦点时提交
+            editor.bind('<FocusOut>', lambda e: self.commit_edit())
+        editor.bind('<Return>', lambda e: self.commit_edit() or "break")
+        editor.bind('<Escape>', lambda e: self._cancel_edit() or "break")
+        editor.place(x=x, y=y, width=width, height=height)
+        editor.focus_set()
+        self._editor = editor
+        self._editing = (position, field)
+
+    def _apply_order(self, actions: List[Dict], new_positions: List[Optional[int]]) -> None:
+        """用重新排列的动作替换列表内容，并按新位置修正依赖索引"""
+        for action in actions:
+            if action.get('depends_on') is not None:
+                action['depends_on'] = remap_dependencies(action['depends_on'], new_positions)
+        self.actions[:] = actions
+
+    def commit_edit(self) -> None:
+        """提交正在编辑的单元格，输入无效时提示并放弃修改，没有在编辑时不做任何事"""
+        if self._editor is None:
+            return
+        editor, (position, field) = self._editor, self._editing
+        text = editor.get()
+        self._editor = self._editing = None
+        editor.destroy()
+        self.tree.focus_set()
+
+        action = self.actions[position]
+        if field == 'type':
+            value = next((key for key, label in TYPE_LABELS.items() if label == text), action['type'])
+        elif field == 'path':
+            value = text.strip()
+            if not value:
+                messagebox.showwarning("警告", "路径不能为空", parent=self.tree)
+                return
+        elif field == 'delay':
+            try:
+                value = float(text)
+            except ValueError:
+                value = -1
+            if value < 0:
+                messagebox.showwarning("警告", "延迟时间必须是非负数", parent=self.tree)
+                return
+        else:
+            value = text.strip() or None
+        if action.get(field) == value:
+            return
+        action[field] = value
+        self.refresh_row(position)
+        if self.on_edit:
+            self.on_edit(position, field)
+
+    def _cancel_edit(self) -> None:
+        if self._editor is not None:
+            editor = self._editor
+            self._editor = self._editing = None
+            editor.destroy()
+            self.tree.focus_set()
+
+    def _edit_cursor(self, event: tk.Event) -> str:
+        if self._cursor is not None:
+            self.begin_edit(self._cursor, 'delay')
+        return "break"
+
+    @staticmethod
+    def _cell_text(action: Dict, field: str) -> str:
+        value = action.get(field)
+        return "" if value is None else str(value)
+
+    def _row(self, position: int) -> Tuple[Tuple, Tuple[str, ...]]:
+        """生成一行的 (各列的值, 标签)"""
+        action = self.actions[position]
+        reason = self.describe_problem(action) if self.describe_problem else None
+        values = (
+            f"⚠ {position + 1}" if reason else position + 1,
+            TYPE_LABELS.get(action['type'], action['type']),
+            action['path'],
+            action['delay'],
+            action.get('group') or "",
+            reason or ""
+        )
+        tags = ('invalid',) if reason else ()
+        if position == self._drop_target:
+            tags += ('drop',)
+        return values, tags
+
+    def _clamp_top(self) -> bool:
+        """将可见窗口限制在有效范围内，返回是否发生变化"""
+        top = max(0, min(self._top, len(self.actions) - self._visible))
+        changed = top != self._top
+        self._top = top
+        return changed
+
+    def _render(self) -> None:
+        """原地更新可见窗口中的条目，只在可见行数变化时增删条目"""
+        count = max(0, min(self._visible, len(self.actions) - self._top))
+        for slot in range(count):
+            values, tags = self._row(self._top + slot)
+            if slot < self._slot_count:
+                self.tree.item(str(slot), values=values, tags=tags)
+            else:
+                self.tree.insert('', tk.END, iid=str(slot), values=values, tags=tags)
+        for slot in range(count, self._slot_count):
+            self.tree.delete(str(slot))
+        self._slot_count = count
+        self._restore_selection()
+        self._update_scrollbar()
+
+    def _restore_selection(self) -> None:
+        """在表格中标记可见窗口内选中的行"""
+        self.tree.selection_set([
+            str(position - self._top)
+            for position in range(self._top, self._top + self._slot_count)
+            if position in self._selected
+        ])
+
+    def _update_scrollbar(self) -> None:
+        total = len(self.actions)
+        if total <= self._visible:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self._top / total, min(1.0, (self._top + self._visible) / total))
+
+    def _row_metrics(self) -> Tuple[int, int]:
+        """表格中 (第一行的纵坐标, 一行的像素高度)"""
+        bbox = self.tree.bbox('0') if self._slot_count else None
+        if bbox:
+            return bbox[1], max(1, bbox[3])
+        height = tkfont.nametofont('TkDefaultFont').metrics('linespace') + 2
+        return height + 4, height
+
+    def _position_at(self, y: int) -> Optional[int]:
+        """纵坐标所在行的位置，不在任何行上时返回 None"""
+        slot = self.tree.identify_row(y)
+        return self._top + int(slot) if slot else None
+
+    def _scroll_by(self, rows: int) -> str:
+        self.commit_edit()
+        self._top += rows
+        self._clamp_top()
+        self._render()
+        return "break"
+
+    def _on_scrollbar(self, *args) -> None:
+        """处理滚动条拖动和点击"""
+        self.commit_edit()
+        if args[0] == 'moveto':
+            self._top = int(float(args[1]) * len(self.actions))
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            self._top += step * self._visible if args[2] == 'pages' else step
+        self._clamp_top()
+        self._render()
+
+    def _on_configure(self, event: tk.Event) -> None:
+        """窗口大小变化时重新计算可见行数"""
+        first_y, row_height = self._row_metrics()
+        visible = max(1, (event.height - first_y - 2) // row_height)
+        if visible != self._visible:
+            self.commit_edit()
+            self._visible = visible
+            self._clamp_top()
+            self._render()
+
+    def _on_press(self, event: tk.Event) -> str:
+        """单击选择，Ctrl 切换选中，Shift 选择连续的行"""
+        self.commit_edit()
+        self.tree.focus_set()
+        if self.tree.identify_region(event.x, event.y) == 'separator':
+            # 让表格处理列宽调整
+            return ""
+        position = self._position_at(event.y)
+        self._click_only = None
+        if position is None:
+            return "break"
+        if event.state & _SHIFT_MASK and self._anchor is not None:
+            low, high = sorted((self._anchor, position))
+            self._selected = set(range(low, high + 1))
+        elif event.state & _CONTROL_MASK:
+            self._selected ^= {position}
+            self._anchor = position
+        elif position in self._selected:
+            # 可能要拖动多行，松开时没有拖动才只选中这一行
+            self._click_only = position
+        else:
+            self._selected = {position}
+            self._anchor = position
+        self._cursor = position
+        self._drag_start = position
+        self._restore_selection()
+        return "break"
+
+    def _on_drag(self, event: tk.Event) -> str:
+        """拖动选中的行时标记放置位置，拖到边缘时滚动"""
+        if self._drag_start is None or self._drag_start not in self._selected:
+            return "break"
+        first_y, _ = self._row_metrics()
+        if event.y < first_y and self._top > 0:
+            self._scroll_by(-1)
+            position = self._top
+        elif event.y >= self.tree.winfo_height() and self._top + self._visible < len(self.actions):
+            self._scroll_by(1)
+            position = self._top + self._slot_count - 1
+        else:
+            position = self._position_at(event.y)
+        if position is not None:
+            self._set_drop_target(None if position in self._selected else position)
+        return "break"
+
+    def _on_release(self, event: tk.Event) -> None:
+        start, target, click_only = self._drag_start, self._drop_target, self._click_only
+        self._drag_start = self._click_only = None
+        if start is None:
+            return
+        self._set_drop_target(None)
+        if target is not None:
+            self.move_rows(self._selected, target, after=target > start)
+        elif click_only is not None:
+            self._selected = {click_only}
+            self._anchor = click_only
+            self._restore_selection()
+
+    def _set_drop_target(self, position: Optional[int]) -> None:
+        if position == self._drop_target:
+            return
+        previous, self._drop_target = self._drop_target, position
+        if previous is not None:
+            self.refresh_row(previous)
+        if position is not None:
+            self.refresh_row(position)
+
+    def _on_double_click(self, event: tk.Event) -> str:
+        """双击可编辑的单元格时编辑，双击其他列时打开动作的位置"""
+        position = self._position_at(event.y)
+        column = self.tree.identify_column(event.x)
+        if position is None or not column:
+            return "break"
+        field = COLUMNS[int(column[1:]) - 1][0]
+        if field in EDITABLE_COLUMNS:
+            self.begin_edit(position, field)
+        elif self.on_open:
+            self.on_open(position)
+        return "break"
+
+    def _move_cursor(self, offset: int, extend: bool) -> str:
+        """用键盘移动当前行，extend 为 True 时从起点扩展选择"""
+        self.commit_edit()
+        count = len(self.actions)
+        if not count:
+            return "break"
+        position = 0 if self._cursor is None else max(0, min(count - 1, self._cursor + offset))
+        if extend and self._anchor is not None:
+            low, high = sorted((self._anchor, position))
+            self._selected = set(range(low, high + 1))
+        else:
+            self._selected = {position}
+            self._anchor = position
+        self._cursor = position
+        self.see(position)
+        self._restore_selection()
+        return "break"
+
+    def _shift_selection(self, offset: int) -> str:
+        """将选中的行整体上移或下移一行"""
+        positions = self.selected_positions()
+        if positions:
+            if offset < 0 and positions[0] > 0:
+                self.move_rows(positions, positions[0] - 1)
+            elif offset > 0 and positions[-1] < len(self.actions) - 1:
+                self.move_rows(positions, positions[-1] + 1, after=True)
+        return "break"
+
+    def _select_all(self, event: tk.Event) -> str:
+        self._selected = set(range(len(self.actions)))
+        self._restore_selection()
+        return "break"
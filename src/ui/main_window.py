@@ -1,27 +1,94 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-from typing import Optional, Dict, List, Tuple
+from tkinter import ttk, messagebox, filedialog, simpledialog
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Dict, Iterator, List, Tuple
 import os
 import time
 import tkinterdnd2
-from src.core.scene import Workflow, WorkflowManager
-from src.ui.scene_dialog import WorkflowDialog
+from src.core.bundle import BUNDLE_EXTENSION, ImportReport, export_bundle, iter_import
+from src.core.scene import Action, StorageError, Workflow, WorkflowManager, make_action
+from src.core.executor import (
+    ExecutionEngine, ExecutionEvent,
+    EVENT_ACTION_FAILED, EVENT_FINISHED, STATUS_CANCELLED, STATUS_PAUSED
+)
+from src.core.launcher import create_launcher
+from src.core.prefetch import DEFAULT_PREFETCH_BUDGET
+from src.core.scheduler import Scheduler
+from src.core.tracing import RingBufferSink, format_summary
+from src.core.validation import PathProblem, PathValidator
+from src.ui.scene_dialog import ImportOptionsDialog, ScheduleDialog, WorkflowDialog
+from src.ui.workflow_list import WorkflowListView
+
+# 加载完成后每次向列表中添加的工作流数量
+LOAD_CHUNK_SIZE = 1000
+# 修改后延迟写入的时间窗口（秒），连续的修改合并为一次写入
+SAVE_DELAY = 0.5
+# 检查其他程序修改工作流文件的间隔（毫秒）
+STORE_POLL_INTERVAL = 1000
+# 加载完成后每次加入搜索索引的工作流数量
+SEARCH_INDEX_CHUNK_SIZE = 200
+# 搜索结果最多显示的数量
+SEARCH_LIMIT = 500
+# 界面中导入工作流包时每批合并的工作流数量，每批在一次事件循环中完成
+IMPORT_BATCH_SIZE = 200
+# 处理执行进度事件的间隔（毫秒）
+EVENT_POLL_INTERVAL = 100
+# 执行期间界面超过这个秒数没有处理事件时，在执行结束的状态中报告卡顿
+UI_STALL_THRESHOLD = 0.05
 
 class MainWindow:
-    def __init__(self):
+    def __init__(self, start_time: Optional[float] = None, workflows_file: Optional[str] = None, journal: bool = False):
+        """
+        Args:
+            start_time: 程序启动时的 time.perf_counter()，用于统计启动耗时，默认为创建窗口的时间
+            workflows_file: 工作流文件路径，默认为程序目录下的 workflows.json
+            journal: 是否将JSON工作流文件切换为追加日志模式
+        """
+        self.start_time = start_time if start_time is not None else time.perf_counter()
+        # 启动耗时（秒）：first_paint 为窗口首次绘制，fully_loaded 为工作流全部显示在列表中
+        self.startup_metrics: Dict[str, Optional[float]] = {'first_paint': None, 'fully_loaded': None}
+
         self.root = tkinterdnd2.TkinterDnD.Tk()
         self.root.title("工作流管理器")
-        self.root.geometry("600x400")
-
-        # 初始化工作流管理器
-        self.workflow_manager = WorkflowManager()
+        self.root.geometry("640x520")
+        # 右侧按钮列连同状态栏约需420像素高，窗口不能再小，否则最后的按钮被遮住
+        self.root.minsize(520, 500)
+
+        # 初始化工作流管理器，工作流在后台线程中加载，窗口不必等待；
+        # 修改由后台线程写入，不阻塞界面
+        self.workflow_manager = WorkflowManager(workflows_file, load=False, save_delay=SAVE_DELAY, journal=journal)
+        self.loaded = False
+        self._reported_save_error: Optional[StorageError] = None
+
+        # 初始化执行引擎，使用当前平台的系统启动器
+        self.launcher = create_launcher()
+        # 最近执行的追踪记录，执行结束时在状态栏显示启动耗时和延后
+        self.trace_sink = RingBufferSink()
+        # 动作等待延迟期间预读即将打开的文件和文件夹
+        self.execution_engine = ExecutionEngine(
+            launcher=self.launcher,
+            trace_sink=self.trace_sink,
+            prefetch_budget=DEFAULT_PREFETCH_BUDGET
+        )
+        # 执行期间界面最长的卡顿（秒），按执行ID记录，由两次处理事件的间隔超出 EVENT_POLL_INTERVAL 的部分得出
+        self._ui_stalls: Dict[str, float] = {}
+        self._current_stall = 0.0
+        self._last_event_poll: Optional[float] = None
+        # 定时执行服务，工作流加载完成后启动
+        self.scheduler = Scheduler(self.workflow_manager)
 
-        # 用于存储列表项与工作流ID的映射
-        self.list_item_to_id: Dict[str, str] = {}
+        # 初始化路径预检，记录存在无效路径的工作流
+        self.path_validator = PathValidator()
+        self.path_problems: Dict[str, List[PathProblem]] = {}
 
         # 设置UI
         self._setup_ui()
-        self._update_workflow_list()
+        self.root.bind('<Map>', self._on_first_map)
+        self._load_workflows()
+
+        # 关闭窗口时停止所有执行
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._poll_execution_events()
 
     def _setup_ui(self) -> None:
         """设置UI组件"""
@@ -35,6 +102,7 @@ class MainWindow:
 
         # 配置主框架的网格布局权重
         main_frame.grid_rowconfigure(0, weight=1)
+        main_frame.grid_rowconfigure(1, weight=0)  # 状态栏不伸缩
         main_frame.grid_columnconfigure(0, weight=3)  # 列表区域占比更大
         main_frame.grid_columnconfigure(1, weight=1)  # 按钮区域占比较小
 
@@ -42,59 +110,356 @@ class MainWindow:
         list_frame = ttk.Frame(main_frame)
         list_frame.grid(row=0, column=0, sticky="nsew", padx=(0, 10))
         list_frame.grid_rowconfigure(0, weight=0)  # 标题行不伸缩
-        list_frame.grid_rowconfigure(1, weight=1)  # 列表区域自动伸缩
+        list_frame.grid_rowconfigure(1, weight=0)  # 搜索框不伸缩
+        list_frame.grid_rowconfigure(2, weight=1)  # 列表区域自动伸缩
         list_frame.grid_columnconfigure(0, weight=1)
 
         # 添加工作流列表标题
         title_label = ttk.Label(list_frame, text="工作流列表", font=("微软雅黑", 10, "bold"))
         title_label.grid(row=0, column=0, sticky="w", pady=(0, 5))
 
-        # 创建工作流列表和滚动条
-        list_container = ttk.Frame(list_frame)
-        list_container.grid(row=1, column=0, sticky="nsew")
-        list_container.grid_rowconfigure(0, weight=1)
-        list_container.grid_columnconfigure(0, weight=1)
-
-        self.workflow_listbox = tk.Listbox(list_container, selectmode=tk.SINGLE, font=("微软雅黑", 9), activestyle="none")
-        scrollbar = ttk.Scrollbar(list_container, orient=tk.VERTICAL, command=self.workflow_listbox.yview)
-        self.workflow_listbox.configure(yscrollcommand=scrollbar.set)
-        self.workflow_listbox.grid(row=0, column=0, sticky="nsew")
-        scrollbar.grid(row=0, column=1, sticky="ns")
+        # 搜索框，输入时按名称和动作路径过滤列表，Esc 清空
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(list_frame, textvariable=self.search_var)
+        self.search_entry.grid(row=1, column=0, sticky="ew", pady=(0, 5))
+        self.search_entry.state(['disabled'])
+        self.search_var.trace_add('write', lambda *args: self._refresh_search())
+        self.search_entry.bind('<Escape>', lambda e: self.search_var.set(""))
+
+        # 创建工作流列表，只渲染可见的行
+        self.workflow_list = WorkflowListView(
+            list_frame,
+            format_row=self._format_workflow_row,
+            font=("微软雅黑", 9),
+            activestyle="none"
+        )
+        self.workflow_list.grid(row=2, column=0, sticky="nsew")
+        self.workflow_listbox = self.workflow_list.listbox
 
         # 绑定事件
-        self.workflow_listbox.bind('<<ListboxSelect>>', self._on_select_workflow)
+        self.workflow_listbox.bind('<<ListboxSelect>>', self._on_select_workflow, add='+')
         self.workflow_listbox.bind('<Double-Button-1>', self._on_double_click_workflow)
 
         # 创建右侧按钮框架
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=0, column=1, sticky="n")
 
-        # 添加按钮
-        buttons = [
-            ("新建工作流", self._create_workflow),
-            ("编辑工作流", self._edit_workflow),
-            ("删除工作流", self._delete_workflow),
-            ("复制工作流", self._copy_workflow),
-            ("执行工作流", self._execute_workflow)
+        # 添加按钮，按编辑、执行、路径、导入导出分组，组之间用分隔线隔开
+        button_groups = [
+            [
+                ("新建工作流", self._create_workflow),
+                ("编辑工作流", self._edit_workflow),
+                ("删除工作流", self._delete_workflow),
+                ("复制工作流", self._copy_workflow)
+            ],
+            [
+                ("执行工作流", self._execute_workflow),
+                ("暂停/继续", self._toggle_pause_workflow),
+                ("停止执行", self._stop_workflow),
+                ("定时执行", self._edit_schedules)
+            ],
+            [
+                ("检查路径", self._check_all_paths),
+                ("替换路径", self._rewrite_paths)
+            ],
+            [
+                ("导入工作流", self._import_bundle),
+                ("导出工作流", self._export_bundle)
+            ]
         ]
 
-        for text, command in buttons:
-            btn = ttk.Button(button_frame, text=text, command=command, width=15)
-            btn.pack(pady=5)
+        # 依赖工作流数据的按钮在加载完成前禁用
+        data_commands = {
+            self._create_workflow, self._edit_workflow, self._delete_workflow,
+            self._copy_workflow, self._execute_workflow, self._edit_schedules, self._check_all_paths,
+            self._rewrite_paths, self._import_bundle, self._export_bundle
+        }
+        self.data_buttons: List[ttk.Button] = []
+        for position, buttons in enumerate(button_groups):
+            if position:
+                ttk.Separator(button_frame, orient=tk.HORIZONTAL).pack(fill=tk.X, pady=4)
+            for text, command in buttons:
+                btn = ttk.Button(button_frame, text=text, command=command, width=15)
+                btn.pack(pady=2)
+                if command in data_commands:
+                    btn.state(['disabled'])
+                    self.data_buttons.append(btn)
+
+        # 执行状态栏
+        self.status_var = tk.StringVar(value="正在加载工作流...")
+        status_label = ttk.Label(main_frame, textvariable=self.status_var, font=("微软雅黑", 9))
+        status_label.grid(row=1, column=0, columnspan=2, sticky="w", pady=(5, 0))
 
     def _update_workflow_list(self) -> None:
-        """更新工作流列表"""
-        self.workflow_listbox.delete(0, tk.END)
-        self.list_item_to_id.clear()
-
-        # 按名称排序显示
-        workflows = sorted(
-            self.workflow_manager.workflows.values(),
-            key=lambda w: w.name
+        """重新加载整个工作流列表，列表视图按名称排序显示"""
+        self.workflow_list.set_items(
+            (workflow.id, workflow.name)
+            for workflow in self.workflow_manager.workflows.values()
+        )
+
+    def _on_first_map(self, event: tk.Event) -> None:
+        """窗口首次显示后，在绘制完成时记录首次绘制耗时"""
+        if event.widget is not self.root or self.startup_metrics['first_paint'] is not None:
+            return
+
+        def record() -> None:
+            if self.startup_metrics['first_paint'] is None:
+                self.startup_metrics['first_paint'] = time.perf_counter() - self.start_time
+
+        self.root.after_idle(record)
+
+    def _load_workflows(self) -> None:
+        """在后台线程中加载工作流，完成后分批填充列表"""
+        loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="workflow-load")
+        future = loader.submit(self.workflow_manager.load_workflows)
+        loader.shutdown(wait=False)
+
+        def fill(_) -> None:
+            # 按名称顺序分批添加，先显示的是列表顶部的行
+            items = sorted(
+                ((workflow.id, workflow.name) for workflow in self.workflow_manager.workflows.values()),
+                key=lambda item: (item[1], item[0])
+            )
+            self._fill_workflow_list(items, 0)
+
+        self._when_done(future, fill, "加载工作流出错")
+
+    def _fill_workflow_list(self, items: List[Tuple[str, str]], start: int) -> None:
+        """向列表中添加一批工作流，其余的在下一次事件循环中添加"""
+        end = start + LOAD_CHUNK_SIZE
+        self.workflow_list.insert_many(items[start:end])
+        if end < len(items):
+            self.status_var.set(f"正在加载工作流... ({end}/{len(items)})")
+            self.root.after(1, lambda: self._fill_workflow_list(items, end))
+            return
+
+        self.loaded = True
+        self.startup_metrics['fully_loaded'] = time.perf_counter() - self.start_time
+        for btn in self.data_buttons:
+            btn.state(['!disabled'])
+        self.search_entry.state(['!disabled'])
+        self.status_var.set(f"就绪: 已加载 {len(items)} 个工作流，用时 {self.startup_metrics['fully_loaded']:.2f} 秒")
+        started, error = self.scheduler.start()
+        if not started:
+            self.status_var.set(f"{self.status_var.get()}；{error}，本窗口不执行定时计划")
+
+        # 后台检查已加载动作的工作流，延迟加载的工作流在打开时再检查
+        self._validate_workflows(
+            [w.id for w in self.workflow_manager.workflows.values() if w.actions_loaded]
+        )
+        self.root.after(STORE_POLL_INTERVAL, self._poll_store_changes)
+        self._build_search_index(self.workflow_manager.build_search_index(SEARCH_INDEX_CHUNK_SIZE))
+
+    def _build_search_index(self, builder: Iterator[int]) -> None:
+        """在事件循环的空闲中分批建立搜索索引，提前搜索时由 search 一次建完"""
+        if next(builder, None) is not None:
+            self.root.after(1, lambda: self._build_search_index(builder))
+
+    def _refresh_search(self) -> None:
+        """按搜索框的内容更新列表，搜索框为空时显示全部工作流"""
+        query = self.search_var.get().strip()
+        if not query:
+            if self.workflow_list.showing_results:
+                self.workflow_list.clear_results()
+                self.status_var.set("就绪")
+            return
+        results = self.workflow_manager.search(query, SEARCH_LIMIT)
+        self.workflow_list.show_results((result.workflow_id, result.path) for result in results)
+        if len(results) >= SEARCH_LIMIT:
+            self.status_var.set(f"搜索: 只显示前 {SEARCH_LIMIT} 个结果")
+        else:
+            self.status_var.set(f"搜索: 找到 {len(results)} 个工作流")
+
+    def _poll_store_changes(self) -> None:
+        """定时合并其他程序对工作流文件的修改"""
+        try:
+            changed, removed = self.workflow_manager.reload_changes()
+        except StorageError as e:
+            self.status_var.set(str(e))
+        else:
+            for workflow_id in changed:
+                self.workflow_list.update_item(workflow_id, self.workflow_manager.workflows[workflow_id].name)
+            for workflow_id in removed:
+                self.path_problems.pop(workflow_id, None)
+                self.workflow_list.remove(workflow_id)
+            if changed or removed:
+                self.scheduler.refresh(*changed, *removed)
+                self._refresh_search()
+                self.status_var.set(f"已载入其他程序的修改: {len(changed) + len(removed)} 个工作流")
+                self._validate_workflows(changed)
+        finally:
+            self.root.after(STORE_POLL_INTERVAL, self._poll_store_changes)
+
+    def _format_workflow_row(self, workflow_id: str, name: str) -> str:
+        """生成工作流列表行的显示文本，存在无效路径的工作流带有标记"""
+        if workflow_id in self.path_problems:
+            return f"⚠ {name}"
+        return name
+
+    def _when_done(self, future: Future, callback: Callable, error_message: str = "路径检查出错") -> None:
+        """在UI线程中等待后台任务完成后调用回调"""
+        if not future.done():
+            self.root.after(50, lambda: self._when_done(future, callback, error_message))
+            return
+        error = future.exception()
+        if error:
+            self.status_var.set(f"{error_message}: {error}")
+            return
+        callback(future.result())
+
+    def _validate_workflows(
+        self,
+        workflow_ids: List[str],
+        on_done: Optional[Callable[[Dict[str, List[PathProblem]]], None]] = None
+    ) -> None:
+        """在后台检查工作流的动作路径，完成后更新列表中的标记
+
+        Args:
+            workflow_ids: 要检查的工作流ID
+            on_done: 检查完成后在UI线程中调用，参数为有问题的工作流
+        """
+        workflows = [self.workflow_manager.get_workflow(wid) for wid in workflow_ids]
+        workflows = [w for w in workflows if w]
+        if not workflows:
+            return
+
+        def apply(problems: Dict[str, List[PathProblem]]) -> None:
+            for workflow in workflows:
+                had_problems = workflow.id in self.path_problems
+                if workflow.id in problems:
+                    self.path_problems[workflow.id] = problems[workflow.id]
+                else:
+                    self.path_problems.pop(workflow.id, None)
+                if had_problems != (workflow.id in problems):
+                    self.workflow_list.refresh_item(workflow.id)
+            if on_done:
+                on_done(problems)
+
+        self._when_done(self.path_validator.validate_async(workflows), apply)
+
+    def _check_all_paths(self) -> None:
+        """检查所有工作流的动作路径"""
+        self.status_var.set("正在检查路径...")
+
+        def report(problems: Dict[str, List[PathProblem]]) -> None:
+            if problems:
+                self.status_var.set(f"路径检查完成: {len(problems)} 个工作流存在无效路径")
+            else:
+                self.status_var.set("路径检查完成: 所有路径有效")
+
+        self._validate_workflows(list(self.workflow_manager.workflows), report)
+
+    def _rewrite_paths(self) -> None:
+        """文件夹被移动后，将所有工作流中该文件夹下的路径替换为新位置"""
+        old_prefix = simpledialog.askstring("替换路径", "请输入原文件夹路径:")
+        if not old_prefix:
+            return
+        usages = self.workflow_manager.find_path_usages(old_prefix, include_children=True)
+        if not usages:
+            messagebox.showinfo("提示", "没有动作使用该文件夹下的路径")
+            return
+        new_prefix = filedialog.askdirectory(parent=self.root, title="选择新文件夹")
+        if not new_prefix:
+            return
+        action_count = sum(len(positions) for positions in usages.values())
+        if not messagebox.askyesno("确认", f"将替换 {len(usages)} 个工作流中 {action_count} 个动作的路径，是否继续？"):
+            return
+
+        try:
+            counts = self.workflow_manager.rewrite_path_prefix(old_prefix, new_prefix)
+        except StorageError as e:
+            messagebox.showerror("错误", str(e))
+            return
+        self._refresh_search()
+        self.status_var.set(f"路径替换完成: {len(counts)} 个工作流中的 {sum(counts.values())} 个动作")
+        self._validate_workflows(list(counts))
+
+    def _import_bundle(self) -> None:
+        """导入其他人导出的工作流包，按工作流ID合并"""
+        path = filedialog.askopenfilename(
+            parent=self.root, title="选择工作流包",
+            filetypes=[("工作流包", f"*{BUNDLE_EXTENSION}"), ("所有文件", "*.*")]
+        )
+        if not path:
+            return
+        policy = ImportOptionsDialog(self.root, os.path.basename(path)).result
+        if policy is None:
+            return
+        try:
+            total = os.path.getsize(path)
+        except OSError as e:
+            messagebox.showerror("错误", f"无法读取工作流包: {e}")
+            return
+        self._step_import(iter_import(self.workflow_manager, path, policy, IMPORT_BATCH_SIZE), total)
+
+    def _step_import(self, importer: Iterator[ImportReport], total: int, shown: int = 0) -> None:
+        """在事件循环中逐批导入，每批导入后更新列表和进度
+
+        Args:
+            importer: iter_import 返回的迭代器
+            total: 文件总字节数
+            shown: 已添加到列表中的工作流数量
+        """
+        try:
+            report = next(importer)
+        except StopIteration:
+            return
+        except (OSError, StorageError) as e:
+            messagebox.showerror("错误", f"导入失败: {e}")
+            return
+
+        workflows = self.workflow_manager.workflows
+        self.workflow_list.insert_many(
+            (workflow_id, workflows[workflow_id].name)
+            for workflow_id in report.imported_ids[shown:]
+            if workflow_id in workflows
+        )
+        # 导入的工作流可能带有定时计划
+        self.scheduler.refresh(*report.imported_ids[shown:])
+        if report.bytes_read < total:
+            self.status_var.set(f"正在导入工作流... {report.bytes_read * 100 // total}%，已导入 {report.imported} 个")
+            self.root.after(1, lambda: self._step_import(importer, total, len(report.imported_ids)))
+            return
+
+        # 已读到文件末尾，结束迭代器以关闭文件
+        importer.close()
+        self._refresh_search()
+        self.status_var.set(
+            f"导入完成: 新增 {report.added} 个，替换 {report.replaced} 个，改名 {report.renamed} 个，"
+            f"跳过 {report.skipped} 个"
+        )
+        if report.invalid:
+            messagebox.showwarning("警告", f"{report.invalid} 行无法解析，已跳过:\n" + "\n".join(report.errors[:10]))
+        self._validate_workflows(report.imported_ids)
+
+    def _export_bundle(self) -> None:
+        """导出工作流包，显示搜索结果时只导出结果中的工作流"""
+        if self.workflow_list.showing_results:
+            workflow_ids = self.workflow_list.result_ids()
+        else:
+            workflow_ids = list(self.workflow_manager.workflows)
+        if not workflow_ids:
+            messagebox.showinfo("提示", "没有可导出的工作流")
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self.root, title=f"导出 {len(workflow_ids)} 个工作流",
+            defaultextension=BUNDLE_EXTENSION,
+            filetypes=[("工作流包", f"*{BUNDLE_EXTENSION}"), ("所有文件", "*.*")]
+        )
+        if not path:
+            return
+
+        # 在后台线程中编码和写入，先在UI线程中复制工作流，导出期间的修改不影响导出的内容
+        workflows = [self.workflow_manager.workflows[workflow_id].snapshot() for workflow_id in workflow_ids]
+        exporter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="workflow-export")
+        future = exporter.submit(export_bundle, path, workflows)
+        exporter.shutdown(wait=False)
+        self.status_var.set(f"正在导出 {len(workflows)} 个工作流...")
+        self._when_done(
+            future,
+            lambda count: self.status_var.set(f"导出完成: {count} 个工作流"),
+            "导出工作流出错"
         )
-        for workflow in workflows:
-            self.workflow_listbox.insert(tk.END, workflow.name)
-            self.list_item_to_id[workflow.name] = workflow.id
 
     def _on_select_workflow(self, event: tk.Event) -> None:
         """处理工作流选择事件"""
@@ -102,29 +467,16 @@ class MainWindow:
 
     def _on_double_click_workflow(self, event: tk.Event) -> None:
         """处理工作流双击事件"""
-        self._edit_workflow()
+        if self.loaded:
+            self._edit_workflow()
 
     def _create_workflow(self) -> None:
         """创建新工作流"""
-        dialog = WorkflowDialog(self.root, on_save=self._handle_workflow_save)
-        if dialog.result:
-            workflow_name, actions = dialog.result
-            workflow = Workflow(name=workflow_name)
-            for action in actions:
-                workflow.add_action(action['type'], action['path'], action['delay'])
-            success, error = self.workflow_manager.add_workflow(workflow)
-            if not success:
-                messagebox.showerror("错误", error)
-            else:
-                self._update_workflow_list()
+        WorkflowDialog(self.root, on_save=self._handle_workflow_save, path_validator=self.path_validator)
 
     def _get_selected_workflow_id(self) -> Optional[str]:
         """获取当前选中的工作流ID"""
-        selection = self.workflow_listbox.curselection()
-        if not selection:
-            return None
-        workflow_name = self.workflow_listbox.get(selection[0])
-        return self.list_item_to_id.get(workflow_name)
+        return self.workflow_list.selected_id()
 
     def _edit_workflow(self) -> None:
         """编辑工作流"""
@@ -135,30 +487,57 @@ class MainWindow:
 
         workflow = self.workflow_manager.get_workflow(workflow_id)
         if workflow:
-            actions = [{'type': a.type, 'path': a.path, 'delay': a.delay} for a in workflow.actions]
-            dialog = WorkflowDialog(self.root, workflow_name=workflow.name, actions=actions, on_save=lambda name, acts: self._handle_workflow_edit(workflow_id, name, acts))
+            actions = [a.to_dict() for a in workflow.actions]
+            dialog = WorkflowDialog(
+                self.root,
+                workflow_name=workflow.name,
+                actions=actions,
+                on_save=lambda name, acts, limit: self._handle_workflow_edit(workflow_id, name, acts, limit),
+                max_concurrency=workflow.max_concurrency,
+                path_validator=self.path_validator
+            )
+
+    def _build_actions(self, actions: List[Dict]) -> List[Action]:
+        """将对话框返回的动作转换为工作流的动作列表"""
+        return [
+            make_action(
+                action['type'],
+                action['path'],
+                action['delay'],
+                action.get('group'),
+                action.get('depends_on')
+            )
+            for action in actions
+        ]
 
-    def _handle_workflow_edit(self, workflow_id: str, workflow_name: str, actions: List[Dict]) -> None:
+    def _handle_workflow_edit(self, workflow_id: str, workflow_name: str, actions: List[Dict], max_concurrency: int) -> None:
         """处理工作流编辑保存
 
         Args:
             workflow_id: 要编辑的工作流ID
             workflow_name: 新的工作流名称
             actions: 新的动作列表
+            max_concurrency: 最大并发动作数
         """
         workflow = self.workflow_manager.get_workflow(workflow_id)
         if workflow:
-            # 更新工作流
+            # 先检查名称，避免修改失败时工作流已被改名
+            if self.workflow_manager.is_name_duplicate(workflow_name, workflow_id):
+                messagebox.showerror("错误", "工作流名称已存在")
+                return
+            # 更新工作流，动作列表先完整建立再一次替换，后台写入线程不会读到编辑到一半的列表
+            new_actions = self._build_actions(actions)
             workflow.name = workflow_name
-            workflow.actions = []
-            for action in actions:
-                workflow.add_action(action['type'], action['path'], action['delay'])
+            workflow.max_concurrency = max_concurrency
+            workflow.actions = new_actions
             # 保存更改
             success, error = self.workflow_manager.update_workflow(workflow)
             if not success:
                 messagebox.showerror("错误", error)
             else:
-                self._update_workflow_list()
+                self.workflow_list.update_item(workflow.id, workflow.name)
+                self._refresh_search()
+                self._validate_workflows([workflow.id])
 
     def _delete_workflow(self) -> None:
         """删除工作流"""
@@ -170,7 +549,9 @@ class MainWindow:
         workflow = self.workflow_manager.get_workflow(workflow_id)
         if workflow and messagebox.askyesno("确认", f"确定要删除工作流 '{workflow.name}' 吗？"):
             if self.workflow_manager.remove_workflow(workflow_id):
-                self._update_workflow_list()
+                self.path_problems.pop(workflow_id, None)
+                self.workflow_list.remove(workflow_id)
+                self.scheduler.refresh(workflow_id)
 
     def _copy_workflow(self) -> None:
         """复制工作流"""
@@ -187,7 +568,11 @@ class MainWindow:
                 if not success:
                     messagebox.showerror("错误", error)
                 else:
-                    self._update_workflow_list()
+                    new_workflow = self.workflow_manager.get_workflow_by_name(target_name)
+                    self.workflow_list.insert(new_workflow.id, new_workflow.name)
+                    self._refresh_search()
+                    self.workflow_list.select(new_workflow.id)
+                    self._validate_workflows([new_workflow.id])
 
     def _execute_workflow(self) -> None:
         """执行工作流"""
@@ -197,27 +582,198 @@ class MainWindow:
             return
 
         workflow = self.workflow_manager.get_workflow(workflow_id)
-        if workflow:
-            for action in workflow.actions:
-                try:
-                    if action.delay > 0:
-                        time.sleep(action.delay)
-                    os.startfile(action.path)
-                except Exception as e:
-                    messagebox.showerror("错误", f"执行动作时出错：{str(e)}")
-                    break
-
-    def _handle_workflow_save(self, workflow_name: str, actions: List[Dict]) -> None:
+        if not workflow:
+            return
+
+        # 执行前先在后台预检路径，避免执行到一半才发现路径无效
+        self.status_var.set(f"正在检查路径: {workflow.name}")
+
+        def start(problems: Dict[str, List[PathProblem]]) -> None:
+            if workflow_id in problems:
+                details = "\n".join(
+                    f"{problem.index + 1}. {problem.path}（{problem.reason}）"
+                    for problem in problems[workflow_id][:10]
+                )
+                if not messagebox.askyesno(
+                    "路径无效",
+                    f"工作流 '{workflow.name}' 有 {len(problems[workflow_id])} 个路径无效：\n{details}\n\n仍要执行吗？"
+                ):
+                    self.status_var.set("就绪")
+                    return
+            self.execution_engine.start(workflow)
+
+        self._validate_workflows([workflow_id], start)
+
+    def _edit_schedules(self) -> None:
+        """编辑选中工作流的定时计划"""
+        workflow_id = self._get_selected_workflow_id()
+        if not workflow_id:
+            messagebox.showwarning("警告", "请先选择一个工作流")
+            return
+
+        workflow = self.workflow_manager.get_workflow(workflow_id)
+        if not workflow:
+            return
+        schedules = ScheduleDialog(
+            self.root,
+            workflow.name,
+            workflow.schedules,
+            lambda schedule_id: self.scheduler.next_run(workflow_id, schedule_id)
+        ).result
+        if schedules is None:
+            return
+        success, error = self.workflow_manager.set_schedules(workflow_id, schedules)
+        if not success:
+            messagebox.showerror("错误", error)
+            return
+        self.scheduler.refresh(workflow_id)
+        enabled = sum(schedule.enabled for schedule in schedules)
+        self.status_var.set(f"已更新定时计划: {workflow.name}（{enabled} 个启用）")
+
+    def _run_scheduled_workflows(self) -> None:
+        """执行到期的定时计划，不再预检路径或询问，无效路径在执行时报告"""
+        try:
+            runs = self.scheduler.poll()
+        except StorageError as e:
+            self.status_var.set(f"{e}，将在下次修改时重试")
+            return
+        for run in runs:
+            workflow = self.workflow_manager.get_workflow(run.workflow_id)
+            self.execution_engine.start(workflow)
+            late = "（补执行）" if run.late else ""
+            self.status_var.set(f"定时执行{late}: {workflow.name}")
+
+    def _toggle_pause_workflow(self) -> None:
+        """暂停或继续选中工作流的执行"""
+        workflow_id = self._get_selected_workflow_id()
+        if not workflow_id:
+            messagebox.showwarning("警告", "请先选择一个工作流")
+            return
+
+        runs = self.execution_engine.active_runs(workflow_id)
+        if not runs:
+            messagebox.showinfo("提示", "该工作流没有正在执行的任务")
+            return
+
+        # 只要有一个执行处于暂停状态就全部继续，否则全部暂停
+        if any(run.status == STATUS_PAUSED for run in runs):
+            for run in runs:
+                run.resume()
+        else:
+            for run in runs:
+                run.pause()
+
+    def _stop_workflow(self) -> None:
+        """停止选中工作流的执行"""
+        workflow_id = self._get_selected_workflow_id()
+        if not workflow_id:
+            messagebox.showwarning("警告", "请先选择一个工作流")
+            return
+
+        for run in self.execution_engine.active_runs(workflow_id):
+            run.cancel()
+
+    def _poll_execution_events(self) -> None:
+        """定时处理执行引擎产生的进度事件"""
+        try:
+            self._measure_ui_stall()
+            self._run_scheduled_workflows()
+            for event in self.execution_engine.poll_events():
+                self._handle_execution_event(event)
+            self._check_save_error()
+            self._check_storage_warnings()
+        finally:
+            self.root.after(EVENT_POLL_INTERVAL, self._poll_execution_events)
+
+    def _measure_ui_stall(self) -> None:
+        """记录本次处理事件比预定时间晚了多久，计入正在进行的执行"""
+        now = time.perf_counter()
+        last, self._last_event_poll = self._last_event_poll, now
+        self._current_stall = 0.0 if last is None else max(0.0, now - last - EVENT_POLL_INTERVAL / 1000)
+        if self._current_stall < UI_STALL_THRESHOLD:
+            return
+        for run in self.execution_engine.active_runs():
+            self._ui_stalls[run.id] = max(self._ui_stalls.get(run.id, 0.0), self._current_stall)
+
+    def _trace_report(self, run_id: str) -> str:
+        """执行结束时附加在状态栏后的追踪摘要，没有记录时为空"""
+        # 在本次间隔内结束的执行已经不在 active_runs 中，单独计入本次的卡顿
+        stall = max(self._ui_stalls.pop(run_id, 0.0), self._current_stall)
+        parts = []
+        summary = self.trace_sink.find_run(run_id)
+        if summary is not None and summary.actions:
+            parts.append(format_summary(summary))
+        if stall >= UI_STALL_THRESHOLD:
+            parts.append(f"界面最长卡顿 {stall * 1000:.0f} ms")
+        return "，".join(parts)
+
+    def _check_save_error(self) -> None:
+        """在状态栏显示后台写入的错误，每个错误只显示一次"""
+        error = self.workflow_manager.save_error
+        if error is not None and error is not self._reported_save_error:
+            self._reported_save_error = error
+            self.status_var.set(f"{error}，将在下次修改时重试")
+
+    def _check_storage_warnings(self) -> None:
+        """在状态栏显示存储后端产生的提示"""
+        warnings = self.workflow_manager.take_storage_warnings()
+        if warnings:
+            self.status_var.set("；".join(warnings))
+
+    def _handle_execution_event(self, event: ExecutionEvent) -> None:
+        """处理单个执行进度事件"""
+        if event.kind == EVENT_ACTION_FAILED:
+            messagebox.showerror("错误", event.message)
+        elif event.kind == EVENT_FINISHED:
+            report = self._trace_report(event.run_id)
+            report = f"，{report}" if report else ""
+            if event.status == STATUS_CANCELLED:
+                self.status_var.set(f"已停止: {event.workflow_name} ({event.completed}/{event.total})")
+            elif event.message:
+                self.status_var.set(f"执行失败: {event.workflow_name} ({event.completed}/{event.total}){report}")
+            else:
+                self.status_var.set(f"执行完成: {event.workflow_name}{report}")
+        elif event.status == STATUS_PAUSED:
+            self.status_var.set(f"已暂停: {event.workflow_name} ({event.completed}/{event.total})")
+        else:
+            self.status_var.set(f"正在执行: {event.workflow_name} ({event.completed}/{event.total})")
+
+    def _on_close(self) -> None:
+        """关闭窗口"""
+        # 加载未完成时存储后端中没有任何修改，不关闭以免把不完整的数据写回文件
+        saved = True
+        if self.loaded:
+            try:
+                self.workflow_manager.flush()
+            except StorageError as e:
+                if not messagebox.askyesno("保存失败", f"{e}\n\n仍要退出吗？未保存的修改将丢失。"):
+                    return
+                saved = False
+        self.scheduler.stop()
+        self.execution_engine.cancel_all(timeout=1.0)
+        self.launcher.close()
+        self.path_validator.shutdown()
+        if self.loaded:
+            try:
+                self.workflow_manager.close()
+            except StorageError as e:
+                # 写入失败已经提示过，不再重复
+                if saved:
+                    messagebox.showerror("错误", str(e))
+        self.root.destroy()
+
+    def _handle_workflow_save(self, workflow_name: str, actions: List[Dict], max_concurrency: int) -> None:
         """处理新建工作流保存"""
         # 创建新工作流
-        workflow = Workflow(name=workflow_name)
-        for action in actions:
-            workflow.add_action(action['type'], action['path'], action['delay'])
+        workflow = Workflow(name=workflow_name, actions=self._build_actions(actions), max_concurrency=max_concurrency)
         success, error = self.workflow_manager.add_workflow(workflow)
         if not success:
             messagebox.showerror("错误", error)
         else:
-            self._update_workflow_list()
+            self.workflow_list.insert(workflow.id, workflow.name)
+            self._refresh_search()
+            self.workflow_list.select(workflow.id)
+            self._validate_workflows([workflow.id])
 
     def run(self) -> None:
         """运行应用程序"""
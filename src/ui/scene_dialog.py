@@ -1,7 +1,224 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
-from typing import Optional, List, Dict, Callable
+from concurrent.futures import Future
+from dataclasses import replace
+from typing import Iterable, Optional, List, Dict, Callable, Set, Tuple
 import os
+import time
+from src.core.ingest import IngestJob, IngestOptions, parse_patterns
+from src.core.launcher import create_launcher
+from src.core.scene import (
+    DEFAULT_MAX_CONCURRENCY, MERGE_OVERWRITE, MERGE_RENAME, MERGE_SKIP,
+    MISFIRE_ALL, MISFIRE_ONCE, MISFIRE_SKIP, Schedule
+)
+from src.core.scheduler import validate_schedule
+from src.core.validation import KIND_FILE, KIND_FOLDER, PathValidator, describe_problem
+from src.ui.action_grid import ActionGridView
+
+
+class DropOptionsDialog(simpledialog.Dialog):
+    """批量拖入时的选项对话框，所有拖入的项目共用一个延迟时间"""
+    def __init__(self, parent: tk.Misc, item_count: int, has_folders: bool):
+        self.item_count = item_count
+        self.has_folders = has_folders
+        super().__init__(parent, "批量添加")
+
+    def body(self, master: tk.Frame) -> tk.Widget:
+        ttk.Label(master, text=f"拖入了 {self.item_count} 个项目", font=("微软雅黑", 9)).grid(
+            row=0, column=0, columnspan=2, sticky="w", pady=(0, 5)
+        )
+        ttk.Label(master, text="延迟时间（秒）:", font=("微软雅黑", 9)).grid(row=1, column=0, sticky="w")
+        self.delay_entry = ttk.Entry(master, width=10)
+        self.delay_entry.insert(0, "0.0")
+        self.delay_entry.grid(row=1, column=1, sticky="w")
+
+        self.expand_var = tk.BooleanVar(value=False)
+        self.recursive_var = tk.BooleanVar(value=True)
+        self.patterns_entry = ttk.Entry(master, width=25)
+        if self.has_folders:
+            ttk.Checkbutton(master, text="将文件夹展开为其中的文件", variable=self.expand_var).grid(
+                row=2, column=0, columnspan=2, sticky="w", pady=(5, 0)
+            )
+            ttk.Checkbutton(master, text="包含子文件夹", variable=self.recursive_var).grid(
+                row=3, column=0, columnspan=2, sticky="w"
+            )
+        ttk.Label(master, text="文件筛选:", font=("微软雅黑", 9)).grid(row=4, column=0, sticky="w", pady=(5, 0))
+        self.patterns_entry.grid(row=4, column=1, sticky="w", pady=(5, 0))
+        ttk.Label(master, text="如 *.pdf;*.docx，留空表示全部文件", font=("微软雅黑", 8)).grid(
+            row=5, column=0, columnspan=2, sticky="w"
+        )
+        return self.delay_entry
+
+    def validate(self) -> bool:
+        try:
+            delay = float(self.delay_entry.get())
+        except ValueError:
+            delay = -1
+        if delay < 0:
+            messagebox.showwarning("警告", "延迟时间必须是非负数", parent=self)
+            return False
+        return True
+
+    def apply(self) -> None:
+        self.result = IngestOptions(
+            delay=float(self.delay_entry.get()),
+            expand_folders=self.expand_var.get(),
+            recursive=self.recursive_var.get(),
+            patterns=parse_patterns(self.patterns_entry.get())
+        )
+
+
+class ImportOptionsDialog(simpledialog.Dialog):
+    """导入工作流包时选择ID或名称冲突的处理方式，结果为 MERGE_POLICIES 之一"""
+    def __init__(self, parent: tk.Misc, file_name: str):
+        self.file_name = file_name
+        super().__init__(parent, "导入工作流")
+
+    def body(self, master: tk.Frame) -> tk.Widget:
+        ttk.Label(master, text=f"导入 {self.file_name}", font=("微软雅黑", 9)).grid(
+            row=0, column=0, sticky="w", pady=(0, 5)
+        )
+        ttk.Label(master, text="已存在相同的工作流时:", font=("微软雅黑", 9)).grid(row=1, column=0, sticky="w")
+        self.policy_var = tk.StringVar(value=MERGE_SKIP)
+        choices = [
+            (MERGE_SKIP, "跳过（ID或名称已存在）"),
+            (MERGE_OVERWRITE, "替换ID相同的工作流"),
+            (MERGE_RENAME, "作为新工作流导入"),
+        ]
+        for row, (policy, text) in enumerate(choices, 2):
+            ttk.Radiobutton(master, text=text, variable=self.policy_var, value=policy).grid(
+                row=row, column=0, sticky="w"
+            )
+        ttk.Label(master, text="后两种方式下，名称与其他工作流重复时加序号改名，如 日报 (2)", font=("微软雅黑", 8)).grid(
+            row=len(choices) + 2, column=0, sticky="w", pady=(5, 0)
+        )
+        return master
+
+    def apply(self) -> None:
+        self.result = self.policy_var.get()
+
+
+class ScheduleDialog(simpledialog.Dialog):
+    """编辑工作流的定时计划，结果为修改后的计划列表"""
+    MISFIRE_LABELS = {
+        MISFIRE_SKIP: "跳过",
+        MISFIRE_ONCE: "补执行一次",
+        MISFIRE_ALL: "每次都补上",
+    }
+
+    def __init__(
+        self,
+        parent: tk.Misc,
+        workflow_name: str,
+        schedules: List[Schedule],
+        next_run: Callable[[str], Optional[float]]
+    ):
+        """
+        Args:
+            parent: 父窗口
+            workflow_name: 工作流名称
+            schedules: 当前的定时计划，对话框修改的是副本
+            next_run: 按计划ID获取下一次执行时间
+        """
+        self.workflow_name = workflow_name
+        self.schedules = [replace(schedule) for schedule in schedules]
+        self.next_run = next_run
+        super().__init__(parent, "定时执行")
+
+    def body(self, master: tk.Frame) -> tk.Widget:
+        ttk.Label(master, text=f"工作流: {self.workflow_name}", font=("微软雅黑", 9)).grid(
+            row=0, column=0, columnspan=3, sticky="w", pady=(0, 5)
+        )
+        self.schedule_listbox = tk.Listbox(master, width=60, height=6, font=("微软雅黑", 9), activestyle="none")
+        self.schedule_listbox.grid(row=1, column=0, columnspan=2, sticky="nsew")
+        list_buttons = ttk.Frame(master)
+        list_buttons.grid(row=1, column=2, sticky="n", padx=(5, 0))
+        ttk.Button(list_buttons, text="启用/停用", command=self._toggle_schedule).pack(pady=(0, 5))
+        ttk.Button(list_buttons, text="删除", command=self._remove_schedule).pack()
+
+        # 添加计划：间隔秒数或 cron 表达式
+        self.kind_var = tk.StringVar(value='interval')
+        ttk.Radiobutton(master, text="间隔（秒）", variable=self.kind_var, value='interval').grid(
+            row=2, column=0, sticky="w", pady=(10, 0)
+        )
+        ttk.Radiobutton(master, text="cron（分 时 日 月 周）", variable=self.kind_var, value='cron').grid(
+            row=3, column=0, sticky="w"
+        )
+        self.rule_var = tk.StringVar()
+        rule_entry = ttk.Entry(master, textvariable=self.rule_var)
+        rule_entry.grid(row=2, column=1, rowspan=2, sticky="ew", pady=(10, 0))
+        ttk.Label(master, text="错过计划时间时:", font=("微软雅黑", 9)).grid(row=4, column=0, sticky="w", pady=(5, 0))
+        self.misfire_var = tk.StringVar(value=self.MISFIRE_LABELS[MISFIRE_ONCE])
+        ttk.Combobox(
+            master, textvariable=self.misfire_var, values=list(self.MISFIRE_LABELS.values()), state="readonly"
+        ).grid(row=4, column=1, sticky="ew", pady=(5, 0))
+        ttk.Button(master, text="添加", command=self._add_schedule).grid(row=2, column=2, rowspan=2, padx=(5, 0), pady=(10, 0))
+        ttk.Label(
+            master, text="例如 0 9 * * mon-fri 表示工作日 9:00；错过指程序未运行或电脑休眠时到期",
+            font=("微软雅黑", 8)
+        ).grid(row=5, column=0, columnspan=3, sticky="w", pady=(5, 0))
+        master.grid_columnconfigure(1, weight=1)
+        self._refresh_list()
+        return rule_entry
+
+    def _refresh_list(self) -> None:
+        self.schedule_listbox.delete(0, tk.END)
+        for schedule in self.schedules:
+            if not schedule.enabled:
+                state = "已停用"
+            else:
+                next_time = self.next_run(schedule.id)
+                state = f"下次 {time.strftime('%m-%d %H:%M:%S', time.localtime(next_time))}" if next_time else "保存后生效"
+            self.schedule_listbox.insert(
+                tk.END, f"{schedule.describe()}    错过时{self.MISFIRE_LABELS[schedule.misfire]}    {state}"
+            )
+
+    def _selected_index(self) -> Optional[int]:
+        selection = self.schedule_listbox.curselection()
+        return selection[0] if selection else None
+
+    def _add_schedule(self) -> None:
+        """按输入添加计划，间隔从现在开始计算"""
+        text = self.rule_var.get().strip()
+        misfire = next(policy for policy, label in self.MISFIRE_LABELS.items() if label == self.misfire_var.get())
+        if self.kind_var.get() == 'interval':
+            try:
+                schedule = Schedule(interval=float(text), misfire=misfire)
+            except ValueError:
+                messagebox.showwarning("警告", "间隔必须是数字", parent=self)
+                return
+        else:
+            schedule = Schedule(cron=text, misfire=misfire)
+        valid, error = validate_schedule(schedule)
+        if not valid:
+            messagebox.showwarning("警告", error, parent=self)
+            return
+        self.schedules.append(schedule)
+        self.rule_var.set("")
+        self._refresh_list()
+
+    def _toggle_schedule(self) -> None:
+        index = self._selected_index()
+        if index is None:
+            return
+        schedule = self.schedules[index]
+        schedule.enabled = not schedule.enabled
+        if schedule.enabled:
+            # 停用期间的执行不算错过，重新启用后从现在开始计算
+            schedule.last_run = None
+        self._refresh_list()
+        self.schedule_listbox.selection_set(index)
+
+    def _remove_schedule(self) -> None:
+        index = self._selected_index()
+        if index is None:
+            return
+        del self.schedules[index]
+        self._refresh_list()
+
+    def apply(self) -> None:
+        self.result = self.schedules
+
 
 class WorkflowDialog:
     def __init__(
@@ -9,11 +226,24 @@ class WorkflowDialog:
         parent: tk.Tk,
         workflow_name: Optional[str] = None,
         actions: Optional[List[Dict]] = None,
-        on_save: Optional[Callable[[str, List[Dict]], None]] = None
+        on_save: Optional[Callable[[str, List[Dict], int], None]] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        path_validator: Optional[PathValidator] = None
     ):
         self.parent = parent
         self.on_save = on_save
         self.actions = actions if actions else []
+        self.max_concurrency_var = tk.IntVar(value=max_concurrency)
+
+        # 路径预检结果：路径 -> 路径类型，用于标记无效的操作
+        self.path_validator = path_validator
+        self.path_kinds: Dict[str, Optional[str]] = {}
+        self._unchecked_paths: Set[str] = set()
+        self._checking_paths = False
+
+        # 正在进行的批量拖入
+        self._ingest_job: Optional[IngestJob] = None
+        self._ingested = 0
 
         # 使用普通的 Toplevel
         self.dialog = tk.Toplevel(parent)
@@ -46,27 +276,35 @@ class WorkflowDialog:
         self.name_entry = ttk.Entry(name_frame, font=("微软雅黑", 9))
         self.name_entry.grid(row=0, column=1, sticky="ew")
 
+        ttk.Label(name_frame, text="最大并发数:", font=("微软雅黑", 9)).grid(row=0, column=2, padx=(10, 10))
+        ttk.Spinbox(name_frame, from_=1, to=64, width=5, textvariable=self.max_concurrency_var).grid(row=0, column=3)
+
         # 操作列表框架
         actions_frame = ttk.LabelFrame(self.dialog, text="操作列表", padding="10")
         actions_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=(5, 10))
         actions_frame.grid_rowconfigure(0, weight=1)
         actions_frame.grid_columnconfigure(0, weight=1)
 
-        # 创建列表容器
-        list_container = ttk.Frame(actions_frame)
-        list_container.grid(row=0, column=0, sticky="nsew")
-        list_container.grid_rowconfigure(0, weight=1)
-        list_container.grid_columnconfigure(0, weight=1)
-
-        # 创建列表和滚动条
-        self.actions_listbox = tk.Listbox(list_container, font=("微软雅黑", 9), activestyle="none")
-        scrollbar = ttk.Scrollbar(list_container, orient=tk.VERTICAL, command=self.actions_listbox.yview)
-        self.actions_listbox.configure(yscrollcommand=scrollbar.set)
-        self.actions_listbox.grid(row=0, column=0, sticky="nsew")
-        scrollbar.grid(row=0, column=1, sticky="ns")
+        # 动作表格只显示可见的行，可直接编辑单元格、多选和拖动排序
+        self.action_grid = ActionGridView(
+            actions_frame,
+            self.actions,
+            describe_problem=self._describe_action,
+            on_edit=self._on_edit_action,
+            on_open=self._open_action_location
+        )
+        self.action_grid.grid(row=0, column=0, sticky="nsew")
+        self.action_grid.tree.bind('<Delete>', lambda e: self._remove_action())
 
-        # 绑定事件
-        self.actions_listbox.bind('<Double-Button-1>', self._on_double_click_action)
+        # 批量拖入的进度，只在拖入后显示
+        self.ingest_frame = ttk.Frame(actions_frame)
+        self.ingest_frame.grid(row=1, column=0, sticky="ew", pady=(5, 0))
+        self.ingest_frame.grid_columnconfigure(0, weight=1)
+        self.ingest_var = tk.StringVar()
+        ttk.Label(self.ingest_frame, textvariable=self.ingest_var, font=("微软雅黑", 9)).grid(row=0, column=0, sticky="w")
+        self.ingest_cancel_button = ttk.Button(self.ingest_frame, text="停止添加", command=self._cancel_ingest, width=10)
+        self.ingest_cancel_button.grid(row=0, column=1)
+        self.ingest_frame.grid_remove()
 
         # 按钮框架
         button_frame = ttk.Frame(self.dialog, padding="10")
@@ -82,6 +320,8 @@ class WorkflowDialog:
             ("添加文件夹", lambda: self._add_action('folder')),
             ("添加文件", lambda: self._add_action('file')),
             ("删除操作", self._remove_action),
+            ("设置延迟", self._set_action_delay),
+            ("并行组", self._set_action_group),
             ("保存", self._save),
             ("取消", self.dialog.destroy)
         ]
@@ -97,8 +337,9 @@ class WorkflowDialog:
         # 设置最小窗口大小
         self.dialog.minsize(500, 300)
 
-        # 更新操作列表
-        self._update_actions_list()
+        # 显示操作列表并检查所有路径
+        self.action_grid.refresh()
+        self._queue_path_check(action['path'] for action in self.actions)
 
     def _center_dialog(self) -> None:
         """将对话框居中显示"""
@@ -124,70 +365,202 @@ class WorkflowDialog:
         if path:
             delay = simpledialog.askfloat("延迟", "请输入延迟时间（秒）:", initialvalue=0.0)
             if delay is not None:
+                start = len(self.actions)
                 self.actions.append({
                     'type': action_type,
                     'path': path,
                     'delay': delay
                 })
-                self._update_actions_list()
+                self.action_grid.rows_appended(start)
+                self.action_grid.select([start])
+                self._queue_path_check([path])
 
     def _remove_action(self) -> None:
-        """移除动作"""
-        selection = self.actions_listbox.curselection()
-        if selection:
-            index = selection[0]
-            del self.actions[index]
-            self._update_actions_list()
-
-    def _update_actions_list(self) -> None:
-        """更新动作列表显示"""
-        self.actions_listbox.delete(0, tk.END)
-        for action in self.actions:
-            type_str = "文件夹" if action['type'] == 'folder' else "文件"
-            self.actions_listbox.insert(tk.END, f"{type_str}: {action['path']} (延迟: {action['delay']}秒)")
+        """移除选中的动作"""
+        self.action_grid.remove_rows(self.action_grid.selected_positions())
+
+    def _set_action_delay(self) -> None:
+        """统一设置选中动作的延迟时间"""
+        positions = self.action_grid.selected_positions()
+        if not positions:
+            messagebox.showwarning("警告", "请先选择一个操作")
+            return
+
+        delay = simpledialog.askfloat(
+            "延迟",
+            f"请输入 {len(positions)} 个操作的延迟时间（秒）:",
+            initialvalue=self.actions[positions[0]]['delay'],
+            minvalue=0.0,
+            parent=self.dialog
+        )
+        if delay is not None:
+            self.action_grid.set_field(positions, 'delay', delay)
+
+    def _set_action_group(self) -> None:
+        """设置选中动作的并行组，相邻且组名相同的动作会同时开始计时"""
+        positions = self.action_grid.selected_positions()
+        if not positions:
+            messagebox.showwarning("警告", "请先选择一个操作")
+            return
+
+        group = simpledialog.askstring(
+            "并行组",
+            "请输入并行组名称（留空表示按顺序执行）:",
+            initialvalue=self.actions[positions[0]].get('group') or ""
+        )
+        if group is not None:
+            self.action_grid.set_field(positions, 'group', group.strip() or None)
+
+    def _describe_action(self, action: Dict) -> Optional[str]:
+        """动作路径的问题说明，路径尚未检查或没有问题时返回 None"""
+        if action['path'] not in self.path_kinds:
+            return None
+        return describe_problem(action['type'], self.path_kinds[action['path']])
+
+    def _on_edit_action(self, position: int, field: str) -> None:
+        """单元格编辑后检查新路径"""
+        if field == 'path':
+            self._queue_path_check([self.actions[position]['path']])
+
+    def _queue_path_check(self, paths: Iterable[str]) -> None:
+        """记录尚未检查过的路径并开始检查"""
+        self._unchecked_paths.update(path for path in paths if path not in self.path_kinds)
+        self._check_paths()
+
+    def _check_paths(self) -> None:
+        """在后台检查尚未检查过的路径，完成后刷新可见的行"""
+        if not self.path_validator or self._checking_paths or not self._unchecked_paths:
+            return
+        paths, self._unchecked_paths = list(self._unchecked_paths), set()
+        self._checking_paths = True
+        self._wait_for_paths(self.path_validator.check_paths_async(paths))
+
+    def _wait_for_paths(self, future: Future) -> None:
+        """等待后台路径检查完成"""
+        if not self.dialog.winfo_exists():
+            return
+        if not future.done():
+            self.dialog.after(50, lambda: self._wait_for_paths(future))
+            return
+        self._checking_paths = False
+        if future.exception() is None:
+            self.path_kinds.update(future.result())
+            self.action_grid.refresh()
+        # 检查期间又有新的路径
+        self._check_paths()
 
     def _save(self) -> None:
         """保存工作流"""
+        if self._ingest_job:
+            messagebox.showwarning("警告", "正在添加拖入的文件，请等待完成或停止添加")
+            return
+
+        self.action_grid.commit_edit()
         workflow_name = self.name_entry.get()
         if not workflow_name:
             messagebox.showwarning("警告", "请输入工作流名称")
             return
 
+        try:
+            max_concurrency = self.max_concurrency_var.get()
+        except tk.TclError:
+            max_concurrency = 0
+        if max_concurrency < 1:
+            messagebox.showwarning("警告", "最大并发数必须是正整数")
+            return
+
         if self.on_save:
-            self.on_save(workflow_name, self.actions)
+            self.on_save(workflow_name, self.actions, max_concurrency)
         self.dialog.destroy()
 
-    def _on_double_click_action(self, event: tk.Event) -> None:
-        """处理操作列表的双击事件"""
-        selection = self.actions_listbox.curselection()
-        if selection:
-            index = selection[0]
-            action = self.actions[index]
-            path = action['path']
+    def _open_action_location(self, position: int) -> None:
+        """打开动作所在的目录"""
+        action = self.actions[position]
+        path = action['path']
 
-            # 如果是文件，打开其所在目录
-            if action['type'] == 'file':
-                path = os.path.dirname(path)
+        # 如果是文件，打开其所在目录
+        if action['type'] == 'file':
+            path = os.path.dirname(path)
 
-            # 打开目录
-            try:
-                os.startfile(path)
-            except Exception as e:
-                messagebox.showerror("错误", f"无法打开路径：{path}\n错误信息：{str(e)}")
+        # 打开目录
+        try:
+            create_launcher()(path)
+        except Exception as e:
+            messagebox.showerror("错误", f"无法打开路径：{path}\n错误信息：{str(e)}")
 
     def _on_drop(self, event: tk.Event) -> None:
         """处理拖拽释放事件"""
         try:
-            # 获取拖拽的文件路径
-            files = event.data.split()
-            for file_path in files:
-                # 移除路径中的引号（如果有）
-                file_path = file_path.strip('"')
-
-                # 检查是文件还是文件夹
-                if os.path.isdir(file_path):
-                    self._add_action('folder', file_path)
-                elif os.path.isfile(file_path):
-                    self._add_action('file', file_path)
-        except Exception as e:
+            # 拖拽数据是Tcl列表，含空格的路径带有花括号
+            paths = [path for path in self.dialog.tk.splitlist(event.data) if path]
+        except tk.TclError as e:
             messagebox.showerror("错误", f"处理拖拽文件时出错：{str(e)}")
+            return
+        if not paths:
+            return
+        if self._ingest_job:
+            messagebox.showwarning("警告", "正在添加拖入的文件，请等待完成或停止添加")
+            return
+
+        has_folders = any(os.path.isdir(path) for path in paths)
+        if len(paths) == 1 and not has_folders:
+            if os.path.isfile(paths[0]):
+                self._add_action('file', paths[0])
+            return
+
+        options = DropOptionsDialog(self.dialog, len(paths), has_folders).result
+        if options is not None:
+            self._start_ingest(paths, options)
+
+    def _start_ingest(self, paths: List[str], options: IngestOptions) -> None:
+        """在后台展开拖入的路径，分批添加到动作列表"""
+        self._ingest_job = IngestJob(paths, options)
+        self._ingested = 0
+        self.ingest_var.set("正在添加...")
+        self.ingest_cancel_button.grid()
+        self.ingest_frame.grid()
+        self._poll_ingest()
+
+    def _poll_ingest(self) -> None:
+        """取出后台产生的动作，每次只追加新行"""
+        job = self._ingest_job
+        if not self.dialog.winfo_exists():
+            job.cancel()
+            return
+        items, finished = job.poll()
+        if items and not job.cancelled:
+            self._append_actions(items, job.options.delay)
+        if not finished:
+            self.ingest_var.set(f"正在添加: 已添加 {self._ingested} 个操作")
+            self.dialog.after(50, self._poll_ingest)
+            return
+
+        self._ingest_job = None
+        self.ingest_cancel_button.grid_remove()
+        if job.error:
+            self.ingest_var.set(f"添加时出错: {job.error}，已添加 {self._ingested} 个操作")
+        elif job.cancelled:
+            self.ingest_var.set(f"已停止添加，已添加 {self._ingested} 个操作")
+        else:
+            self.ingest_var.set(f"添加完成，共添加 {self._ingested} 个操作")
+
+    def _append_actions(self, items: List[Tuple[str, str]], delay: float) -> None:
+        """追加一批动作并刷新一次列表"""
+        start = len(self.actions)
+        for action_type, path in items:
+            self.actions.append({
+                'type': action_type,
+                'path': path,
+                'delay': delay
+            })
+            # 展开时已经知道路径类型，无需再次检查
+            self.path_kinds.setdefault(path, KIND_FOLDER if action_type == 'folder' else KIND_FILE)
+        self._ingested += len(items)
+        self.action_grid.rows_appended(start)
+        self.action_grid.see(len(self.actions) - 1)
+        self._queue_path_check(path for _, path in items)
+
+    def _cancel_ingest(self) -> None:
+        """停止批量添加"""
+        if self._ingest_job:
+            self._ingest_job.cancel()
@@ -0,0 +1,364 @@
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class WorkflowListView:
+    """工作流列表视图
+
+    按名称排序的行保存在内存中，行号就是在排序列表中的位置，通过位置映射到
+    工作流ID。列表框只显示可见窗口内的行：增删改只更新受影响的行，滚动时
+    才重新填充可见窗口，因此开销与工作流总数无关。
+
+    调用 show_results 后进入结果模式，按给定顺序只显示搜索结果，
+    clear_results 恢复显示全部工作流。结果模式中的增删改只更新全部行，
+    新增的工作流不会出现在结果中，需要重新搜索。
+    """
+    def __init__(
+        self,
+        parent: tk.Widget,
+        format_row: Optional[Callable[[str, str], str]] = None,
+        **listbox_options
+    ):
+        """
+        Args:
+            parent: 父组件
+            format_row: 根据 (工作流ID, 名称) 生成显示文本的函数，默认显示名称
+            listbox_options: 传给 tk.Listbox 的选项
+        """
+        self.format_row = format_row
+        self._rows: List[Tuple[str, str]] = []  # (名称, 工作流ID)，按名称排序
+        self._names: Dict[str, str] = {}  # 工作流ID -> 行中的名称
+        self._top = 0  # 可见窗口第一行的位置
+        self._visible = 1  # 可见窗口的行数
+        self._selected_id: Optional[str] = None
+        # 结果模式中显示的 (工作流ID, 附加说明)，为 None 时显示全部行
+        self._results: Optional[List[Tuple[str, Optional[str]]]] = None
+        self._result_positions: Dict[str, int] = {}  # 工作流ID -> 在结果中的位置
+
+        self.frame = ttk.Frame(parent)
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.frame.grid_columnconfigure(0, weight=1)
+
+        self.listbox = tk.Listbox(self.frame, selectmode=tk.SINGLE, exportselection=False, **listbox_options)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.listbox.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        # 滚动和键盘导航作用于整个列表，而不是列表框中的可见行
+        self.listbox.bind('<Configure>', self._on_configure)
+        self.listbox.bind('<<ListboxSelect>>', self._on_listbox_select, add='+')
+        self.listbox.bind('<MouseWheel>', self._on_mousewheel)
+        self.listbox.bind('<Button-4>', lambda e: self._scroll_by(-3))
+        self.listbox.bind('<Button-5>', lambda e: self._scroll_by(3))
+        self.listbox.bind('<Up>', lambda e: self._move_selection(-1))
+        self.listbox.bind('<Down>', lambda e: self._move_selection(1))
+        self.listbox.bind('<Prior>', lambda e: self._move_selection(-self._visible))
+        self.listbox.bind('<Next>', lambda e: self._move_selection(self._visible))
+        self.listbox.bind('<Home>', lambda e: self._move_selection(-len(self._rows)))
+        self.listbox.bind('<End>', lambda e: self._move_selection(len(self._rows)))
+
+    def grid(self, **kwargs) -> None:
+        """布局列表视图"""
+        self.frame.grid(**kwargs)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def showing_results(self) -> bool:
+        """是否处于结果模式"""
+        return self._results is not None
+
+    def show_results(self, results: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """按给定顺序只显示搜索结果
+
+        Args:
+            results: (工作流ID, 附加说明) 序列，附加说明显示在名称之后，可以为 None
+        """
+        self._results = [(workflow_id, note) for workflow_id, note in results if workflow_id in self._names]
+        self._result_positions = {workflow_id: position for position, (workflow_id, _) in enumerate(self._results)}
+        if self._selected_id not in self._result_positions:
+            self._selected_id = None
+        self._top = 0
+        self._render()
+
+    def result_ids(self) -> List[str]:
+        """结果模式下按显示顺序返回结果中的工作流ID"""
+        return [workflow_id for workflow_id, _ in self._results or ()]
+
+    def clear_results(self) -> None:
+        """退出结果模式，显示全部行并保持选中行可见"""
+        if self._results is None:
+            return
+        self._results = None
+        self._result_positions = {}
+        self._top = 0
+        position = self.index_of(self._selected_id) if self._selected_id else None
+        if position is not None:
+            self._top = position - self._visible // 2
+        self._clamp_top()
+        self._render()
+
+    def set_items(self, items: Iterable[Tuple[str, str]]) -> None:
+        """替换全部行
+
+        Args:
+            items: (工作流ID, 名称) 序列
+        """
+        self._names = dict(items)
+        self._rows = sorted((name, workflow_id) for workflow_id, name in self._names.items())
+        if self._selected_id not in self._names:
+            self._selected_id = None
+        if self._results is not None:
+            self.show_results(self._results)
+            return
+        self._clamp_top()
+        self._render()
+
+    def insert(self, workflow_id: str, name: str) -> None:
+        """按名称顺序插入一行"""
+        if workflow_id in self._names:
+            self.update_item(workflow_id, name)
+            return
+        position = bisect_left(self._rows, (name, workflow_id))
+        self._rows.insert(position, (name, workflow_id))
+        self._names[workflow_id] = name
+        if self._results is not None:
+            return
+
+        if position < self._top:
+            # 插入在可见窗口之上，保持当前显示的行不动
+            self._top += 1
+        elif position < self._top + self._visible:
+            self.listbox.insert(position - self._top, self._format(workflow_id, name))
+            if self.listbox.size() > self._visible:
+                self.listbox.delete(self._visible)
+            self._restore_selection()
+        self._update_scrollbar()
+
+    def insert_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        """批量插入行，只重新填充一次可见窗口
+
+        当前可见窗口的第一行保持在顶部，已存在的工作流会被更新。
+
+        Args:
+            items: (工作流ID, 名称) 序列
+        """
+        first_row = self._rows[self._top] if self._results is None and self._top < len(self._rows) else None
+        new_rows = []
+        for workflow_id, name in items:
+            if workflow_id in self._names:
+                self.update_item(workflow_id, name)
+            else:
+                self._names[workflow_id] = name
+                new_rows.append((name, workflow_id))
+        if not new_rows:
+            return
+        # 已排序的新行追加后排序，只需合并两段有序序列
+        new_rows.sort()
+        self._rows.extend(new_rows)
+        self._rows.sort()
+        if self._results is not None:
+            return
+        if first_row is not None:
+            self._top = bisect_left(self._rows, first_row)
+        self._clamp_top()
+        self._render()
+
+    def remove(self, workflow_id: str) -> None:
+        """移除一行"""
+        name = self._names.pop(workflow_id, None)
+        if name is None:
+            return
+        position = bisect_left(self._rows, (name, workflow_id))
+        del self._rows[position]
+        if self._selected_id == workflow_id:
+            self._selected_id = None
+        if self._results is not None:
+            result_position = self._result_positions.get(workflow_id)
+            if result_position is not None:
+                del self._results[result_position]
+                self._result_positions = {
+                    result_id: index for index, (result_id, _) in enumerate(self._results)
+                }
+                self._clamp_top()
+                self._render()
+            return
+
+        if position < self._top:
+            self._top -= 1
+        elif position < self._top + self._visible:
+            if self._clamp_top():
+                # 已滚动到底部，整体上移一行
+                self._render()
+                return
+            self.listbox.delete(position - self._top)
+            bottom = self._top + self._visible - 1
+            if bottom < len(self._rows):
+                self.listbox.insert(tk.END, self._format(self._rows[bottom][1], self._rows[bottom][0]))
+        self._update_scrollbar()
+
+    def update_item(self, workflow_id: str, name: str) -> None:
+        """更新一行，名称变化时移动到新位置"""
+        old_name = self._names.get(workflow_id)
+        if old_name is None:
+            self.insert(workflow_id, name)
+        elif old_name != name and self._results is not None:
+            # 结果模式中行的位置不随名称变化
+            del self._rows[bisect_left(self._rows, (old_name, workflow_id))]
+            insort(self._rows, (name, workflow_id))
+            self._names[workflow_id] = name
+            self.refresh_item(workflow_id)
+        elif old_name != name:
+            selected = self._selected_id == workflow_id
+            self.remove(workflow_id)
+            self.insert(workflow_id, name)
+            if selected:
+                self.select(workflow_id)
+        else:
+            self.refresh_item(workflow_id)
+
+    def refresh_item(self, workflow_id: str) -> None:
+        """重新生成一行的显示文本"""
+        position = self.index_of(workflow_id)
+        if position is not None and self._top <= position < self._top + self._visible:
+            index = position - self._top
+            self.listbox.delete(index)
+            self.listbox.insert(index, self._format(*self._row(position)))
+            self._restore_selection()
+
+    def selected_id(self) -> Optional[str]:
+        """获取选中行的工作流ID"""
+        return self._selected_id
+
+    def select(self, workflow_id: str) -> None:
+        """选中一行并滚动到可见位置"""
+        position = self.index_of(workflow_id)
+        if position is None:
+            return
+        self._selected_id = workflow_id
+        self.see(position)
+        self._restore_selection()
+
+    def index_of(self, workflow_id: str) -> Optional[int]:
+        """获取工作流所在行的位置"""
+        if self._results is not None:
+            return self._result_positions.get(workflow_id)
+        name = self._names.get(workflow_id)
+        if name is None:
+            return None
+        return bisect_left(self._rows, (name, workflow_id))
+
+    def see(self, position: int) -> None:
+        """滚动使指定位置的行可见"""
+        if position < self._top:
+            self._top = position
+        elif position >= self._top + self._visible:
+            self._top = position - self._visible + 1
+        else:
+            return
+        self._clamp_top()
+        self._render()
+
+    def _format(self, workflow_id: str, name: str) -> str:
+        return self.format_row(workflow_id, name) if self.format_row else name
+
+    def _size(self) -> int:
+        """当前显示的总行数"""
+        return len(self._results) if self._results is not None else len(self._rows)
+
+    def _row(self, position: int) -> Tuple[str, str]:
+        """获取当前显示的某一行的 (工作流ID, 名称)，结果模式中名称后附带说明"""
+        if self._results is None:
+            name, workflow_id = self._rows[position]
+            return workflow_id, name
+        workflow_id, note = self._results[position]
+        name = self._names[workflow_id]
+        return workflow_id, f"{name}    {note}" if note else name
+
+    def _clamp_top(self) -> bool:
+        """将可见窗口限制在有效范围内，返回是否发生变化"""
+        top = max(0, min(self._top, self._size() - self._visible))
+        changed = top != self._top
+        self._top = top
+        return changed
+
+    def _render(self) -> None:
+        """重新填充可见窗口"""
+        self.listbox.delete(0, tk.END)
+        end = min(self._top + self._visible, self._size())
+        if end > self._top:
+            self.listbox.insert(tk.END, *(self._format(*self._row(position)) for position in range(self._top, end)))
+        self._restore_selection()
+        self._update_scrollbar()
+
+    def _restore_selection(self) -> None:
+        """在列表框中标记选中行"""
+        self.listbox.selection_clear(0, tk.END)
+        position = self.index_of(self._selected_id) if self._selected_id else None
+        if position is not None and self._top <= position < self._top + self._visible:
+            self.listbox.selection_set(position - self._top)
+            self.listbox.activate(position - self._top)
+
+    def _update_scrollbar(self) -> None:
+        total = self._size()
+        if total <= self._visible:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self._top / total, min(1.0, (self._top + self._visible) / total))
+
+    def _row_height(self) -> int:
+        """列表框中一行的像素高度"""
+        bbox = self.listbox.bbox(0)
+        if bbox:
+            return max(1, bbox[3] + 1)
+        font = tkfont.Font(font=self.listbox.cget('font'))
+        return font.metrics('linespace') + 1
+
+    def _scroll_by(self, rows: int) -> str:
+        self._top += rows
+        self._clamp_top()
+        self._render()
+        return "break"
+
+    def _on_scrollbar(self, *args) -> None:
+        """处理滚动条拖动和点击"""
+        if args[0] == 'moveto':
+            self._top = int(float(args[1]) * self._size())
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            self._top += step * self._visible if args[2] == 'pages' else step
+        self._clamp_top()
+        self._render()
+
+    def _on_mousewheel(self, event: tk.Event) -> str:
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_configure(self, event: tk.Event) -> None:
+        """窗口大小变化时重新计算可见行数"""
+        visible = max(1, (event.height - 4) // self._row_height())
+        if visible != self._visible:
+            self._visible = visible
+            self._clamp_top()
+            self._render()
+
+    def _on_listbox_select(self, event: tk.Event) -> None:
+        selection = self.listbox.curselection()
+        if selection:
+            position = self._top + selection[0]
+            if position < self._size():
+                self._selected_id = self._row(position)[0]
+
+    def _move_selection(self, offset: int) -> str:
+        """用键盘在整个列表中移动选中行"""
+        size = self._size()
+        if not size:
+            return "break"
+        current = self.index_of(self._selected_id) if self._selected_id else None
+        position = 0 if current is None else max(0, min(size - 1, current + offset))
+        self.select(self._row(position)[0])
+        self.listbox.event_generate('<<ListboxSelect>>')
+        return "break"
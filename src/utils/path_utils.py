@@ -34,3 +34,8 @@ class PathUtils:
         """获取文件扩展名"""
         _, ext = os.path.splitext(file_path)
         return ext.lower() if ext else None
+
+    @staticmethod
+    def normalize_path(path: str) -> str:
+        """规范化路径用于比较：统一分隔符、去除多余的 . 和 ..，Windows上不区分大小写"""
+        return os.path.normcase(os.path.normpath(path))
@@ -0,0 +1,64 @@
+import unittest
+from src.core.executor import ActionQueue, resolve_dependencies
+from src.core.scene import make_action
+
+
+def _actions(*specs):
+    """(延迟, group, depends_on) -> 动作列表"""
+    return [make_action('file', f'C:\\a{index}.txt', *spec) for index, spec in enumerate(specs)]
+
+
+class ResolveDependenciesTest(unittest.TestCase):
+    def test_sequential_steps(self):
+        actions = _actions((0, None, None), (0, None, None), (0, None, None))
+        self.assertEqual(resolve_dependencies(actions), [[], [0], [1]])
+
+    def test_group_shares_predecessors(self):
+        actions = _actions((0, None, None), (0, 'g', None), (0, 'g', None), (0, None, None))
+        self.assertEqual(resolve_dependencies(actions), [[], [0], [0], [1, 2]])
+
+    def test_depends_on_ignores_invalid_indexes(self):
+        actions = _actions((0, None, None), (0, None, None), (0, None, [0, 2, 5, -1]))
+        self.assertEqual(resolve_dependencies(actions), [[], [0], [0]])
+
+
+class ActionQueueTest(unittest.TestCase):
+    def test_delay_counts_from_predecessor_finish(self):
+        scheduled = []
+        run = ActionQueue(_actions((1, None, None), (2, None, None)), 4, lambda index, due: scheduled.append((index, due)))
+        run.start(10.0)
+        self.assertEqual(run.next_due(), 11.0)
+        self.assertEqual(run.pop_due(10.5), [])
+        self.assertEqual(run.pop_due(11.0), [(11.0, 0)])
+        self.assertEqual(run.next_due(), None)
+        run.finish(0, 15.0, True)
+        self.assertEqual(scheduled, [(0, 11.0), (1, 17.0)])
+        self.assertEqual(run.pop_due(17.0), [(17.0, 1)])
+        run.finish(1, 17.0, True)
+        self.assertTrue(run.idle)
+
+    def test_max_concurrency(self):
+        run = ActionQueue(_actions((0, 'g', None), (1, 'g', None), (2, 'g', None)), 2)
+        run.start(0.0)
+        self.assertEqual(run.pop_due(5.0), [(0.0, 0), (1.0, 1)])
+        self.assertEqual(run.in_flight, 2)
+        # 并发已满时不返回计划时间，调用方等待动作结束
+        self.assertIsNone(run.next_due())
+        run.finish(0, 5.0, True)
+        self.assertEqual(run.next_due(), 2.0)
+        self.assertEqual(run.pop_due(5.0), [(2.0, 2)])
+
+    def test_max_concurrency_at_least_one(self):
+        self.assertEqual(ActionQueue(_actions((0, None, None)), 0).max_concurrency, 1)
+
+    def test_failure_does_not_schedule_dependents(self):
+        run = ActionQueue(_actions((0, None, None), (0, None, None)), 4)
+        run.start(0.0)
+        run.pop_due(0.0)
+        run.finish(0, 1.0, False)
+        self.assertTrue(run.idle)
+        self.assertEqual(run.pop_due(100.0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
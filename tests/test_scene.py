@@ -0,0 +1,147 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.core.scene import Schedule, StorageError, Workflow, WorkflowManager
+from src.core.storage import JsonStorage
+
+
+class FailingStorage(JsonStorage):
+    """fail 为 True 时提交失败"""
+    fail = False
+
+    def commit(self, workflows, changed=(), removed=()):
+        if self.fail:
+            raise StorageError("磁盘已满")
+        super().commit(workflows, changed, removed)
+
+
+class ManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "workflows.json")
+        self.storage = FailingStorage(self.path)
+        self.manager = WorkflowManager(storage=self.storage)
+
+    def tearDown(self):
+        self.storage.fail = False
+        self.manager.close()
+        shutil.rmtree(self.directory)
+
+    def add(self, name, *paths):
+        workflow = Workflow(name)
+        for path in paths:
+            workflow.add_action('file', path, 0)
+        self.assertEqual(self.manager.add_workflow(workflow), (True, ""))
+        return workflow
+
+    def reloaded(self):
+        """从文件重新加载的工作流：名称 -> 动作路径"""
+        manager = WorkflowManager(self.path)
+        try:
+            return {workflow.name: [action.path for action in workflow.actions] for workflow in manager.workflows.values()}
+        finally:
+            manager.close()
+
+
+class WorkflowSnapshotTest(unittest.TestCase):
+    def test_later_changes_do_not_affect_snapshot(self):
+        workflow = Workflow("一", schedules=[Schedule(interval=60)])
+        workflow.add_action('file', "C:\\a.txt", 0)
+        copy = workflow.snapshot()
+        self.assertEqual(copy, workflow)
+        workflow.name = "改名"
+        workflow.add_action('file', "C:\\b.txt", 0)
+        workflow.schedules[0].enabled = False
+        self.assertEqual(copy.name, "一")
+        self.assertEqual([action.path for action in copy.actions], ["C:\\a.txt"])
+        self.assertTrue(copy.schedules[0].enabled)
+
+    def test_lazy_workflow_stays_lazy(self):
+        loads = []
+        workflow = Workflow("一", actions_loader=lambda: loads.append(1) or [])
+        copy = workflow.snapshot()
+        self.assertFalse(copy.actions_loaded)
+        self.assertEqual(copy.to_dict()['actions'], [])
+        self.assertEqual(loads, [1])
+
+
+class BatchTest(ManagerTestCase):
+    def test_commits_once(self):
+        with self.manager.batch():
+            self.add("一", "C:\\a.txt")
+            self.add("二")
+            self.assertEqual(self.reloaded(), {})
+        self.assertEqual(self.reloaded(), {"一": ["C:\\a.txt"], "二": []})
+
+    def test_exception_restores_everything(self):
+        first = self.add("一", "C:\\a.txt")
+        with self.assertRaises(RuntimeError):
+            with self.manager.batch():
+                first.name = "改名"
+                first.add_action('file', "C:\\b.txt", 1)
+                self.manager.update_workflow(first)
+                self.add("二")
+                raise RuntimeError()
+        self.assertEqual([workflow.name for workflow in self.manager.workflows.values()], ["一"])
+        self.assertEqual([action.path for action in first.actions], ["C:\\a.txt"])
+        self.assertIs(self.manager.get_workflow_by_name("一"), first)
+        self.assertIsNone(self.manager.get_workflow_by_name("改名"))
+        self.assertEqual(self.reloaded(), {"一": ["C:\\a.txt"]})
+
+    def test_write_failure_restores_and_retries(self):
+        first = self.add("一")
+        self.storage.fail = True
+        with self.assertRaises(StorageError):
+            with self.manager.batch():
+                self.manager.remove_workflow(first.id)
+                self.add("二")
+        self.assertEqual(list(self.manager.workflows), [first.id])
+        self.assertIsNone(self.manager.get_workflow_by_name("二"))
+        self.storage.fail = False
+        self.manager.save_workflows()
+        self.assertEqual(self.reloaded(), {"一": []})
+
+
+class RewritePathPrefixTest(ManagerTestCase):
+    def test_rewrites_prefix_and_children_only(self):
+        old, new = os.path.join(self.directory, "proj"), os.path.join(self.directory, "moved")
+        first = self.add(
+            "一",
+            os.path.join(old, "a.txt"),
+            old,
+            os.path.join(self.directory, "project", "b.txt"),
+            os.path.join(old, "sub", "c.txt")
+        )
+        second = self.add("二", os.path.join(self.directory, "other.txt"))
+        previous = first.actions
+        self.assertEqual(self.manager.rewrite_path_prefix(old, new), {first.id: 3})
+        expected = [
+            os.path.join(new, "a.txt"),
+            new,
+            os.path.join(self.directory, "project", "b.txt"),
+            os.path.join(new, "sub", "c.txt")
+        ]
+        self.assertEqual([action.path for action in first.actions], expected)
+        # 正在读取原动作列表的其他线程不受影响
+        self.assertIsNot(first.actions, previous)
+        self.assertEqual(previous[0].path, os.path.join(old, "a.txt"))
+        self.assertEqual(self.manager.find_path_usages(new, include_children=True), {first.id: [0, 1, 3]})
+        self.assertEqual(self.manager.find_path_usages(old, include_children=True), {})
+        self.assertEqual(self.reloaded(), {"一": expected, "二": [os.path.join(self.directory, "other.txt")]})
+        self.assertEqual(self.manager.rewrite_path_prefix(old, new), {})
+        self.assertEqual(len(second.actions), 1)
+
+    def test_write_failure_keeps_old_paths(self):
+        old = os.path.join(self.directory, "proj")
+        path = os.path.join(old, "a.txt")
+        first = self.add("一", path)
+        self.storage.fail = True
+        with self.assertRaises(StorageError):
+            self.manager.rewrite_path_prefix(old, os.path.join(self.directory, "moved"))
+        self.assertEqual([action.path for action in first.actions], [path])
+        self.assertEqual(self.manager.find_path_usages(path), {first.id: [0]})
+
+
+if __name__ == '__main__':
+    unittest.main()
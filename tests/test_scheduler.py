@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from src.core.scene import MISFIRE_ALL, MISFIRE_ONCE, MISFIRE_SKIP, Schedule, Workflow, WorkflowManager
+from src.core.scheduler import CronExpression, Scheduler, validate_schedule
+
+
+def _local(*args):
+    return datetime(*args).timestamp()
+
+
+class CronExpressionTest(unittest.TestCase):
+    def test_names_and_ranges(self):
+        cron = CronExpression("30 9 * * mon-fri")
+        # 2024-01-05 是周五，下一次是周一
+        self.assertEqual(cron.next_after(_local(2024, 1, 5, 9, 30)), _local(2024, 1, 8, 9, 30))
+        self.assertEqual(cron.next_after(_local(2024, 1, 8, 9, 29, 59)), _local(2024, 1, 8, 9, 30))
+
+    def test_steps_and_lists(self):
+        cron = CronExpression("*/15 8,20 * jan *")
+        self.assertEqual(cron.next_after(_local(2024, 1, 1, 8, 50)), _local(2024, 1, 1, 20, 0))
+        self.assertEqual(cron.next_after(_local(2024, 1, 31, 20, 45)), _local(2025, 1, 1, 8, 0))
+
+    def test_sunday_as_zero_or_seven(self):
+        # 2024-01-07 是周日
+        for text in ("0 0 * * 0", "0 0 * * 7", "0 0 * * sun"):
+            self.assertEqual(CronExpression(text).next_after(_local(2024, 1, 3)), _local(2024, 1, 7), text)
+
+    def test_day_or_weekday(self):
+        # 日和周都受限时满足其一即可：1 号或周三
+        cron = CronExpression("0 12 1 * wed")
+        self.assertEqual(cron.next_after(_local(2024, 1, 1, 12, 0)), _local(2024, 1, 3, 12, 0))
+        self.assertEqual(cron.next_after(_local(2024, 1, 31, 12, 0)), _local(2024, 2, 1, 12, 0))
+
+    def test_invalid_expressions(self):
+        for text in ("* * * *", "60 * * * *", "* * * * fri-", "*/0 * * * *", "* * * foo *"):
+            with self.assertRaises(ValueError, msg=text):
+                CronExpression(text)
+
+    def test_validate_schedule(self):
+        self.assertTrue(validate_schedule(Schedule(cron="0 9 * * *"))[0])
+        self.assertTrue(validate_schedule(Schedule(interval=60))[0])
+        self.assertFalse(validate_schedule(Schedule())[0])
+        self.assertFalse(validate_schedule(Schedule(interval=60, cron="0 9 * * *"))[0])
+        self.assertFalse(validate_schedule(Schedule(interval=0.5))[0])
+        self.assertFalse(validate_schedule(Schedule(cron="bad"))[0])
+        self.assertFalse(validate_schedule(Schedule(interval=60, misfire='never'))[0])
+
+
+class MisfireTest(unittest.TestCase):
+    """程序未运行期间错过的执行按 misfire 处理，用固定的时钟启动调度线程"""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.manager = WorkflowManager(os.path.join(self.directory, "workflows.json"))
+        self.scheduler = None
+
+    def tearDown(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        self.manager.close()
+        shutil.rmtree(self.directory)
+
+    def _fire(self, schedule, now):
+        """在 now 启动调度线程，等待计划被触发后返回到期的执行"""
+        workflow = Workflow("定时", schedules=[schedule])
+        self.assertEqual(self.manager.add_workflow(workflow), (True, ""))
+        self.scheduler = Scheduler(self.manager, clock=lambda: now)
+        self.assertEqual(self.scheduler.start(), (True, ""))
+        deadline = time.monotonic() + 5
+        while self.scheduler.next_run(workflow.id, schedule.id) <= now:
+            self.assertLess(time.monotonic(), deadline, "计划没有被触发")
+            time.sleep(0.01)
+        return [(run.scheduled_time, run.late) for run in self.scheduler.poll()]
+
+    def test_recent_run_is_on_time(self):
+        # 最近一次计划时间 1050 在 MISFIRE_GRACE 内照常执行，ONCE 不再另外补执行
+        schedule = Schedule(interval=5, anchor=1000, last_run=1000, misfire=MISFIRE_ONCE)
+        self.assertEqual(self._fire(schedule, 1050.0), [(1050, False)])
+        self.assertEqual(self.scheduler.next_run(self.manager.get_workflow_by_name("定时").id, schedule.id), 1055)
+
+    def test_skip(self):
+        schedule = Schedule(interval=100, anchor=1000, last_run=1000, misfire=MISFIRE_SKIP)
+        self.assertEqual(self._fire(schedule, 1290.0), [])
+
+    def test_once(self):
+        schedule = Schedule(interval=100, anchor=1000, last_run=1000, misfire=MISFIRE_ONCE)
+        self.assertEqual(self._fire(schedule, 1290.0), [(1200, True)])
+
+    def test_all(self):
+        schedule = Schedule(interval=100, anchor=1000, last_run=1000, misfire=MISFIRE_ALL)
+        self.assertEqual(self._fire(schedule, 1290.0), [(1100, True), (1200, True)])
+        workflow = self.manager.get_workflow_by_name("定时")
+        self.assertEqual(workflow.schedules[0].last_run, 1200)
+        self.assertEqual(self.scheduler.next_run(workflow.id, schedule.id), 1300)
+
+
+if __name__ == '__main__':
+    unittest.main()
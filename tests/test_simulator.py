@@ -0,0 +1,81 @@
+import unittest
+from src.core.executor import STATUS_COMPLETED, STATUS_FAILED
+from src.core.scene import Workflow
+from src.core.simulator import simulate_workflow, simulate_workflows
+
+
+def _starts(result):
+    return [(launch.index, launch.start) for launch in result.launches]
+
+
+class SimulateWorkflowTest(unittest.TestCase):
+    def test_delays_accumulate_in_order(self):
+        workflow = Workflow("顺序")
+        workflow.add_action('file', 'C:\\a.txt', 2)
+        workflow.add_action('file', 'C:\\b.txt', 3)
+        workflow.add_action('folder', 'C:\\c', 0)
+        result = simulate_workflow(workflow, launch_time=1.0)
+        self.assertEqual(result.status, STATUS_COMPLETED)
+        # 每个动作的延迟从上一个动作打开结束后开始计算
+        self.assertEqual(_starts(result), [(0, 2.0), (1, 6.0), (2, 7.0)])
+        self.assertEqual(result.duration, 8.0)
+        self.assertEqual(result.peak_concurrency, 1)
+
+    def test_group_limited_by_max_concurrency(self):
+        workflow = Workflow("并行", max_concurrency=2)
+        for index in range(5):
+            workflow.add_action('file', f'C:\\{index}.txt', 0, group='g')
+        result = simulate_workflow(workflow, launch_time=1.0)
+        self.assertEqual(result.peak_concurrency, 2)
+        self.assertEqual(sorted(launch.start for launch in result.launches), [0.0, 0.0, 1.0, 1.0, 2.0])
+        self.assertEqual(result.duration, 3.0)
+
+    def test_depends_on_chain(self):
+        workflow = Workflow("依赖", max_concurrency=4)
+        workflow.add_action('file', 'C:\\a.txt', 1)
+        workflow.add_action('file', 'C:\\b.txt', 5, group='g')
+        workflow.add_action('file', 'C:\\c.txt', 1, group='g')
+        # 只依赖第 0 个动作，不等待同组之后的第 1、2 个动作
+        workflow.add_action('file', 'C:\\d.txt', 1, depends_on=[0])
+        workflow.add_action('file', 'C:\\e.txt', 0, depends_on=[2, 3])
+        result = simulate_workflow(workflow, launch_time=1.0)
+        starts = dict(_starts(result))
+        self.assertEqual(starts, {0: 1.0, 1: 7.0, 2: 3.0, 3: 3.0, 4: 4.0})
+
+    def test_stops_launching_after_failure(self):
+        workflow = Workflow("失败")
+        workflow.add_action('file', 'C:\\a.txt', 0)
+        workflow.add_action('file', 'C:\\bad.txt', 1)
+        workflow.add_action('file', 'C:\\c.txt', 1)
+
+        def launcher(path):
+            if 'bad' in path:
+                raise OSError("找不到文件")
+
+        result = simulate_workflow(workflow, launcher=launcher)
+        self.assertEqual(result.status, STATUS_FAILED)
+        self.assertEqual([launch.index for launch in result.launches], [0, 1])
+        self.assertIn("找不到文件", result.launches[1].error)
+        self.assertTrue(result.error)
+
+
+class SimulateWorkflowsTest(unittest.TestCase):
+    def test_overlap_and_failures(self):
+        first = Workflow("一")
+        first.add_action('file', 'C:\\a.txt', 4)
+        second = Workflow("二")
+        second.add_action('file', 'C:\\bad.txt', 2)
+
+        def launcher(path):
+            if 'bad' in path:
+                raise OSError("打开失败")
+
+        report = simulate_workflows([first, second], launch_time=1.0, launcher=launcher)
+        self.assertEqual(report.duration, 5.0)
+        self.assertEqual(report.overlap, 3.0)
+        self.assertEqual(report.peak_workflows, 2)
+        self.assertEqual([result.workflow_name for result in report.failed], ["二"])
+
+
+if __name__ == '__main__':
+    unittest.main()
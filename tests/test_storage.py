@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.core.scene import StorageError, Workflow, WorkflowManager
+from src.core.storage import JOURNAL_SUFFIX, JournalStorage
+
+
+class JournalRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "workflows.json")
+        manager = WorkflowManager(self.path, journal=True)
+        manager.add_workflow(Workflow("一"))
+        manager.storage.wait_for_compaction()
+        # 不调用 close，保留日志中的记录
+        self.journal = self.path + JOURNAL_SUFFIX
+        self.assertGreater(os.path.getsize(self.journal), 0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_torn_last_record_is_dropped_with_warning(self):
+        with open(self.journal, 'ab') as f:
+            f.write(b'{"op": "put", "workflow": {"id"')
+        manager = WorkflowManager(self.path, journal=True)
+        try:
+            self.assertEqual([workflow.name for workflow in manager.workflows.values()], ["一"])
+            warnings = manager.take_storage_warnings()
+            self.assertEqual(len(warnings), 1)
+            self.assertIn("不完整", warnings[0])
+            self.assertEqual(manager.take_storage_warnings(), [])
+        finally:
+            manager.close()
+
+    def test_corrupt_record_before_end_raises(self):
+        with open(self.journal, 'ab') as f:
+            f.write(b'not json\n{"op": "delete", "id": "x"}\n')
+        with self.assertRaises(StorageError):
+            JournalStorage(self.path).load()
+
+
+class SqliteMigrationTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_migration_is_reported(self):
+        manager = WorkflowManager(os.path.join(self.directory, "workflows.json"))
+        manager.add_workflow(Workflow("一"))
+        manager.close()
+        manager = WorkflowManager(os.path.join(self.directory, "workflows.db"))
+        try:
+            self.assertEqual([workflow.name for workflow in manager.workflows.values()], ["一"])
+            warnings = manager.take_storage_warnings()
+            self.assertEqual(len(warnings), 1)
+            self.assertIn("迁移 1 个工作流", warnings[0])
+        finally:
+            manager.close()
+
+
+if __name__ == '__main__':
+    unittest.main()